@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PragmaDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.pragma_dashboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,171 @@
+"""
+Autenticación JWT con el usuario cacheado
+
+JWTAuthentication consulta auth_user en cada request para resolver el
+user_id del token. Los endpoints de telemetría y polling se llaman muy
+seguido, así que el usuario se guarda en caché por un TTL corto y se
+invalida al guardar o borrar el User (ver signals.py), lo que cubre
+desactivaciones y cambios de contraseña. La lectura va al nivel
+compartido de la caché (`leer_compartidas`), no al LRU del proceso, para
+que la invalidación hecha en un worker valga en todos.
+
+No se guarda la instancia ni el hash de la contraseña: solo los demás
+campos de la fila y un digest del hash (el mismo que simplejwt pone en el
+token). El User se arma con password diferido, que se carga de la BD si
+alguien lo lee (change_password) y que save() no reescribe.
+
+Invalidar cambia además la generación del usuario. Una request que leyó
+la fila antes de un cambio y la escribe en caché después lleva la
+generación vieja, y la entrada se descarta en la siguiente lectura.
+
+Además, cada proceso guarda un LRU acotado de tokens ya verificados (por
+hash del token): un cliente que repite el mismo access token no vuelve a
+pagar la verificación HS256 ni la decodificación mientras no expire.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .utils import leer_compartidas
+
+
+class TokensVerificados:
+	"""LRU acotado de hash de token -> token validado, respetando exp"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._tokens = OrderedDict()
+
+	@staticmethod
+	def clave(raw_token):
+		return hashlib.sha256(raw_token).digest()
+
+	def obtener(self, raw_token):
+		clave = self.clave(raw_token)
+		with self._lock:
+			entrada = self._tokens.get(clave)
+			if entrada is None:
+				return None
+			token, expira = entrada
+			if expira <= time.time():
+				del self._tokens[clave]
+				return None
+			self._tokens.move_to_end(clave)
+			return token
+
+	def guardar(self, raw_token, token):
+		tamano = getattr(settings, 'JWT_VERIFICADOS_CACHE_TAMANO', 2048)
+		expira = token.payload.get('exp')
+		if tamano <= 0 or expira is None:
+			return
+
+		with self._lock:
+			self._tokens[self.clave(raw_token)] = (token, expira)
+			while len(self._tokens) > tamano:
+				self._tokens.popitem(last=False)
+
+	def limpiar(self):
+		with self._lock:
+			self._tokens.clear()
+
+
+tokens_verificados = TokensVerificados()
+
+
+# Campos del User que no se guardan en la caché compartida
+CAMPOS_NO_CACHEADOS = {'password'}
+
+
+def clave_usuario_auth(user_id):
+	return f'auth:usuario:{user_id}'
+
+
+def clave_generacion_auth(user_id):
+	return f'auth:usuario:{user_id}:generacion'
+
+
+def _vida_generacion():
+	# Debe sobrevivir a cualquier entrada escrita con la generación anterior
+	return max(3600, 2 * getattr(settings, 'AUTH_USUARIO_CACHE_TTL', 60))
+
+
+def invalidar_usuario_auth(user_id):
+	"""Descarta el usuario cacheado para autenticación y cambia su generación"""
+	cache.set(clave_generacion_auth(user_id), uuid.uuid4().hex, _vida_generacion())
+	cache.delete(clave_usuario_auth(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+	"""
+	JWTAuthentication que resuelve el usuario desde caché
+
+	Las mismas validaciones que simplejwt (usuario activo y, si está
+	habilitado, token revocado por cambio de contraseña) se aplican sobre
+	el usuario cacheado.
+	"""
+
+	def get_validated_token(self, raw_token):
+		"""Token desde el LRU de verificados antes de la verificación criptográfica"""
+		token = tokens_verificados.obtener(raw_token)
+		if token is None:
+			token = super().get_validated_token(raw_token)
+			tokens_verificados.guardar(raw_token, token)
+		return token
+
+	def get_user(self, validated_token):
+		try:
+			user_id = validated_token[api_settings.USER_ID_CLAIM]
+		except KeyError:
+			raise InvalidToken(_('Token contained no recognizable user identification'))
+
+		clave = clave_usuario_auth(user_id)
+		clave_generacion = clave_generacion_auth(user_id)
+		# Del nivel compartido y en una sola lectura: la invalidación hecha en
+		# otro worker (usuario desactivado, contraseña cambiada) se ve en la
+		# request siguiente
+		leidas = leer_compartidas([clave, clave_generacion])
+		generacion = leidas.get(clave_generacion)
+		datos = leidas.get(clave)
+
+		if datos is None or datos['generacion'] != generacion:
+			try:
+				user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+			except self.user_model.DoesNotExist:
+				raise AuthenticationFailed(_('User not found'), code='user_not_found')
+			datos = {
+				'campos': {
+					campo.attname: getattr(user, campo.attname)
+					for campo in self.user_model._meta.concrete_fields
+					if campo.attname not in CAMPOS_NO_CACHEADOS
+				},
+				'hash_password': get_md5_hash_password(user.password),
+				'generacion': generacion,
+			}
+			cache.set(clave, datos, getattr(settings, 'AUTH_USUARIO_CACHE_TTL', 60))
+		else:
+			# Mismo orden que concrete_fields, como espera from_db
+			user = self.user_model.from_db(
+				self.user_model._default_manager.db,
+				list(datos['campos']),
+				list(datos['campos'].values())
+			)
+
+		if not user.is_active:
+			raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+		if api_settings.CHECK_REVOKE_TOKEN:
+			if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != datos['hash_password']:
+				raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+		return user
@@ -0,0 +1,108 @@
+"""
+Hash de contraseñas en un pool acotado
+
+PBKDF2 ocupa la CPU cientos de milisegundos por login. En un pico de
+logins al inicio de clase esos cálculos acaparan los workers y el resto
+de la API se queda esperando. Los hashes se calculan en un pool de hilos
+propio de cada proceso (hashlib libera el GIL durante PBKDF2) con control
+de admisión: si ya hay HASH_PASSWORD_HILOS calculando y
+HASH_PASSWORD_COLA esperando, la petición se rechaza de inmediato con 429
+en vez de encolarse.
+
+El pool acota cuántos hashes corren a la vez, no cuántos intentos hace un
+cliente (eso es el throttle). En las vistas síncronas el hilo del request
+sigue bloqueado esperando su hash; solo las rechazadas lo liberan antes.
+Por eso los valores por defecto (ver settings) admiten a lo más
+GUNICORN_THREADS - 1 peticiones por proceso: el hilo restante atiende al
+resto de la API durante el pico. Únicamente login_async espera sin ocupar
+un hilo.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework.exceptions import Throttled
+
+_lock = threading.Lock()
+_pool = {'pid': None, 'executor': None, 'admision': None}
+
+
+class HashSaturado(Throttled):
+	default_detail = 'Demasiados inicios de sesión simultáneos, intenta de nuevo en unos segundos.'
+	default_code = 'hash_saturado'
+
+
+def _pool_vigente():
+	# Por pid: un proceso hijo (fork de gunicorn) no hereda los hilos del pool
+	with _lock:
+		if _pool['pid'] != os.getpid():
+			hilos = getattr(settings, 'HASH_PASSWORD_HILOS', 2)
+			cola = getattr(settings, 'HASH_PASSWORD_COLA', 1)
+			_pool.update(
+				pid=os.getpid(),
+				executor=ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='hash-password'),
+				admision=threading.BoundedSemaphore(hilos + cola),
+			)
+		return _pool['executor'], _pool['admision']
+
+
+def _enviar(funcion, *args):
+	"""Envía el cálculo al pool o lanza HashSaturado si no hay cupo"""
+	executor, admision = _pool_vigente()
+	if not admision.acquire(blocking=False):
+		raise HashSaturado(wait=getattr(settings, 'HASH_PASSWORD_REINTENTO', 2))
+
+	try:
+		futuro = executor.submit(funcion, *args)
+	except BaseException:
+		admision.release()
+		raise
+	futuro.add_done_callback(lambda _: admision.release())
+	return futuro
+
+
+def _verificar(password, encoded):
+	"""(es_correcta, requiere_rehash) sin tocar la BD"""
+	rehash = []
+	correcta = check_password(password, encoded, setter=lambda _: rehash.append(True))
+	return correcta, bool(rehash)
+
+
+def verificar_password(user, password):
+	"""
+	Equivalente a user.check_password con el hash en el pool
+
+	Bloquea el hilo del request hasta que termina el hash. Si el hasher
+	preferido cambió, el rehash y su escritura se hacen en el hilo del
+	request, como en Django.
+	"""
+	correcta, rehash = _enviar(_verificar, password, user.password).result()
+	if correcta and rehash:
+		try:
+			user.password = hashear_password(password)
+		except HashSaturado:
+			# El rehash puede esperar al próximo login
+			return correcta
+		user.save(update_fields=['password'])
+	return correcta
+
+
+async def verificar_password_async(user, password):
+	"""verificar_password para vistas async: espera sin bloquear el loop"""
+	correcta, rehash = await asyncio.wrap_future(_enviar(_verificar, password, user.password))
+	if correcta and rehash:
+		try:
+			user.password = await asyncio.wrap_future(_enviar(make_password, password))
+		except HashSaturado:
+			return correcta
+		await user.asave(update_fields=['password'])
+	return correcta
+
+
+def hashear_password(password):
+	"""make_password en el pool"""
+	return _enviar(make_password, password).result()
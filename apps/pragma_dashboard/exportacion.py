@@ -0,0 +1,100 @@
+"""
+Exportación de sesiones para N8N
+
+Una sesión se exporta con sus decisiones, eventos y métricas. La
+exportación masiva recorre las sesiones por keyset (id ascendente) en
+chunks y emite una línea NDJSON por sesión, con un número fijo de
+consultas por chunk sin importar cuántas sesiones se exporten.
+"""
+
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import DecisionTomada, EventoOcurrido
+
+TAMANO_CHUNK_EXPORTACION = 200
+
+
+def datos_sesion_n8n(sesion, decisiones, eventos, metricas):
+	"""Estructura de una sesión tal como la consume N8N"""
+	return {
+		'sesion': {
+			'id': sesion.id,
+			'usuario_id': sesion.usuario_id,
+			'escenario': sesion.escenario_nombre,
+			'fecha_inicio': sesion.fecha_inicio.isoformat() if sesion.fecha_inicio else None,
+			'fecha_fin': sesion.fecha_fin.isoformat() if sesion.fecha_fin else None,
+			'duracion_segundos': sesion.duracion_segundos,
+			'completada': sesion.completada,
+		},
+		'decisiones': decisiones,
+		'eventos': eventos,
+		'metricas_existentes': {
+			'id': metricas.id,
+			'nivel_estres': metricas.nivel_estres,
+			'decisiones_acertadas': metricas.decisiones_acertadas,
+			'decisiones_totales': metricas.decisiones_totales,
+			'tiempo_promedio_decision': metricas.tiempo_promedio_decision,
+			'eventos_manejados': metricas.eventos_manejados,
+		} if metricas else None
+	}
+
+
+def _agrupar_por_sesion(queryset, sesion_ids):
+	"""Una consulta: filas como dict agrupadas por sesion_id"""
+	agrupadas = defaultdict(list)
+	for fila in queryset.filter(sesion_id__in=sesion_ids).order_by('sesion_id', 'id').values():
+		agrupadas[fila['sesion_id']].append(fila)
+	return agrupadas
+
+
+def exportar_sesiones_ndjson(sesiones, cursor=None, limite=None, tamano_chunk=TAMANO_CHUNK_EXPORTACION):
+	"""
+	Generador NDJSON de sesiones con decisiones, eventos y métricas
+
+	Cada chunk usa tres consultas: sesiones (con métricas por JOIN),
+	decisiones y eventos. El id de la última sesión emitida sirve como
+	cursor para reanudar la exportación.
+
+	Args:
+		sesiones: QuerySet de SesionSimulacion ya filtrado
+		cursor: Exportar solo sesiones con id mayor a este
+		limite: Máximo de sesiones a exportar (None = todas)
+		tamano_chunk: Sesiones por chunk
+	"""
+	sesiones = sesiones.select_related('metricas').order_by('id')
+	ultimo_id = cursor
+	emitidas = 0
+
+	while limite is None or emitidas < limite:
+		chunk = sesiones
+		if ultimo_id is not None:
+			chunk = chunk.filter(id__gt=ultimo_id)
+
+		tamano = tamano_chunk if limite is None else min(tamano_chunk, limite - emitidas)
+		chunk = list(chunk[:tamano])
+		if not chunk:
+			break
+
+		ids = [sesion.id for sesion in chunk]
+		decisiones = _agrupar_por_sesion(DecisionTomada.objects.all(), ids)
+		eventos = _agrupar_por_sesion(EventoOcurrido.objects.all(), ids)
+
+		lineas = []
+		for sesion in chunk:
+			datos = datos_sesion_n8n(
+				sesion,
+				decisiones.get(sesion.id, []),
+				eventos.get(sesion.id, []),
+				getattr(sesion, 'metricas', None)
+			)
+			lineas.append(json.dumps(datos, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+
+		yield ''.join(lineas)
+
+		emitidas += len(chunk)
+		ultimo_id = chunk[-1].id
+		if len(chunk) < tamano:
+			break
@@ -0,0 +1,360 @@
+"""
+Ingesta de savefiles de Godot al modelo relacional
+
+Un savefile trae `sesiones[].decisiones[]` con `emotion` y `response_time`.
+Al subirlo se parsea una sola vez y se crean en lote las sesiones, sus
+decisiones y sus métricas de desempeño.
+
+Cada sesión se identifica por un dato estable del savefile (su `id` o, si
+no trae, su `timestamp_inicio`), no por su contenido: volver a subir el
+savefile cuando una sesión ganó decisiones o su `timestamp_fin` actualiza
+esa sesión en vez de crear otra. Una huella del contenido
+(`huella_contenido`) evita reescribir las sesiones que no cambiaron.
+"""
+
+import hashlib
+import json
+import logging
+import math
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import SesionSimulacion, DecisionTomada, MetricaDesempeno
+from .respuestas import invalidar_respuestas_usuario
+from .resumen import invalidar_resumen_dashboard
+
+logger = logging.getLogger(__name__)
+
+ESCENARIO_DESCONOCIDO = 'Desconocido'
+
+# Intentos ante una subida concurrente que inserta las mismas sesiones
+REINTENTOS_INGESTA = 3
+
+# Máximo de una columna IntegerField (integer de PostgreSQL)
+MAX_ENTERO_BD = 2147483647
+
+
+def _parsear_timestamp(valor):
+	"""ISO 8601 de Godot (sin zona horaria) a datetime aware"""
+	if not valor:
+		return None
+	try:
+		fecha = datetime.fromisoformat(str(valor).replace('Z', '+00:00'))
+	except ValueError:
+		return None
+	if timezone.is_naive(fecha):
+		fecha = timezone.make_aware(fecha)
+	return fecha
+
+
+def _decisiones(sesion):
+	"""Decisiones bien formadas de una sesión del savefile"""
+	decisiones = sesion.get('decisiones')
+	if not isinstance(decisiones, list):
+		return []
+	return [decision for decision in decisiones if isinstance(decision, dict)]
+
+
+def _tiempo_respuesta(decision):
+	"""
+	response_time en segundos, acotado a 0..MAX_ENTERO_BD
+
+	0 si falta, no es numérico o no es finito (json acepta Infinity y NaN)
+	"""
+	try:
+		tiempo = float(decision.get('response_time') or 0)
+	except (TypeError, ValueError, OverflowError):
+		return 0.0
+	if not math.isfinite(tiempo):
+		return 0.0
+	return min(max(0.0, tiempo), MAX_ENTERO_BD)
+
+
+def _sha256(texto):
+	return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def huella_contenido(sesion):
+	"""SHA-256 del contenido canónico de una sesión del savefile"""
+	return _sha256(json.dumps(sesion, sort_keys=True, ensure_ascii=False, separators=(',', ':')))
+
+
+def huella_sesion(sesion):
+	"""
+	SHA-256 del identificador estable de una sesión del savefile
+
+	Sin `id` ni `timestamp_inicio` no hay cómo reconocerla en otra subida
+	y se identifica por su contenido.
+	"""
+	if sesion.get('id') not in (None, ''):
+		return _sha256(f"id:{sesion['id']}")
+	if sesion.get('timestamp_inicio'):
+		return _sha256(f"inicio:{sesion['timestamp_inicio']}")
+	return huella_contenido(sesion)
+
+
+def calcular_metricas(sesiones):
+	"""
+	Calcula las métricas de cada sesión en una sola pasada por sus decisiones
+
+	nivel_estres es el porcentaje de decisiones con emoción 'bad' sobre el
+	total de la sesión, redondeado (0 sin decisiones). El savefile no trae
+	un nivel de estrés propio; esta es la definición que usa la ingesta.
+
+	Returns:
+		Lista de dicts con decisiones_totales, decisiones_acertadas,
+		tiempo_promedio_decision (float) y nivel_estres (0-100), uno por
+		sesión
+	"""
+	metricas = []
+	for sesion in sesiones:
+		total = buenas = malas = 0
+		suma_tiempos = 0.0
+		for decision in _decisiones(sesion):
+			emocion = decision.get('emotion') or ''
+			total += 1
+			suma_tiempos += _tiempo_respuesta(decision)
+			buenas += emocion == 'good'
+			malas += emocion == 'bad'
+
+		metricas.append({
+			'decisiones_totales': total,
+			'decisiones_acertadas': buenas,
+			'tiempo_promedio_decision': suma_tiempos / total if total else 0.0,
+			'nivel_estres': round(100 * malas / total) if total else 0,
+		})
+	return metricas
+
+
+def _campos_sesion(sesion, ahora):
+	"""Campos de SesionSimulacion derivados de una sesión del savefile"""
+	decisiones = _decisiones(sesion)
+	inicio = _parsear_timestamp(sesion.get('timestamp_inicio')) or ahora
+	fin = _parsear_timestamp(sesion.get('timestamp_fin'))
+	escenario = next(
+		(str(d['scenario_name']) for d in decisiones if d.get('scenario_name')),
+		ESCENARIO_DESCONOCIDO
+	)
+	return {
+		'escenario_nombre': escenario[:100],
+		'fecha_inicio': inicio,
+		'fecha_fin': fin,
+		'duracion_segundos': min(max(0, int((fin - inicio).total_seconds())), MAX_ENTERO_BD) if fin else 0,
+		'completada': fin is not None,
+	}
+
+
+def _campos_decisiones(sesion):
+	return [
+		{
+			'decision_id': str(decision.get('question') or numero)[:100],
+			'tiempo_respuesta_segundos': round(_tiempo_respuesta(decision)),
+			'fue_acertada': decision.get('emotion') == 'good',
+		}
+		for numero, decision in enumerate(_decisiones(sesion))
+	]
+
+
+def _campos_metrica(metrica):
+	return {
+		'nivel_estres': metrica['nivel_estres'],
+		'decisiones_acertadas': metrica['decisiones_acertadas'],
+		'decisiones_totales': metrica['decisiones_totales'],
+		'tiempo_promedio_decision': int(metrica['tiempo_promedio_decision']),
+	}
+
+
+def _crear(usuario, nuevas, ahora):
+	"""Crea en lote sesiones nuevas con sus decisiones y métricas; devuelve las decisiones creadas"""
+	sesiones = [sesion for sesion, _ in nuevas.values()]
+	objetos_sesion = SesionSimulacion.objects.bulk_create([
+		SesionSimulacion(
+			usuario=usuario,
+			huella_savefile=huella,
+			huella_contenido=contenido,
+			**_campos_sesion(sesion, ahora)
+		)
+		for huella, (sesion, contenido) in nuevas.items()
+	])
+
+	objetos_decision = DecisionTomada.objects.bulk_create([
+		DecisionTomada(sesion=objeto, **campos)
+		for objeto, sesion in zip(objetos_sesion, sesiones)
+		for campos in _campos_decisiones(sesion)
+	])
+
+	MetricaDesempeno.objects.bulk_create([
+		MetricaDesempeno(sesion=objeto, eventos_manejados=0, **_campos_metrica(metrica))
+		for objeto, metrica in zip(objetos_sesion, calcular_metricas(sesiones))
+	])
+	return len(objetos_decision)
+
+
+def _actualizar(cambiadas, ahora):
+	"""
+	Reescribe sesiones ya ingeridas cuyo contenido cambió
+
+	Las decisiones se emparejan por posición con las existentes y se
+	actualizan en lote; las que sobran se crean. Solo si la sesión perdió
+	decisiones se borran las de más.
+
+	Returns:
+		Número de decisiones creadas
+	"""
+	objetos = [objeto for objeto, _, _ in cambiadas]
+	for objeto, sesion, contenido in cambiadas:
+		for campo, valor in _campos_sesion(sesion, ahora).items():
+			setattr(objeto, campo, valor)
+		objeto.huella_contenido = contenido
+		objeto.updated_at = ahora
+	SesionSimulacion.objects.bulk_update(
+		objetos,
+		['escenario_nombre', 'fecha_inicio', 'fecha_fin', 'duracion_segundos',
+		 'completada', 'huella_savefile', 'huella_contenido', 'updated_at']
+	)
+
+	existentes = {objeto.pk: [] for objeto in objetos}
+	for decision in DecisionTomada.objects.filter(sesion__in=objetos).order_by('id'):
+		existentes[decision.sesion_id].append(decision)
+
+	actualizadas, nuevas, sobrantes = [], [], []
+	for objeto, sesion, _ in cambiadas:
+		anteriores = existentes[objeto.pk]
+		campos_decisiones = _campos_decisiones(sesion)
+		for decision, campos in zip(anteriores, campos_decisiones):
+			for campo, valor in campos.items():
+				setattr(decision, campo, valor)
+			actualizadas.append(decision)
+		nuevas += [DecisionTomada(sesion=objeto, **campos) for campos in campos_decisiones[len(anteriores):]]
+		sobrantes += [decision.pk for decision in anteriores[len(campos_decisiones):]]
+
+	DecisionTomada.objects.bulk_update(actualizadas, ['decision_id', 'tiempo_respuesta_segundos', 'fue_acertada'])
+	DecisionTomada.objects.bulk_create(nuevas)
+	if sobrantes:
+		DecisionTomada.objects.filter(pk__in=sobrantes).delete()
+
+	metricas_existentes = {
+		metrica.sesion_id: metrica
+		for metrica in MetricaDesempeno.objects.filter(sesion__in=objetos)
+	}
+	metricas_actualizadas, metricas_nuevas = [], []
+	calculadas = calcular_metricas([sesion for _, sesion, _ in cambiadas])
+	for objeto, metrica in zip(objetos, calculadas):
+		campos = _campos_metrica(metrica)
+		existente = metricas_existentes.get(objeto.pk)
+		if existente is None:
+			metricas_nuevas.append(MetricaDesempeno(sesion=objeto, eventos_manejados=0, **campos))
+			continue
+		for campo, valor in campos.items():
+			setattr(existente, campo, valor)
+		metricas_actualizadas.append(existente)
+
+	MetricaDesempeno.objects.bulk_update(
+		metricas_actualizadas,
+		['nivel_estres', 'decisiones_acertadas', 'decisiones_totales', 'tiempo_promedio_decision']
+	)
+	MetricaDesempeno.objects.bulk_create(metricas_nuevas)
+	return len(nuevas)
+
+
+def _planificar(usuario, unicas):
+	"""
+	Separa las sesiones del savefile en nuevas, cambiadas y sin cambios
+
+	Returns:
+		Tupla (nuevas por huella, lista de (objeto, sesion, contenido),
+		número de sesiones sin cambios)
+	"""
+	# Las sesiones ingeridas antes de huella_contenido tienen en
+	# huella_savefile la huella de su contenido: se reconocen por ella y se
+	# pasan al identificador estable
+	existentes = {
+		objeto.huella_savefile: objeto
+		for objeto in SesionSimulacion.objects.filter(
+			usuario=usuario,
+			huella_savefile__in=[*unicas, *(contenido for _, contenido in unicas.values())]
+		)
+	}
+
+	nuevas, cambiadas, sin_cambios = {}, [], 0
+	for huella, (sesion, contenido) in unicas.items():
+		objeto = existentes.get(huella) or existentes.get(contenido)
+		if objeto is None:
+			nuevas[huella] = (sesion, contenido)
+		elif objeto.huella_contenido != contenido:
+			objeto.huella_savefile = huella
+			cambiadas.append((objeto, sesion, contenido))
+		else:
+			sin_cambios += 1
+	return nuevas, cambiadas, sin_cambios
+
+
+def ingerir_savefile(usuario, datos):
+	"""
+	Crea o actualiza sesiones, decisiones y métricas a partir de un savefile
+
+	Args:
+		usuario: Dueño del savefile
+		datos: Savefile como dict o string JSON
+
+	Returns:
+		Dict con sesiones_creadas, sesiones_actualizadas,
+		sesiones_duplicadas (sin cambios o repetidas en el savefile) y
+		decisiones_creadas
+	"""
+	resultado = {
+		'sesiones_creadas': 0,
+		'sesiones_actualizadas': 0,
+		'sesiones_duplicadas': 0,
+		'decisiones_creadas': 0,
+	}
+
+	if isinstance(datos, str):
+		try:
+			datos = json.loads(datos)
+		except json.JSONDecodeError:
+			return resultado
+
+	sesiones = datos.get('sesiones') if isinstance(datos, dict) else None
+	if not isinstance(sesiones, list):
+		return resultado
+
+	# Deduplicar dentro del mismo savefile: gana la primera aparición
+	unicas = {}
+	for sesion in sesiones:
+		if isinstance(sesion, dict):
+			unicas.setdefault(huella_sesion(sesion), (sesion, huella_contenido(sesion)))
+	resultado['sesiones_duplicadas'] = sum(isinstance(sesion, dict) for sesion in sesiones) - len(unicas)
+
+	for intento in range(1, REINTENTOS_INGESTA + 1):
+		nuevas, cambiadas, sin_cambios = _planificar(usuario, unicas)
+		if not nuevas and not cambiadas:
+			resultado['sesiones_duplicadas'] += sin_cambios
+			return resultado
+
+		ahora = timezone.now()
+		try:
+			with transaction.atomic():
+				decisiones_creadas = _crear(usuario, nuevas, ahora) if nuevas else 0
+				if cambiadas:
+					decisiones_creadas += _actualizar(cambiadas, ahora)
+			break
+		except IntegrityError:
+			# Otra subida concurrente ingirió alguna de estas sesiones entre la
+			# lectura y la inserción: se vuelven a leer las existentes
+			logger.info('Conflicto en ingesta de savefile para usuario %s (intento %s)', usuario.pk, intento)
+	else:
+		logger.warning('Ingesta de savefile abandonada para usuario %s tras %s conflictos', usuario.pk, REINTENTOS_INGESTA)
+		return resultado
+
+	# bulk_create y bulk_update no emiten señales
+	invalidar_resumen_dashboard(usuario.pk)
+	invalidar_respuestas_usuario(usuario.pk)
+
+	resultado['sesiones_duplicadas'] += sin_cambios
+	resultado['sesiones_creadas'] = len(nuevas)
+	resultado['sesiones_actualizadas'] = len(cambiadas)
+	resultado['decisiones_creadas'] = decisiones_creadas
+	return resultado
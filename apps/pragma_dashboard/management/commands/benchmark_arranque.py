@@ -0,0 +1,132 @@
+"""
+Benchmark del arranque en frío
+
+Lanza procesos nuevos de Python con `-X importtime` que importan
+config.wsgi y sirven una petición de API con token Bearer inválido (DRF
+responde 401 sin tocar la BD). Mide, desde antes de lanzar el proceso:
+el fin de las importaciones (Django configurado y la aplicación WSGI
+armada) y la primera respuesta servida. También informa el tiempo propio
+de importación agrupado por paquete raíz, de la corrida más rápida.
+
+Falla (CommandError, salida distinta de 0) si la mediana de la primera
+respuesta supera PRESUPUESTO_ARRANQUE_MS o si la respuesta no es el 401
+esperado, para usarlo como control en CI.
+
+Uso:
+	python manage.py benchmark_arranque --repeticiones 5
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+RUTA = '/api/v1/dashboard/auth/profile/me/'
+
+# Se ejecuta en el proceso nuevo; argv: inicio (time.time del padre), host, ruta
+SCRIPT = '''
+import io, json, sys, time
+inicio = float(sys.argv[1])
+from config.wsgi import application
+importado = time.time()
+environ = {
+	'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[3], 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+	'SERVER_NAME': sys.argv[2], 'SERVER_PORT': '80', 'HTTP_HOST': sys.argv[2],
+	'HTTP_AUTHORIZATION': 'Bearer token-de-benchmark',
+	'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+	'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+estado = []
+respuesta = application(environ, lambda status, headers, exc_info=None: estado.append(status))
+b''.join(respuesta)
+respuesta.close()
+servido = time.time()
+print(json.dumps({
+	'importacion_ms': (importado - inicio) * 1000,
+	'primera_respuesta_ms': (servido - inicio) * 1000,
+	'estado': estado[0],
+}))
+'''
+
+
+def agrupar_importtime(salida):
+	"""Suma el tiempo propio (µs) de cada módulo por paquete raíz"""
+	por_paquete = defaultdict(int)
+	for linea in salida.splitlines():
+		if not linea.startswith('import time:'):
+			continue
+		propio, _, modulo = linea[len('import time:'):].split('|')
+		if not propio.strip().isdigit():
+			# Encabezado
+			continue
+		por_paquete[modulo.strip().split('.')[0]] += int(propio)
+	return dict(por_paquete)
+
+
+class Command(BaseCommand):
+	help = 'Mide importaciones y tiempo hasta la primera respuesta de un proceso nuevo'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--repeticiones', type=int, default=5, help='Procesos medidos')
+		parser.add_argument('--paquetes', type=int, default=10, help='Paquetes a listar por tiempo de importación')
+		parser.add_argument(
+			'--presupuesto-ms', type=float, default=None,
+			help='Máximo para la mediana de la primera respuesta (por defecto PRESUPUESTO_ARRANQUE_MS)'
+		)
+
+	def handle(self, *args, **options):
+		presupuesto = options['presupuesto_ms']
+		if presupuesto is None:
+			presupuesto = getattr(settings, 'PRESUPUESTO_ARRANQUE_MS', 3000)
+		host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost').lstrip('.')
+
+		# Una corrida previa descartada: deja los .pyc compilados como en un despliegue
+		self._medir(host)
+		corridas = [self._medir(host) for _ in range(max(1, options['repeticiones']))]
+
+		mas_rapida = min(corridas, key=lambda corrida: corrida['primera_respuesta_ms'])
+		paquetes = sorted(mas_rapida['importtime'].items(), key=lambda item: item[1], reverse=True)
+		self.stdout.write('Importación (tiempo propio por paquete, corrida más rápida):')
+		for paquete, micros in paquetes[:options['paquetes']]:
+			self.stdout.write(f'{paquete:>28}: {micros / 1000:7.1f} ms')
+
+		for campo in ('importacion_ms', 'primera_respuesta_ms'):
+			valores = [corrida[campo] for corrida in corridas]
+			self.stdout.write(
+				f'{campo}: mediana {statistics.median(valores):.1f} ms, '
+				f'mín {min(valores):.1f} ms, máx {max(valores):.1f} ms'
+			)
+
+		mediana = statistics.median(corrida['primera_respuesta_ms'] for corrida in corridas)
+		if mediana > presupuesto:
+			raise CommandError(
+				f'Arranque fuera de presupuesto: {mediana:.1f} ms > {presupuesto:.0f} ms'
+			)
+		self.stdout.write(self.style.SUCCESS(f'Dentro del presupuesto ({presupuesto:.0f} ms)'))
+
+	def _medir(self, host):
+		inicio = time.time()
+		proceso = subprocess.run(
+			[sys.executable, '-X', 'importtime', '-c', SCRIPT, repr(inicio), host, RUTA],
+			cwd=settings.BASE_DIR,
+			env=os.environ.copy(),
+			capture_output=True,
+			text=True,
+		)
+		if proceso.returncode != 0:
+			raise CommandError(f'El proceso medido falló:\n{proceso.stderr[-2000:]}')
+
+		resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+		# Un 400 (DisallowedHost) o un 500 al arrancar no es un arranque válido
+		if not resultado['estado'].startswith('401'):
+			raise CommandError(
+				f"Se esperaba 401 de {RUTA} y se obtuvo {resultado['estado']}:\n{proceso.stderr[-2000:]}"
+			)
+		resultado['importtime'] = agrupar_importtime(proceso.stderr)
+		return resultado
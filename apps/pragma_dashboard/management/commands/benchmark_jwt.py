@@ -0,0 +1,55 @@
+"""
+Benchmark de la verificación de access tokens
+
+Perfil de telemetría: pocos clientes, cada uno repitiendo su access
+token en muchas peticiones. Mide el tiempo de CPU de obtener el token
+validado con JWTAuthentication (verificación HS256 en cada llamada) y con
+CachedJWTAuthentication (LRU de tokens verificados).
+
+Uso:
+	python manage.py benchmark_jwt --clientes 200 --peticiones 50
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.pragma_dashboard.authentication import CachedJWTAuthentication, tokens_verificados
+
+
+class Command(BaseCommand):
+	help = 'Compara el CPU de verificar access tokens con y sin el LRU de tokens verificados'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--clientes', type=int, default=200, help='Clientes (tokens distintos)')
+		parser.add_argument('--peticiones', type=int, default=50, help='Peticiones por cliente')
+
+	def handle(self, *args, **options):
+		tokens = []
+		for user_id in range(1, options['clientes'] + 1):
+			token = AccessToken()
+			token['user_id'] = user_id
+			tokens.append(str(token).encode())
+
+		# Peticiones de todos los clientes intercaladas
+		carga = tokens * options['peticiones']
+		random.shuffle(carga)
+
+		sin_cache = self._medir(JWTAuthentication(), carga)
+		tokens_verificados.limpiar()
+		con_cache = self._medir(CachedJWTAuthentication(), carga)
+
+		self.stdout.write(f'Peticiones: {len(carga)}  clientes: {len(tokens)}')
+		self.stdout.write(f'Sin caché: {sin_cache * 1000:.1f} ms CPU ({sin_cache / len(carga) * 1e6:.1f} µs/petición)')
+		self.stdout.write(f'Con caché: {con_cache * 1000:.1f} ms CPU ({con_cache / len(carga) * 1e6:.1f} µs/petición)')
+		if con_cache:
+			self.stdout.write(f'Ahorro: {(1 - con_cache / sin_cache) * 100:.0f}%  ({sin_cache / con_cache:.1f}x)')
+
+	def _medir(self, autenticacion, carga):
+		inicio = time.process_time()
+		for raw_token in carga:
+			autenticacion.get_validated_token(raw_token)
+		return time.process_time() - inicio
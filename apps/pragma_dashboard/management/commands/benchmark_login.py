@@ -0,0 +1,91 @@
+"""
+Benchmark de la búsqueda de usuario por email del login
+
+Siembra usuarios sintéticos en tramos y, después de cada tramo, mide la
+latencia de la misma consulta que usa CustomTokenObtainPairSerializer.
+Con el índice único UPPER(email) la latencia debe mantenerse plana al
+crecer auth_user. Los usuarios sembrados se borran al terminar salvo
+que se pase --conservar.
+
+Uso:
+	python manage.py benchmark_login --usuarios 1000000 --tramos 5
+"""
+
+import random
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+DOMINIO_BENCHMARK = 'bench.pragma.local'
+
+
+def email_benchmark(numero):
+	return f'Usuario{numero}@{DOMINIO_BENCHMARK}'
+
+
+def buscar_por_email(email):
+	"""Misma consulta que el login"""
+	return User.objects.exclude(email='').get(email__iexact=email)
+
+
+class Command(BaseCommand):
+	help = 'Mide la latencia de la búsqueda por email del login al crecer auth_user'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--usuarios', type=int, default=1_000_000, help='Usuarios a sembrar en total')
+		parser.add_argument('--tramos', type=int, default=5, help='Mediciones a lo largo de la siembra')
+		parser.add_argument('--consultas', type=int, default=200, help='Búsquedas por medición')
+		parser.add_argument('--lote', type=int, default=10_000, help='Tamaño de cada bulk_create')
+		parser.add_argument('--conservar', action='store_true', help='No borrar los usuarios sembrados')
+
+	def handle(self, *args, **options):
+		total = options['usuarios']
+		tramos = max(1, options['tramos'])
+		lote = options['lote']
+		# Un solo hash para todos: la siembra no debe medir PBKDF2
+		password = make_password('benchmark-no-usar')
+
+		sembrados = 0
+		try:
+			for tramo in range(1, tramos + 1):
+				objetivo = total * tramo // tramos
+				while sembrados < objetivo:
+					fin = min(objetivo, sembrados + lote)
+					User.objects.bulk_create([
+						User(username=f'bench_{numero}', email=email_benchmark(numero), password=password)
+						for numero in range(sembrados, fin)
+					])
+					sembrados = fin
+
+				if sembrados:
+					self._medir(sembrados, options['consultas'])
+
+			if connection.vendor == 'postgresql' and sembrados:
+				self._explicar(email_benchmark(sembrados - 1).lower())
+		finally:
+			if not options['conservar']:
+				borrados, _ = User.objects.filter(email__endswith=f'@{DOMINIO_BENCHMARK}').delete()
+				self.stdout.write(f'Usuarios de benchmark borrados: {borrados}')
+
+	def _medir(self, sembrados, consultas):
+		muestras = []
+		for _ in range(consultas):
+			# En minúsculas para forzar la comparación sin mayúsculas
+			email = email_benchmark(random.randrange(sembrados)).lower()
+			inicio = time.perf_counter()
+			buscar_por_email(email)
+			muestras.append((time.perf_counter() - inicio) * 1000)
+
+		muestras.sort()
+		p95 = muestras[min(len(muestras) - 1, int(len(muestras) * 0.95))]
+		self.stdout.write(
+			f'{sembrados:>10} usuarios  p50={statistics.median(muestras):.3f} ms  p95={p95:.3f} ms'
+		)
+
+	def _explicar(self, email):
+		consulta = User.objects.exclude(email='').filter(email__iexact=email)
+		self.stdout.write(consulta.explain())
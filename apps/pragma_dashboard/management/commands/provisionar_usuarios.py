@@ -0,0 +1,130 @@
+"""
+Alta masiva de usuarios desde un CSV (un curso completo)
+
+Columnas: nombre, email y password (opcional; sin password el usuario
+queda con contraseña inutilizable hasta que la restablezca). Los emails
+ya registrados se omiten. Las contraseñas se hashean en paralelo en un
+pool de procesos, porque PBKDF2 es CPU y bloquearía el GIL, y los usuarios
+se insertan con bulk_create.
+
+Uso:
+	python manage.py provisionar_usuarios curso.csv --procesos 4
+"""
+
+import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Upper
+
+from apps.pragma_dashboard.usuarios import asignar_usernames, separar_nombre, username_base
+
+# Emails por consulta al buscar los ya registrados
+CONSULTA_EMAILS = 500
+
+
+def _inicializar_proceso():
+	# Con spawn el proceso hijo no trae Django configurado
+	django.setup()
+
+
+def _hashear(password):
+	return make_password(password or None)
+
+
+class Command(BaseCommand):
+	help = 'Crea usuarios en lote desde un CSV con columnas nombre, email y password'
+
+	def add_arguments(self, parser):
+		parser.add_argument('archivo', help='Ruta del CSV')
+		parser.add_argument('--procesos', type=int, default=None, help='Procesos para hashear (por defecto, núcleos)')
+		parser.add_argument('--lote', type=int, default=1000, help='Tamaño de cada bulk_create')
+		parser.add_argument('--dry-run', action='store_true', help='Validar sin crear usuarios')
+
+	def handle(self, *args, **options):
+		filas, invalidas = self._leer(options['archivo'])
+
+		# UPPER(email) usa el índice único de email (migración 0006); el
+		# índice es parcial (email <> ''), así que la consulta repite su
+		# condición, como el login
+		emails = [fila['email'].upper() for fila in filas]
+		existentes = set()
+		for inicio in range(0, len(emails), CONSULTA_EMAILS):
+			existentes.update(User.objects.exclude(email='').annotate(email_upper=Upper('email')).filter(
+				email_upper__in=emails[inicio:inicio + CONSULTA_EMAILS]
+			).values_list('email_upper', flat=True))
+		nuevas = [fila for fila in filas if fila['email'].upper() not in existentes]
+
+		self.stdout.write(
+			f'Filas: {len(filas) + invalidas}  nuevas: {len(nuevas)}  '
+			f'ya registradas: {len(filas) - len(nuevas)}  inválidas: {invalidas}'
+		)
+		if options['dry_run'] or not nuevas:
+			return
+
+		with ProcessPoolExecutor(max_workers=options['procesos'], initializer=_inicializar_proceso) as pool:
+			hashes = list(pool.map(
+				_hashear,
+				[fila['password'] for fila in nuevas],
+				chunksize=max(1, len(nuevas) // 64)
+			))
+
+		usernames = asignar_usernames([username_base(fila['email']) for fila in nuevas])
+
+		usuarios = []
+		for fila, username, password in zip(nuevas, usernames, hashes):
+			first_name, last_name = separar_nombre(fila['nombre'])
+			usuarios.append(User(
+				username=username,
+				email=fila['email'],
+				password=password,
+				first_name=first_name,
+				last_name=last_name,
+			))
+
+		try:
+			with transaction.atomic():
+				User.objects.bulk_create(usuarios, batch_size=options['lote'])
+		except IntegrityError as error:
+			raise CommandError(f'Otro proceso registró alguno de estos usuarios, reintenta: {error}')
+
+		self.stdout.write(self.style.SUCCESS(f'Usuarios creados: {len(usuarios)}'))
+
+	def _leer(self, archivo):
+		"""Filas válidas del CSV (sin emails repetidos) y cuántas se descartaron"""
+		try:
+			with open(archivo, newline='', encoding='utf-8-sig') as csv_file:
+				lector = csv.DictReader(csv_file)
+				if not lector.fieldnames or not {'nombre', 'email'} <= set(lector.fieldnames):
+					raise CommandError('El CSV debe tener las columnas nombre y email (password opcional)')
+				crudas = list(lector)
+		except OSError as error:
+			raise CommandError(f'No se pudo leer {archivo}: {error}')
+
+		filas, vistos, invalidas = [], set(), 0
+		for cruda in crudas:
+			email = (cruda.get('email') or '').strip()
+			try:
+				validate_email(email)
+			except ValidationError:
+				invalidas += 1
+				continue
+
+			if email.upper() in vistos:
+				invalidas += 1
+				continue
+			vistos.add(email.upper())
+
+			filas.append({
+				'nombre': (cruda.get('nombre') or '').strip(),
+				'email': email,
+				'password': cruda.get('password') or '',
+			})
+
+		return filas, invalidas
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.10 on 2026-10-19 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pragma_dashboard', '0003_alter_analisisia_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='analisisia',
+            name='pragma_dash_nivel_r_a2ffb2_idx',
+        ),
+        migrations.AddIndex(
+            model_name='analisisia',
+            index=models.Index(fields=['nivel_riesgo', '-timestamp_analisis', '-id'], name='pragma_dash_nivel_r_69379b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analisisia',
+            index=models.Index(condition=models.Q(('requiere_intervencion', True)), fields=['-timestamp_analisis', '-id'], name='analisis_triage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analisisia',
+            index=models.Index(condition=models.Q(('requiere_intervencion', True)), fields=['nivel_riesgo', '-timestamp_analisis', '-id'], name='analisis_triage_riesgo_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.10 on 2026-10-19 00:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pragma_dashboard', '0004_analisisia_triage_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sesionsimulacion',
+            name='huella_savefile',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 de la sesión en el savefile de origen (deduplicación)', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='sesionsimulacion',
+            name='fecha_inicio',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Fecha y hora de inicio de la sesión'),
+        ),
+        migrations.AddConstraint(
+            model_name='sesionsimulacion',
+            constraint=models.UniqueConstraint(condition=models.Q(('huella_savefile', ''), _negated=True), fields=('usuario', 'huella_savefile'), name='sesion_huella_savefile_unica'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+"""
+Índice único de email sin distinguir mayúsculas en auth_user
+
+El login busca por `email__iexact`, que en PostgreSQL se traduce a
+UPPER("auth_user"."email"::text) = UPPER(%s); el índice usa la misma
+expresión para que el planner lo aproveche. Los emails vacíos quedan
+fuera del índice (usuarios creados sin email).
+
+En PostgreSQL el índice se crea CONCURRENTLY para no bloquear auth_user,
+por eso la migración no es atómica.
+"""
+
+from django.db import migrations
+
+NOMBRE_INDICE = 'auth_user_email_upper_unico'
+
+SQL_INDICE = {
+    'postgresql': (
+        f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {NOMBRE_INDICE} "
+        "ON auth_user (UPPER(email::text)) WHERE email <> ''"
+    ),
+    'sqlite': (
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {NOMBRE_INDICE} "
+        "ON auth_user (UPPER(email)) WHERE email <> ''"
+    ),
+}
+
+SQL_BORRAR_INDICE = {
+    'postgresql': f"DROP INDEX CONCURRENTLY IF EXISTS {NOMBRE_INDICE}",
+    'sqlite': f"DROP INDEX IF EXISTS {NOMBRE_INDICE}",
+}
+
+
+def crear_indice(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in SQL_INDICE:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT UPPER(email), COUNT(*) FROM auth_user WHERE email <> '' "
+            "GROUP BY UPPER(email) HAVING COUNT(*) > 1"
+        )
+        duplicados = cursor.fetchall()
+        if duplicados:
+            emails = ', '.join(email.lower() for email, _ in duplicados[:10])
+            raise RuntimeError(
+                f'Hay {len(duplicados)} emails duplicados en auth_user ({emails}); '
+                'hay que resolverlos antes de crear el índice único'
+            )
+        cursor.execute(SQL_INDICE[connection.vendor])
+
+
+def borrar_indice(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor in SQL_BORRAR_INDICE:
+        with connection.cursor() as cursor:
+            cursor.execute(SQL_BORRAR_INDICE[connection.vendor])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('pragma_dashboard', '0005_sesion_ingesta_savefile'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.10 on 2026-10-19 00:52
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pragma_dashboard', '0006_auth_user_email_unico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(help_text='Claim jti del token revocado', max_length=255, unique=True)),
+                ('expira', models.DateTimeField(db_index=True, help_text='Expiración original del token; después de esta fecha la fila sobra')),
+                ('revocado_en', models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='Cuando se revocó (sincronización incremental del filtro Bloom)')),
+            ],
+            options={
+                'verbose_name': 'Token Revocado',
+                'verbose_name_plural': 'Tokens Revocados',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pragma_dashboard', '0007_tokenrevocado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CubetaThrottle',
+            fields=[
+                ('clave', models.CharField(help_text='Clave del throttle (scope e identificador)', max_length=255, primary_key=True, serialize=False)),
+                ('tokens', models.FloatField(help_text='Tokens disponibles al momento de `actualizado`')),
+                ('actualizado', models.FloatField(db_index=True, help_text='Epoch (segundos, reloj de la BD) de la última actualización')),
+            ],
+            options={
+                'verbose_name': 'Cubeta de Throttle',
+                'verbose_name_plural': 'Cubetas de Throttle',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+"""
+Crea las tablas de las cachés con DatabaseCache (nivel 2 de CacheDosNiveles)
+
+createcachetable es idempotente: solo crea las tablas que falten.
+"""
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def crear_tablas_cache(apps, schema_editor):
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pragma_dashboard', '0008_cubetathrottle'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_tablas_cache, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pragma_dashboard', '0009_tabla_cache_compartida'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sesionsimulacion',
+            name='huella_contenido',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 del contenido de la sesión ingerida (detecta cambios al volver a subirla)', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='sesionsimulacion',
+            name='huella_savefile',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 del identificador de la sesión en el savefile de origen (deduplicación)', max_length=64),
+        ),
+    ]
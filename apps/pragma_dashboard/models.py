@@ -1,9 +1,64 @@
-from django.db import models
+from django.db import models, connections
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
 
+class SesionSimulacionManager(models.Manager):
+	"""Manager con operaciones de escritura en una sola sentencia"""
+
+	def _sql_duracion(self, vendor):
+		"""Expresión SQL: segundos entre el parámetro y fecha_inicio"""
+		if vendor == 'sqlite':
+			return "MAX(0, CAST((julianday(%s) - julianday(fecha_inicio)) * 86400 AS INTEGER))"
+		return "GREATEST(0, FLOOR(EXTRACT(EPOCH FROM (%s::timestamptz - fecha_inicio))))::integer"
+
+	def completar(self, usuario, ids, ahora=None):
+		"""
+		Marca sesiones del usuario como completadas con un único
+		UPDATE ... RETURNING; la duración se calcula en SQL
+
+		Solo toca sesiones aún no completadas, por lo que reintentar es
+		seguro: las ya completadas se devuelven tal como quedaron.
+
+		Returns:
+			Tupla (sesiones, ids_no_encontrados)
+		"""
+		ids = list(dict.fromkeys(ids))
+		if not ids:
+			return [], []
+
+		ahora = ahora or timezone.now()
+		connection = connections[self.db]
+		ahora_db = connection.ops.adapt_datetimefield_value(ahora)
+		tabla = connection.ops.quote_name(self.model._meta.db_table)
+		marcadores = ', '.join(['%s'] * len(ids))
+
+		sql = (
+			f"UPDATE {tabla} SET "
+			f"completada = %s, fecha_fin = %s, updated_at = %s, "
+			f"duracion_segundos = {self._sql_duracion(connection.vendor)} "
+			f"WHERE usuario_id = %s AND completada = %s AND id IN ({marcadores}) "
+			f"RETURNING id, usuario_id, escenario_nombre, fecha_inicio, fecha_fin, "
+			f"duracion_segundos, completada, created_at, updated_at"
+		)
+		params = [True, ahora_db, ahora_db, ahora_db, usuario.pk, False, *ids]
+
+		sesiones = list(self.raw(sql, params).using(self.db))
+
+		# Reintentos: las sesiones ya completadas no vuelven a escribirse
+		faltantes = set(ids) - {sesion.id for sesion in sesiones}
+		if faltantes:
+			sesiones += list(self.filter(usuario=usuario, id__in=faltantes, completada=True))
+
+		for sesion in sesiones:
+			sesion.usuario = usuario
+
+		posiciones = {pk: posicion for posicion, pk in enumerate(ids)}
+		sesiones.sort(key=lambda sesion: posiciones[sesion.id])
+		return sesiones, [pk for pk in ids if pk not in {sesion.id for sesion in sesiones}]
+
+
 class SesionSimulacion(models.Model):
 	"""
 	Modelo que representa una sesión de simulación de un usuario.
@@ -19,7 +74,7 @@ class SesionSimulacion(models.Model):
 		help_text="Nombre del escenario simulado"
 	)
 	fecha_inicio = models.DateTimeField(
-		auto_now_add=True,
+		default=timezone.now,
 		help_text="Fecha y hora de inicio de la sesión"
 	)
 	fecha_fin = models.DateTimeField(
@@ -36,15 +91,36 @@ class SesionSimulacion(models.Model):
 		default=False,
 		help_text="Indica si la sesión fue completada"
 	)
+	huella_savefile = models.CharField(
+		max_length=64,
+		blank=True,
+		default='',
+		help_text="SHA-256 del identificador de la sesión en el savefile de origen (deduplicación)"
+	)
+	huella_contenido = models.CharField(
+		max_length=64,
+		blank=True,
+		default='',
+		help_text="SHA-256 del contenido de la sesión ingerida (detecta cambios al volver a subirla)"
+	)
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
+	objects = SesionSimulacionManager()
+
 	class Meta:
 		ordering = ['-fecha_inicio']
 		indexes = [
 			models.Index(fields=['usuario', '-fecha_inicio']),
 			models.Index(fields=['completada']),
 		]
+		constraints = [
+			models.UniqueConstraint(
+				fields=['usuario', 'huella_savefile'],
+				condition=~models.Q(huella_savefile=''),
+				name='sesion_huella_savefile_unica'
+			),
+		]
 		verbose_name = "Sesión de Simulación"
 		verbose_name_plural = "Sesiones de Simulación"
 
@@ -409,10 +485,134 @@ class AnalisisIA(models.Model):
 			models.Index(fields=['savefile_id']),
 			models.Index(fields=['usuario']),
 			models.Index(fields=['timestamp_analisis']),
-			models.Index(fields=['nivel_riesgo']),
+			models.Index(fields=['nivel_riesgo', '-timestamp_analisis', '-id']),
+			# Cola de intervención: índices parciales, solo cubren las filas a triar
+			models.Index(
+				fields=['-timestamp_analisis', '-id'],
+				condition=models.Q(requiere_intervencion=True),
+				name='analisis_triage_idx'
+			),
+			models.Index(
+				fields=['nivel_riesgo', '-timestamp_analisis', '-id'],
+				condition=models.Q(requiere_intervencion=True),
+				name='analisis_triage_riesgo_idx'
+			),
 		]
 		verbose_name = "Análisis IA"
 		verbose_name_plural = "Análisis IA"
 
 	def __str__(self):
-		return f"Análisis {self.usuario_nombre} - {self.timestamp_analisis}"
\ No newline at end of file
+		return f"Análisis {self.usuario_nombre} - {self.timestamp_analisis}"
+
+class TokenRevocado(models.Model):
+	"""
+	JTI de un refresh token revocado (rotación o logout).
+	Las filas se purgan cuando el token ya habría expirado.
+	"""
+	jti = models.CharField(
+		max_length=255,
+		unique=True,
+		help_text="Claim jti del token revocado"
+	)
+	expira = models.DateTimeField(
+		db_index=True,
+		help_text="Expiración original del token; después de esta fecha la fila sobra"
+	)
+	revocado_en = models.DateTimeField(
+		default=timezone.now,
+		db_index=True,
+		help_text="Cuando se revocó (sincronización incremental del filtro Bloom)"
+	)
+
+	class Meta:
+		verbose_name = "Token Revocado"
+		verbose_name_plural = "Tokens Revocados"
+
+	def __str__(self):
+		return f"Token {self.jti} (expira {self.expira})"
+
+
+
+class CubetaThrottleManager(models.Manager):
+	"""Cubetas de tokens con actualización atómica en una sola sentencia"""
+
+	def _sql_ahora(self, vendor):
+		"""Epoch en segundos según el reloj de la BD (común a todos los nodos)"""
+		if vendor == 'sqlite':
+			return "((julianday('now') - 2440587.5) * 86400.0)"
+		return "EXTRACT(EPOCH FROM clock_timestamp())::double precision"
+
+	def consumir(self, clave, capacidad, por_segundo):
+		"""
+		Intenta tomar un token de la cubeta `clave`
+
+		Un INSERT ... ON CONFLICT DO UPDATE rellena la cubeta según el tiempo
+		transcurrido y descuenta un token solo si hay al menos uno; si no
+		hay, el WHERE descarta el UPDATE y no se devuelve fila.
+
+		Returns:
+			Tupla (permitido, segundos_de_espera o None)
+		"""
+		connection = connections[self.db]
+		tabla = connection.ops.quote_name(self.model._meta.db_table)
+		minimo = 'MIN' if connection.vendor == 'sqlite' else 'LEAST'
+		ahora = self._sql_ahora(connection.vendor)
+		rellenada = f"{minimo}(%s, c.tokens + (EXCLUDED.actualizado - c.actualizado) * %s)"
+
+		with connection.cursor() as cursor:
+			cursor.execute(
+				f"INSERT INTO {tabla} AS c (clave, tokens, actualizado) VALUES (%s, %s, {ahora}) "
+				f"ON CONFLICT (clave) DO UPDATE SET "
+				f"tokens = {rellenada} - 1, actualizado = EXCLUDED.actualizado "
+				f"WHERE {rellenada} >= 1 "
+				f"RETURNING tokens",
+				[clave, capacidad - 1, capacidad, por_segundo, capacidad, por_segundo]
+			)
+			if cursor.fetchone() is not None:
+				return True, None
+
+			cursor.execute(
+				f"SELECT (1 - {minimo}(%s, tokens + ({ahora} - actualizado) * %s)) / %s "
+				f"FROM {tabla} WHERE clave = %s",
+				[capacidad, por_segundo, por_segundo, clave]
+			)
+			fila = cursor.fetchone()
+
+		return False, max(0.0, fila[0]) if fila else None
+
+	def purgar(self, antiguedad_segundos):
+		"""Borra cubetas sin uso hace más de `antiguedad_segundos` (ya estarían llenas)"""
+		connection = connections[self.db]
+		tabla = connection.ops.quote_name(self.model._meta.db_table)
+		with connection.cursor() as cursor:
+			cursor.execute(
+				f"DELETE FROM {tabla} WHERE actualizado < {self._sql_ahora(connection.vendor)} - %s",
+				[antiguedad_segundos]
+			)
+			return cursor.rowcount
+
+
+class CubetaThrottle(models.Model):
+	"""
+	Cubeta de tokens de un throttle (scope + usuario o IP).
+	Estado O(1) por clave, compartido entre workers y nodos.
+	"""
+	clave = models.CharField(
+		max_length=255,
+		primary_key=True,
+		help_text="Clave del throttle (scope e identificador)"
+	)
+	tokens = models.FloatField(help_text="Tokens disponibles al momento de `actualizado`")
+	actualizado = models.FloatField(
+		db_index=True,
+		help_text="Epoch (segundos, reloj de la BD) de la última actualización"
+	)
+
+	objects = CubetaThrottleManager()
+
+	class Meta:
+		verbose_name = "Cubeta de Throttle"
+		verbose_name_plural = "Cubetas de Throttle"
+
+	def __str__(self):
+		return f"{self.clave}: {self.tokens:.2f}"
@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class AnalisisIACursorPagination(CursorPagination):
+	"""
+	Paginación por cursor para colas de análisis (más recientes primero)
+	El orden coincide con los índices de triage, así cada página es un
+	rango del índice y no depende de un OFFSET que crece con la tabla
+	"""
+	ordering = ('-timestamp_analisis', '-id')
+	page_size = 50
+	page_size_query_param = 'page_size'
+	max_page_size = 200
+
+	def get_ordering(self, request, queryset, view):
+		"""Orden fijo, ignora ?ordering= para no salirse del índice"""
+		return tuple(self.ordering)
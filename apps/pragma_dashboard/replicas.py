@@ -0,0 +1,105 @@
+"""
+Lecturas en réplicas con lectura de las propias escrituras
+
+Las lecturas de los ViewSets (historiales, análisis, estadísticas)
+compiten en la primaria con la ingesta de savefiles y telemetría. Con
+réplicas configuradas (DATABASE_REPLICAS, ver settings), RouterReplicas
+manda a una réplica solo las lecturas de modelos de la app hechas dentro
+de una petición segura (GET/HEAD/OPTIONS) de un ViewSet con
+LecturaReplicaMixin. Todo lo demás (autenticación, caché, throttle,
+comandos, escrituras) sigue en la primaria.
+
+Cuando cambian los datos de un usuario (las mismas señales y llamadas que
+invalidan sus respuestas cacheadas, ver respuestas.py), queda fijado a la
+primaria durante REPLICA_FIJACION_SEGUNDOS con una marca en la caché
+compartida: el cliente Godot siempre lee lo que acaba de guardar aunque
+la réplica vaya atrasada, y tampoco se cachea una respuesta leída de una
+réplica atrasada. También queda fijado quien hizo la escritura desde un
+ViewSet, y dentro de la misma petición, tras la primera escritura, todas
+las lecturas van a la primaria.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .utils import leer_compartida
+
+APPS_REPLICADAS = {'pragma_dashboard'}
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+_peticion = ContextVar('peticion_replica', default=None)
+
+
+def replicas():
+	return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def clave_fijacion(usuario_id):
+	return f'replicas:fijado:{usuario_id}'
+
+
+def fijar_primaria(usuario_id):
+	"""Las lecturas del usuario van a la primaria durante la ventana"""
+	if not replicas():
+		return
+	cache.set(clave_fijacion(usuario_id), True, getattr(settings, 'REPLICA_FIJACION_SEGUNDOS', 10))
+
+
+def fijado_a_primaria(usuario_id):
+	return leer_compartida(clave_fijacion(usuario_id)) is not None
+
+
+def iniciar_peticion(usuario_id, metodo):
+	"""Marca el contexto de una petición de ViewSet; devuelve el token para terminarla"""
+	usar_replica = (
+		bool(replicas())
+		and metodo in METODOS_SEGUROS
+		and not (usuario_id and fijado_a_primaria(usuario_id))
+	)
+	estado = {'usuario_id': usuario_id, 'replica': usar_replica, 'escribio': False}
+	return _peticion.set(estado)
+
+
+def terminar_peticion(token):
+	"""Cierra el contexto; quien escribió (p. ej. un admin sobre datos ajenos) también queda fijado"""
+	estado = _peticion.get()
+	_peticion.reset(token)
+	if estado and estado['escribio'] and estado['usuario_id']:
+		fijar_primaria(estado['usuario_id'])
+
+
+class RouterReplicas:
+	"""Router de DATABASE_ROUTERS; None deja la primaria (default)"""
+
+	def db_for_read(self, model, **hints):
+		estado = _peticion.get()
+		if (
+			estado is None
+			or not estado['replica']
+			or estado['escribio']
+			or model._meta.app_label not in APPS_REPLICADAS
+		):
+			return None
+		return random.choice(replicas())
+
+	def db_for_write(self, model, **hints):
+		# Escrituras de caché o throttle no cambian lo que lee la petición
+		estado = _peticion.get()
+		if estado is not None and model._meta.app_label in APPS_REPLICADAS:
+			estado['escribio'] = True
+		return None
+
+	def allow_relation(self, obj1, obj2, **hints):
+		bases = {'default', *replicas()}
+		if obj1._state.db in bases and obj2._state.db in bases:
+			return True
+		return None
+
+	def allow_migrate(self, db, app_label, model_name=None, **hints):
+		# Las réplicas reciben el esquema por replicación
+		if db in replicas():
+			return False
+		return None
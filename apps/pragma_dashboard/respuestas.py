@@ -0,0 +1,125 @@
+"""
+Caché de respuestas de lectura por usuario
+
+Las lecturas personales (mi_historial, mis_analisis, ultimo, progreso)
+solo cambian cuando escribe su dueño. Cada usuario tiene un contador de
+generación que se incrementa en cada escritura (señales en signals.py y
+llamadas explícitas donde hay bulk_create o update); la clave de la
+respuesta incluye la generación, la vista, la acción y el query string,
+así que tras una escritura la entrada anterior deja de ser alcanzable y
+simplemente vence.
+
+- La generación se lee del nivel compartido de la caché, no del LRU del
+  proceso: un worker nunca sirve una respuesta anterior a una escritura
+  hecha en otro.
+- Las entradas no cambian para una generación dada, así que pueden vivir
+  en el LRU del proceso.
+- El cuerpo se guarda cifrado con ENCRYPTION_KEY (incluye savefiles y
+  análisis ya descifrados); una lectura desde caché descifra una sola vez
+  en vez de campo por campo y no consulta la BD.
+"""
+
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .replicas import fijar_primaria
+from .utils import leer_compartida
+from .utils.encryption import decrypt_aes256, encrypt_aes256
+
+
+def clave_generacion(usuario_id):
+	return f'respuestas:generacion:{usuario_id}'
+
+
+def generacion_usuario(usuario_id):
+	"""Generación vigente de las respuestas de un usuario"""
+	clave = clave_generacion(usuario_id)
+	generacion = leer_compartida(clave)
+
+	if generacion is None:
+		# Si el contador se perdió (desalojo, limpieza) se reinicia en el
+		# reloj en ms: queda por encima de cualquier valor anterior
+		cache.add(clave, int(time.time() * 1000), None)
+		generacion = leer_compartida(clave)
+	return generacion
+
+
+def _incrementar_generacion(usuario_id):
+	clave = clave_generacion(usuario_id)
+	generacion = leer_compartida(clave)
+	# Dos incrementos concurrentes pueden quedar en uno: basta con que cambie
+	if generacion is None:
+		cache.add(clave, int(time.time() * 1000), None)
+	else:
+		cache.set(clave, generacion + 1, None)
+
+
+def invalidar_respuestas_usuario(usuario_id):
+	"""
+	Deja obsoletas todas las respuestas cacheadas de un usuario
+
+	Se incrementa al momento y otra vez al confirmar la transacción: una
+	lectura concurrente que vio los datos anteriores no queda guardada
+	bajo la generación nueva. Con réplicas, además fija al usuario a la
+	primaria (ver replicas.py).
+	"""
+	if usuario_id is None:
+		return
+	_incrementar_generacion(usuario_id)
+	fijar_primaria(usuario_id)
+	transaction.on_commit(lambda: _incrementar_generacion(usuario_id))
+
+
+def clave_respuesta(usuario_id, generacion, vista, accion, query_params, kwargs):
+	parametros = json.dumps([sorted(query_params.lists()), sorted(kwargs.items())], default=str)
+	huella = hashlib.sha256(parametros.encode()).hexdigest()[:32]
+	return f'respuestas:{usuario_id}:{generacion}:{vista}:{accion}:{huella}'
+
+
+def _clave_cifrado():
+	return getattr(settings, 'ENCRYPTION_KEY', b'a' * 32)
+
+
+def cachear_por_usuario(metodo):
+	"""
+	Decorador para acciones GET de un ViewSet cuya respuesta depende solo
+	de los datos del usuario autenticado. Solo se cachean respuestas 200.
+	"""
+	@wraps(metodo)
+	def envoltura(self, request, *args, **kwargs):
+		if request.method != 'GET' or not request.user.is_authenticated:
+			return metodo(self, request, *args, **kwargs)
+
+		usuario_id = request.user.pk
+		clave = clave_respuesta(
+			usuario_id,
+			generacion_usuario(usuario_id),
+			type(self).__name__,
+			self.action,
+			request.query_params,
+			kwargs,
+		)
+
+		cifrado = cache.get(clave)
+		if cifrado is not None:
+			return Response(json.loads(decrypt_aes256(cifrado, _clave_cifrado())))
+
+		response = metodo(self, request, *args, **kwargs)
+		if response.status_code == status.HTTP_200_OK and hasattr(response, 'data'):
+			cache.set(
+				clave,
+				encrypt_aes256(json.dumps(response.data, cls=DjangoJSONEncoder), _clave_cifrado()),
+				getattr(settings, 'RESPUESTAS_CACHE_TTL', 300)
+			)
+		return response
+
+	return envoltura
@@ -0,0 +1,89 @@
+"""
+Resumen del dashboard personal
+
+Se calcula con una sola consulta agregada sobre SesionSimulacion unida a
+MetricaDesempeno y se cachea por usuario. La caché se invalida cuando
+cambian las sesiones o métricas de ese usuario (ver signals.py); tras una
+invalidación, peticiones simultáneas esperan un único cálculo.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Case, Count, FloatField, Q, Sum, When
+from django.db.models.functions import Cast
+
+from .models import SesionSimulacion
+from .utils import leer_compartida, single_flight
+
+# Sesiones completadas mínimas para cada nivel de progreso
+NIVELES_PROGRESO = [
+	(10, 'avanzado'),
+	(3, 'intermedio'),
+	(0, 'inicial'),
+]
+
+
+def clave_resumen_dashboard(usuario_id):
+	return f'dashboard:resumen:{usuario_id}'
+
+
+def invalidar_resumen_dashboard(usuario_id):
+	"""Descarta el resumen cacheado de un usuario"""
+	cache.delete(clave_resumen_dashboard(usuario_id))
+
+
+def nivel_progreso(sesiones_completadas):
+	for minimo, nivel in NIVELES_PROGRESO:
+		if sesiones_completadas >= minimo:
+			return nivel
+	return NIVELES_PROGRESO[-1][1]
+
+
+def calcular_resumen_dashboard(usuario_id):
+	"""Resumen del dashboard en una sola consulta agregada"""
+	porcentaje_acierto = Case(
+		When(
+			metricas__decisiones_totales__gt=0,
+			then=Cast('metricas__decisiones_acertadas', FloatField()) * 100.0
+				/ Cast('metricas__decisiones_totales', FloatField())
+		),
+		output_field=FloatField()
+	)
+
+	fila = SesionSimulacion.objects.filter(usuario_id=usuario_id).aggregate(
+		total_sesiones=Count('id'),
+		sesiones_completadas=Count('id', filter=Q(completada=True)),
+		tiempo_total_segundos=Sum('duracion_segundos'),
+		promedio_estres=Avg(Cast('metricas__nivel_estres', FloatField())),
+		porcentaje_acierto_promedio=Avg(porcentaje_acierto),
+		escenarios_completados=Count('escenario_nombre', filter=Q(completada=True), distinct=True),
+	)
+
+	return {
+		'total_sesiones': fila['total_sesiones'],
+		'sesiones_completadas': fila['sesiones_completadas'],
+		'tiempo_total_minutos': (fila['tiempo_total_segundos'] or 0) // 60,
+		'promedio_estres': round(fila['promedio_estres'] or 0, 2),
+		'porcentaje_acierto_promedio': round(fila['porcentaje_acierto_promedio'] or 0, 2),
+		'escenarios_completados': fila['escenarios_completados'],
+		'nivel_progreso': nivel_progreso(fila['sesiones_completadas']),
+	}
+
+
+def obtener_resumen_dashboard(usuario_id):
+	"""Resumen desde caché; si no está, un solo llamador lo calcula"""
+	clave = clave_resumen_dashboard(usuario_id)
+	resumen = cache.get(clave)
+	if resumen is not None:
+		return resumen
+
+	def calcular():
+		publicado = leer_compartida(clave)
+		if publicado is not None:
+			return publicado
+
+		resumen = calcular_resumen_dashboard(usuario_id)
+		cache.set(clave, resumen, getattr(settings, 'DASHBOARD_RESUMEN_CACHE_TTL', 300))
+		return resumen
+
+	return single_flight(clave, calcular, lambda: leer_compartida(clave))
@@ -0,0 +1,155 @@
+"""
+Revocación de refresh tokens
+
+Con ROTATE_REFRESH_TOKENS y BLACKLIST_AFTER_ROTATION cada refresh revoca el
+token usado. Las revocaciones se escriben en TokenRevocado y cada proceso
+mantiene un filtro Bloom con los JTI revocados vigentes:
+
+- Si el JTI no está en el filtro, no está revocado y no se consulta la BD
+  (el caso de casi todos los refresh y verify).
+- Si puede estar, se confirma con una consulta por la clave única.
+
+El filtro se reconstruye cada REVOCACION_BLOOM_INTERVALO segundos, y en
+cada reconstrucción se purgan las filas de tokens ya expirados. Entre
+reconstrucciones, cuando otro proceso revoca (contador de generación en
+la caché), se agregan solo las revocaciones nuevas.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import TokenRevocado
+from .utils import FiltroBloom
+
+CLAVE_GENERACION = 'revocacion:generacion'
+
+# Margen para revocaciones escritas con el reloj de otro proceso
+MARGEN_SINCRONIZACION = timedelta(seconds=5)
+
+_lock = threading.Lock()
+_estado = {
+	'filtro': None,
+	'construido_en': 0.0,
+	'sincronizado_hasta': None,
+	'generacion': None,
+}
+
+
+def purgar_revocados_expirados():
+	"""Borra las revocaciones de tokens que ya expiraron"""
+	borrados, _ = TokenRevocado.objects.filter(expira__lt=timezone.now()).delete()
+	return borrados
+
+
+def _reconstruir_filtro():
+	purgar_revocados_expirados()
+
+	ahora = timezone.now()
+	jtis = list(TokenRevocado.objects.values_list('jti', flat=True))
+	filtro = FiltroBloom(
+		# Holgura para las revocaciones que lleguen hasta la próxima reconstrucción
+		max(1024, len(jtis) * 2),
+		getattr(settings, 'REVOCACION_BLOOM_FALSOS_POSITIVOS', 0.01)
+	)
+	for jti in jtis:
+		filtro.agregar(jti)
+
+	_estado.update(
+		filtro=filtro,
+		construido_en=time.monotonic(),
+		sincronizado_hasta=ahora,
+		generacion=cache.get(CLAVE_GENERACION),
+	)
+
+
+def _sincronizar_filtro(generacion):
+	"""Agrega al filtro las revocaciones hechas por otros procesos"""
+	ahora = timezone.now()
+	nuevos = TokenRevocado.objects.filter(
+		revocado_en__gte=_estado['sincronizado_hasta'] - MARGEN_SINCRONIZACION
+	).values_list('jti', flat=True)
+
+	for jti in nuevos:
+		_estado['filtro'].agregar(jti)
+
+	_estado.update(sincronizado_hasta=ahora, generacion=generacion)
+
+
+def _filtro_vigente():
+	intervalo = getattr(settings, 'REVOCACION_BLOOM_INTERVALO', 300)
+
+	with _lock:
+		if _estado['filtro'] is None or time.monotonic() - _estado['construido_en'] > intervalo:
+			_reconstruir_filtro()
+		else:
+			generacion = cache.get(CLAVE_GENERACION)
+			if generacion != _estado['generacion']:
+				_sincronizar_filtro(generacion)
+
+		return _estado['filtro']
+
+
+def reiniciar_filtro():
+	"""Descarta el filtro del proceso; se reconstruye en la próxima consulta"""
+	with _lock:
+		_estado.update(filtro=None, construido_en=0.0, sincronizado_hasta=None, generacion=None)
+
+
+def jti_revocado(jti):
+	"""True si el JTI está revocado; sin consulta cuando el filtro lo descarta"""
+	if jti not in _filtro_vigente():
+		return False
+	return TokenRevocado.objects.filter(jti=jti).exists()
+
+
+def revocar_jti(jti, expira):
+	"""
+	Revoca un JTI
+
+	Returns:
+		False si ya estaba revocado (p. ej. dos refresh simultáneos con el
+		mismo token: solo uno gana)
+	"""
+	_, creado = TokenRevocado.objects.get_or_create(jti=jti, defaults={'expira': expira})
+
+	if creado:
+		with _lock:
+			if _estado['filtro'] is not None:
+				_estado['filtro'].agregar(jti)
+		# Basta con que la generación cambie. incr no es atómico en la caché
+		# compartida: una revocación simultánea pudo quedar en el mismo valor,
+		# así que este proceso tampoco da por sincronizada la suya y vuelve a
+		# sincronizar en la próxima consulta
+		cache.add(CLAVE_GENERACION, 0, None)
+		try:
+			cache.incr(CLAVE_GENERACION)
+		except ValueError:
+			# La clave fue desalojada entre add e incr
+			cache.set(CLAVE_GENERACION, 0, None)
+
+	return creado
+
+
+class RefreshTokenRevocable(RefreshToken):
+	"""RefreshToken que se valida contra el almacén de revocaciones"""
+
+	def verify(self, *args, **kwargs):
+		super().verify(*args, **kwargs)
+
+		if jti_revocado(self.payload[api_settings.JTI_CLAIM]):
+			raise TokenError(_('Token is blacklisted'))
+
+	def blacklist(self):
+		"""Revoca este token; lo llama TokenRefreshSerializer al rotar"""
+		expira = datetime.fromtimestamp(self.payload['exp'], tz=dt_timezone.utc)
+		if not revocar_jti(self.payload[api_settings.JTI_CLAIM], expira):
+			raise TokenError(_('Token is blacklisted'))
@@ -1,7 +1,12 @@
 import json
+import math
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer, TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
 from .models import (
 	SesionSimulacion,
 	ProgresoHistorico,
@@ -12,6 +17,10 @@ from .models import (
 	AnalisisIA
 )
 
+from .revocacion import RefreshTokenRevocable, jti_revocado
+from .contrasenas import hashear_password
+from .usuarios import asignar_usernames, separar_nombre, username_base
+
 # ✅ IMPORTAR ENCRYPTION
 from .utils.encryption import encrypt_aes256, decrypt_aes256
 
@@ -79,6 +88,89 @@ class EventoOcurridoSerializer(serializers.ModelSerializer):
 		read_only_fields = ['id', 'created_at']
 
 
+# ============================================
+# INGESTA EN LOTE - DECISIONES Y EVENTOS
+# ============================================
+
+MAX_ITEMS_LOTE = 1000
+
+
+class IngestaLoteListSerializer(serializers.ListSerializer):
+	"""
+	ListSerializer para ingesta en lote de ítems de una sesión
+	- Verifica la propiedad de todas las sesiones con una sola consulta
+	- Valida cada ítem por separado y guarda sus errores por índice
+	- Inserta los ítems válidos con un solo bulk_create
+	"""
+
+	def to_internal_value(self, data):
+		if not isinstance(data, list):
+			raise serializers.ValidationError({
+				'non_field_errors': ['Se esperaba una lista de ítems']
+			})
+
+		if len(data) > MAX_ITEMS_LOTE:
+			raise serializers.ValidationError({
+				'non_field_errors': [f'Máximo {MAX_ITEMS_LOTE} ítems por lote']
+			})
+
+		sesion_ids = set()
+		for item in data:
+			try:
+				sesion_ids.add(int(item.get('sesion')))
+			except (AttributeError, TypeError, ValueError):
+				pass
+
+		self.sesiones_propias = set(SesionSimulacion.objects.filter(
+			usuario=self.context['request'].user,
+			id__in=sesion_ids
+		).values_list('id', flat=True))
+
+		self.errores_por_item = []
+		validos = []
+		for indice, item in enumerate(data):
+			try:
+				validos.append(self.child.run_validation(item))
+			except serializers.ValidationError as exc:
+				self.errores_por_item.append({'indice': indice, 'errores': exc.detail})
+
+		return validos
+
+	def create(self, validated_data):
+		modelo = self.child.Meta.model
+		with transaction.atomic():
+			return modelo.objects.bulk_create([modelo(**datos) for datos in validated_data])
+
+
+class SesionPropiaLoteMixin:
+	"""Campo sesion validado contra las sesiones precargadas del lote"""
+
+	def validate_sesion(self, value):
+		if value not in self.parent.sesiones_propias:
+			raise serializers.ValidationError('Sesión no encontrada')
+		return value
+
+
+class DecisionTomadaLoteSerializer(SesionPropiaLoteMixin, serializers.ModelSerializer):
+	"""Serializador de decisiones para ingesta en lote"""
+	sesion = serializers.IntegerField(source='sesion_id')
+
+	class Meta:
+		model = DecisionTomada
+		fields = ['sesion', 'decision_id', 'tiempo_respuesta_segundos', 'fue_acertada']
+		list_serializer_class = IngestaLoteListSerializer
+
+
+class EventoOcurridoLoteSerializer(SesionPropiaLoteMixin, serializers.ModelSerializer):
+	"""Serializador de eventos para ingesta en lote"""
+	sesion = serializers.IntegerField(source='sesion_id')
+
+	class Meta:
+		model = EventoOcurrido
+		fields = ['sesion', 'evento_id', 'timestamp_ocurrencia', 'fue_manejado_correctamente']
+		list_serializer_class = IngestaLoteListSerializer
+
+
 class SesionSimulacionDetailSerializer(serializers.ModelSerializer):
 	"""Serializador detallado para sesiones de simulación con relaciones"""
 	decisiones = DecisionTomadaSerializer(many=True, read_only=True)
@@ -174,6 +266,28 @@ class SaveFileUsuarioSerializer(serializers.ModelSerializer):
 		]
 		read_only_fields = ['id', 'created_at', 'ultima_actualizacion']
 
+	def validate_datos_savefile(self, value):
+		"""
+		Rechazar NaN e Infinity (también 1e400): json los acepta pero la
+		respuesta, que devuelve el savefile, no puede serializarlos.
+		El savefile parseado queda en `datos_parseados` para la ingesta.
+		"""
+		def rechazar(constante):
+			raise serializers.ValidationError(f'Número no finito en el savefile: {constante}')
+
+		def decimal(texto):
+			numero = float(texto)
+			if not math.isfinite(numero):
+				rechazar(texto)
+			return numero
+
+		try:
+			self.datos_parseados = json.loads(value, parse_constant=rechazar, parse_float=decimal)
+		except json.JSONDecodeError:
+			# Formato libre: se guarda tal cual
+			self.datos_parseados = value
+		return value
+
 	def create(self, validated_data):
 		"""Cifrar datos antes de guardar"""
 		# Obtener clave de cifrado
@@ -425,6 +539,9 @@ class DashboardResumenSerializer(serializers.Serializer):
 # AUTENTICACIÓN Y USUARIO
 # ============================================
 
+# Reintentos de registro cuando otro registro simultáneo toma el username
+INTENTOS_USERNAME = 3
+
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
 	"""
@@ -460,7 +577,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
 	def validate_email(self, value):
 		"""Validar que el email sea único"""
-		if User.objects.filter(email=value).exists():
+		if User.objects.filter(email__iexact=value).exclude(email='').exists():
 			raise serializers.ValidationError('Este email ya está registrado')
 		return value
 
@@ -478,28 +595,27 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 		
 		# Dividir nombre en first_name y last_name
 		nombre = validated_data.pop('nombre')
-		partes_nombre = nombre.strip().split(maxsplit=1)
-		
-		first_name = partes_nombre[0] if len(partes_nombre) > 0 else ''
-		last_name = partes_nombre[1] if len(partes_nombre) > 1 else ''
-		
-		# Generar username desde el email (sin dominio)
-		email = validated_data['email']
-		username = email.split('@')[0]
-		
-		# Si el username ya existe, agregar un número
-		counter = 1
-		original_username = username
-		while User.objects.filter(username=username).exists():
-			username = f"{original_username}{counter}"
-			counter += 1
-		
-		# Preparar datos para crear usuario
-		validated_data['username'] = username
-		validated_data['first_name'] = first_name
-		validated_data['last_name'] = last_name
-		
-		user = User.objects.create_user(**validated_data)
+		validated_data['first_name'], validated_data['last_name'] = separar_nombre(nombre)
+		base = username_base(validated_data['email'])
+		# PBKDF2 en el pool acotado (429 si está saturado), una sola vez
+		password = hashear_password(validated_data.pop('password'))
+		validated_data['email'] = User.objects.normalize_email(validated_data['email'])
+
+		# Username desde el email con el menor sufijo libre (una consulta).
+		# Dos registros simultáneos pueden chocar en username o en email:
+		# si el email ya existe gana el otro, si no se reintenta el username
+		for _ in range(INTENTOS_USERNAME):
+			validated_data['username'] = asignar_usernames([base])[0]
+			try:
+				with transaction.atomic():
+					user = User(password=password, **validated_data)
+					user.save()
+				break
+			except IntegrityError:
+				if User.objects.filter(email__iexact=validated_data['email']).exclude(email='').exists():
+					raise serializers.ValidationError({'email': 'Este email ya está registrado'})
+		else:
+			raise serializers.ValidationError({'email': 'No se pudo asignar un nombre de usuario, intenta de nuevo'})
 		return user
 
 
@@ -522,4 +638,21 @@ class ChangePasswordSerializer(serializers.Serializer):
 			raise serializers.ValidationError({
 				'new_password_confirm': 'Las contraseñas no coinciden'
 			})
-		return data
\ No newline at end of file
+		return data
+
+class TokenRefreshRevocableSerializer(TokenRefreshSerializer):
+	"""Refresh con rotación que revoca el token usado (ver revocacion.py)"""
+	token_class = RefreshTokenRevocable
+
+
+class TokenVerifyRevocableSerializer(TokenVerifySerializer):
+	"""Verify que además rechaza tokens revocados"""
+
+	def validate(self, attrs):
+		token = UntypedToken(attrs['token'])
+
+		jti = token.get(api_settings.JTI_CLAIM)
+		if jti and jti_revocado(jti):
+			raise serializers.ValidationError('Token is blacklisted')
+
+		return {}
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import (
+	SesionSimulacion,
+	DecisionTomada,
+	EventoOcurrido,
+	MetricaDesempeno,
+	SaveFileUsuario,
+	AnalisisIA,
+	ProgresoHistorico,
+)
+from .respuestas import invalidar_respuestas_usuario
+from .resumen import invalidar_resumen_dashboard
+
+
+def _usuario_de_sesion(sesion_id):
+	return SesionSimulacion.objects.filter(
+		pk=sesion_id
+	).values_list('usuario_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=SesionSimulacion)
+def sesion_modificada(sender, instance, **kwargs):
+	"""Invalida el resumen y las respuestas del dueño de la sesión"""
+	invalidar_resumen_dashboard(instance.usuario_id)
+	invalidar_respuestas_usuario(instance.usuario_id)
+
+
+@receiver([post_save, post_delete], sender=MetricaDesempeno)
+def metrica_modificada(sender, instance, **kwargs):
+	"""Invalida el resumen y las respuestas del dueño de la sesión medida"""
+	usuario_id = _usuario_de_sesion(instance.sesion_id)
+
+	if usuario_id is not None:
+		invalidar_resumen_dashboard(usuario_id)
+		invalidar_respuestas_usuario(usuario_id)
+
+
+@receiver([post_save, post_delete], sender=DecisionTomada)
+@receiver([post_save, post_delete], sender=EventoOcurrido)
+def detalle_sesion_modificado(sender, instance, **kwargs):
+	"""Invalida las respuestas del dueño de la sesión"""
+	invalidar_respuestas_usuario(_usuario_de_sesion(instance.sesion_id))
+
+
+@receiver([post_save, post_delete], sender=SaveFileUsuario)
+@receiver([post_save, post_delete], sender=AnalisisIA)
+@receiver([post_save, post_delete], sender=ProgresoHistorico)
+def dato_usuario_modificado(sender, instance, **kwargs):
+	"""Invalida las respuestas del dueño del registro"""
+	invalidar_respuestas_usuario(instance.usuario_id)
+
+
+@receiver([post_save, post_delete], sender=User)
+def usuario_modificado(sender, instance, **kwargs):
+	"""Invalida el usuario cacheado para autenticación (perfil, desactivación, contraseña)"""
+	# Import diferido: authentication trae simplejwt y la Request de DRF,
+	# que ni las señales ni los comandos de manage.py necesitan al arrancar
+	from .authentication import invalidar_usuario_auth
+	invalidar_usuario_auth(instance.pk)
@@ -0,0 +1,88 @@
+"""
+Throttling con cubeta de tokens compartida
+
+AnonRateThrottle y UserRateThrottle guardan una lista de timestamps por
+clave en la caché; con LocMemCache cada worker cuenta por su lado y el
+límite real se multiplica por el número de workers. Estas clases usan la
+misma configuración (DEFAULT_THROTTLE_RATES, scopes anon/user) pero el
+estado vive en la tabla CubetaThrottle: una fila por clave, actualizada
+atómicamente en una sola sentencia, válida entre workers y nodos.
+
+Una tasa '100/hour' es una cubeta de 100 tokens que se rellena a 100 por
+hora: permite ráfagas de hasta 100 y luego el ritmo sostenido.
+
+La clave guardada es `scope:` + sha256 del identificador: sin NUM_PROXIES
+el identificador anónimo es la cabecera X-Forwarded-For completa, que el
+cliente controla y puede superar el largo de la columna. Si el almacén
+falla, las peticiones anónimas se rechazan (login y registro no quedan sin
+límite) y las autenticadas pasan.
+"""
+
+import hashlib
+import logging
+import random
+
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+from .models import CubetaThrottle
+
+logger = logging.getLogger(__name__)
+
+# Una de cada N peticiones borra cubetas sin uso hace más de un día
+PURGA_CADA = 1000
+ANTIGUEDAD_PURGA = 86400
+
+
+class CubetaTokensMixin:
+	"""Reemplaza el historial en caché de SimpleRateThrottle por CubetaThrottle"""
+
+	espera = None
+	# Ante un fallo del almacén: True deja pasar, False rechaza
+	permitir_sin_almacen = True
+
+	def get_cache_key(self, request, view):
+		clave = super().get_cache_key(request, view)
+		if clave is None:
+			return None
+		# Largo fijo (scope + 65) sin importar lo que mande el cliente
+		return f'{self.scope}:{hashlib.sha256(clave.encode()).hexdigest()}'
+
+	def allow_request(self, request, view):
+		if self.rate is None:
+			return True
+
+		self.key = self.get_cache_key(request, view)
+		if self.key is None:
+			return True
+
+		try:
+			permitido, self.espera = CubetaThrottle.objects.consumir(
+				self.key,
+				self.num_requests,
+				self.num_requests / self.duration
+			)
+			if random.randrange(PURGA_CADA) == 0:
+				CubetaThrottle.objects.purgar(max(ANTIGUEDAD_PURGA, self.duration))
+		except Exception:
+			# Si el almacén falla el throttle no debe tumbar la API
+			logger.exception(
+				'Throttle %s no disponible, se %s la petición',
+				self.scope, 'deja pasar' if self.permitir_sin_almacen else 'rechaza'
+			)
+			self.espera = None
+			return self.permitir_sin_almacen
+
+		return permitido
+
+	def wait(self):
+		return self.espera
+
+
+class AnonCubetaThrottle(CubetaTokensMixin, AnonRateThrottle):
+	"""Límite por IP para peticiones anónimas (scope 'anon')"""
+
+	permitir_sin_almacen = False
+
+
+class UserCubetaThrottle(CubetaTokensMixin, UserRateThrottle):
+	"""Límite por usuario autenticado (scope 'user')"""
@@ -0,0 +1,146 @@
+"""
+Escrituras de last_login agrupadas
+
+Con UPDATE_LAST_LOGIN cada login escribe su fila de auth_user, y en los
+picos de inicio de clase esas escrituras compiten por las mismas filas.
+Los logins se acumulan en memoria (el más reciente por usuario) y un hilo
+del proceso los escribe juntos cada ULTIMO_LOGIN_FLUSH_SEGUNDOS con un
+solo UPDATE ... FROM (VALUES ...). También se vacía al terminar el proceso.
+
+ULTIMO_LOGIN_FLUSH_SEGUNDOS es la garantía de frescura: last_login en la
+BD puede atrasarse hasta ese tiempo. Con 0 se escribe en el mismo request.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case, DateTimeField, Q, Value, When
+from django.utils import timezone
+
+from .authentication import clave_usuario_auth
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pendientes = {}
+_hilo = {'pid': None}
+
+
+def _intervalo():
+	return getattr(settings, 'ULTIMO_LOGIN_FLUSH_SEGUNDOS', 5)
+
+
+def escribir_ultimos_logins(pendientes):
+	"""
+	Escribe {user_id: datetime} en una sola sentencia
+
+	Nunca retrocede un last_login ya más nuevo en la BD.
+	"""
+	if not pendientes:
+		return 0
+
+	connection = connections[User.objects.db]
+
+	if connection.vendor == 'postgresql':
+		tabla = connection.ops.quote_name(User._meta.db_table)
+		valores = ', '.join(['(%s, %s::timestamptz)'] * len(pendientes))
+		params = []
+		for user_id, cuando in pendientes.items():
+			params += [user_id, cuando]
+
+		with connection.cursor() as cursor:
+			cursor.execute(
+				f"UPDATE {tabla} AS u SET last_login = v.ultimo "
+				f"FROM (VALUES {valores}) AS v(id, ultimo) "
+				f"WHERE u.id = v.id AND (u.last_login IS NULL OR u.last_login < v.ultimo)",
+				params
+			)
+			actualizados = cursor.rowcount
+	else:
+		ultimo = Case(
+			*[When(pk=user_id, then=Value(cuando)) for user_id, cuando in pendientes.items()],
+			output_field=DateTimeField()
+		)
+		actualizados = User.objects.filter(pk__in=list(pendientes)).filter(
+			Q(last_login__isnull=True) | Q(last_login__lt=ultimo)
+		).update(last_login=ultimo)
+
+	# El UPDATE no emite post_save: el usuario cacheado para autenticación
+	# tendría un last_login viejo y un save() posterior lo regresaría
+	cache.delete_many([clave_usuario_auth(user_id) for user_id in pendientes])
+	return actualizados
+
+
+def vaciar_ultimos_logins():
+	"""Escribe los logins acumulados; devuelve cuántos usuarios se enviaron"""
+	global _pendientes
+
+	with _lock:
+		pendientes, _pendientes = _pendientes, {}
+
+	if pendientes:
+		try:
+			escribir_ultimos_logins(pendientes)
+		except Exception:
+			# Se devuelven al buffer sin pisar logins más nuevos
+			with _lock:
+				for user_id, cuando in pendientes.items():
+					if user_id not in _pendientes or _pendientes[user_id] < cuando:
+						_pendientes[user_id] = cuando
+			raise
+
+	return len(pendientes)
+
+
+def _ciclo_escritura():
+	while True:
+		time.sleep(_intervalo())
+		try:
+			vaciar_ultimos_logins()
+		except Exception:
+			logger.exception('Error escribiendo last_login acumulados')
+		finally:
+			# Conexiones propias de este hilo
+			connections.close_all()
+
+
+def _asegurar_hilo():
+	# Por pid: un proceso hijo (fork de gunicorn) no hereda el hilo
+	with _lock:
+		if _hilo['pid'] == os.getpid():
+			return
+		_hilo['pid'] = os.getpid()
+
+	threading.Thread(target=_ciclo_escritura, name='ultimo-login', daemon=True).start()
+
+
+def registrar_login(usuario, cuando=None):
+	"""Registra el login de un usuario según ULTIMO_LOGIN_FLUSH_SEGUNDOS"""
+	cuando = cuando or timezone.now()
+	usuario.last_login = cuando
+
+	if _intervalo() <= 0:
+		escribir_ultimos_logins({usuario.pk: cuando})
+		return
+
+	with _lock:
+		previo = _pendientes.get(usuario.pk)
+		if previo is None or previo < cuando:
+			_pendientes[usuario.pk] = cuando
+
+	_asegurar_hilo()
+
+
+@atexit.register
+def _vaciar_al_salir():
+	try:
+		vaciar_ultimos_logins()
+	except Exception:
+		logger.exception('No se pudieron escribir los last_login pendientes al salir')
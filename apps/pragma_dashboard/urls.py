@@ -10,6 +10,9 @@ from .views import (
 	RegisterViewSet,
 	UserProfileViewSet,
 	AnalisisIAViewSet,
+	BatchView,
+	EstadisticasCacheView,
+	EstadisticasPoolView,
 )
 
 app_name = 'pragma_dashboard'
@@ -26,5 +29,8 @@ router.register(r'auth/register', RegisterViewSet, basename='register')
 router.register(r'auth/profile', UserProfileViewSet, basename='profile')
 
 urlpatterns = [
+	path('batch/', BatchView.as_view(), name='batch'),
+	path('cache/estadisticas/', EstadisticasCacheView.as_view(), name='cache-estadisticas'),
+	path('db/estadisticas/', EstadisticasPoolView.as_view(), name='db-estadisticas'),
 	path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+Asignación de usernames a partir del email
+
+El username es la parte local del email; si ya existe se le agrega el
+menor sufijo numérico libre (juan, juan1, juan2...). Los ocupados se leen
+en una sola consulta para todas las bases, en vez de probar sufijo por
+sufijo.
+"""
+
+import re
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.models import User
+from django.db.models import Q
+
+MAX_USERNAME = User._meta.get_field('username').max_length
+
+
+def separar_nombre(nombre):
+	"""Nombre completo a (first_name, last_name)"""
+	partes = (nombre or '').strip().split(maxsplit=1)
+	return (partes[0] if partes else ''), (partes[1] if len(partes) > 1 else '')
+
+
+def username_base(email):
+	"""Parte local del email, recortada para dejar espacio al sufijo"""
+	return email.split('@')[0][:MAX_USERNAME - 6]
+
+
+def asignar_usernames(bases):
+	"""
+	Un username libre por cada base, en orden
+
+	Bases repetidas reciben sufijos distintos entre sí.
+
+	Args:
+		bases: Lista de bases (ver username_base)
+
+	Returns:
+		Lista de usernames del mismo largo que bases
+	"""
+	if not bases:
+		return []
+
+	distintas = list(dict.fromkeys(bases))
+	# startswith usa el índice de username (LIKE 'base%'); el patrón descarta
+	# los que no son base + dígitos
+	candidatos = User.objects.filter(
+		reduce(or_, (Q(username__startswith=base) for base in distintas))
+	).values_list('username', flat=True)
+
+	patrones = {base: re.compile(rf'{re.escape(base)}([1-9]\d*)?') for base in distintas}
+	ocupados = {base: set() for base in distintas}
+	for username in candidatos:
+		for base, patron in patrones.items():
+			coincidencia = patron.fullmatch(username)
+			if coincidencia:
+				ocupados[base].add(int(coincidencia.group(1)) if coincidencia.group(1) else 0)
+
+	asignados = []
+	for base in bases:
+		sufijo = 0
+		while sufijo in ocupados[base]:
+			sufijo += 1
+		ocupados[base].add(sufijo)
+		asignados.append(f'{base}{sufijo}' if sufijo else base)
+
+	return asignados
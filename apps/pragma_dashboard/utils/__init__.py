@@ -4,10 +4,17 @@ from .encryption import (
 	generate_encryption_key,
 	EncryptionError,
 )
+from .cache import cache_swr, leer_compartida, leer_compartidas, single_flight
+from .bloom import FiltroBloom
 
 __all__ = [
 	'encrypt_aes256',
 	'decrypt_aes256',
 	'generate_encryption_key',
 	'EncryptionError',
+	'cache_swr',
+	'leer_compartida',
+	'leer_compartidas',
+	'single_flight',
+	'FiltroBloom',
 ]
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Filtro Bloom en memoria
+
+Responde "seguro que no está" o "puede estar" con un bytearray de bits y
+k posiciones por elemento (doble hashing sobre un SHA-256). Sin falsos
+negativos; la tasa de falsos positivos se fija al construirlo.
+"""
+
+import hashlib
+import math
+
+
+class FiltroBloom:
+	"""
+	Filtro Bloom dimensionado para `capacidad` elementos
+
+	Args:
+		capacidad: Elementos esperados
+		tasa_falsos_positivos: Probabilidad objetivo de falso positivo
+	"""
+
+	def __init__(self, capacidad, tasa_falsos_positivos=0.01):
+		capacidad = max(1, capacidad)
+		self.num_bits = max(8, math.ceil(-capacidad * math.log(tasa_falsos_positivos) / math.log(2) ** 2))
+		self.num_hashes = max(1, round(self.num_bits / capacidad * math.log(2)))
+		self.bits = bytearray((self.num_bits + 7) // 8)
+		self.elementos = 0
+
+	def _posiciones(self, valor):
+		digest = hashlib.sha256(str(valor).encode('utf-8')).digest()
+		h1 = int.from_bytes(digest[:8], 'little')
+		h2 = int.from_bytes(digest[8:16], 'little') | 1
+		return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+	def agregar(self, valor):
+		for posicion in self._posiciones(valor):
+			self.bits[posicion >> 3] |= 1 << (posicion & 7)
+		self.elementos += 1
+
+	def __contains__(self, valor):
+		return all(self.bits[posicion >> 3] & (1 << (posicion & 7)) for posicion in self._posiciones(valor))
+
+	def __len__(self):
+		return self.elementos
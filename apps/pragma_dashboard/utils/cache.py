@@ -0,0 +1,151 @@
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+# Claves que algún hilo de este proceso está calculando
+_en_vuelo = set()
+_en_vuelo_lock = threading.Lock()
+
+INTERVALO_ESPERA = 0.05
+
+
+def leer_compartida(clave, default=None):
+	"""
+	Lee una clave de la caché por defecto desde su nivel compartido
+
+	Con CacheDosNiveles se salta el LRU del proceso, que puede recordar la
+	clave como ausente o con un valor que otro proceso ya cambió; con
+	cualquier otro backend es un `cache.get` normal.
+	"""
+	compartida = getattr(cache, 'compartida', None)
+	if compartida is None:
+		return cache.get(clave, default)
+	return compartida.get(cache.make_and_validate_key(clave), default)
+
+
+def leer_compartidas(claves):
+	"""Como `leer_compartida` para varias claves en una sola lectura; dict de las presentes"""
+	compartida = getattr(cache, 'compartida', None)
+	if compartida is None:
+		return cache.get_many(claves)
+	completas = {cache.make_and_validate_key(clave): clave for clave in claves}
+	return {completas[completa]: valor for completa, valor in compartida.get_many(list(completas)).items()}
+
+
+def _calculando(clave, candado, almacen):
+	with _en_vuelo_lock:
+		if clave in _en_vuelo:
+			return True
+	if almacen is cache:
+		return leer_compartida(candado) is not None
+	return almacen.get(candado) is not None
+
+
+def single_flight(clave, calcular, leer, espera_segundos=10, vida_lock=30, almacen=None):
+	"""
+	Un solo llamador calcula a la vez por clave, entre hilos y procesos
+
+	El que toma el candado (`cache.add` de `<clave>:revalidando` en el
+	almacén compartido) ejecuta `calcular`, que debe publicar su resultado
+	donde `leer` lo encuentre. El resto consulta `leer` hasta obtener algo
+	distinto de None: si hay un valor anterior lo recibe al instante, si
+	no espera a que el primero lo publique. Pasado `espera_segundos`, o si
+	el candado vence sin resultado, calcula por su cuenta.
+
+	Con CacheDosNiveles `add` se resuelve en el nivel compartido, así que
+	el candado vale entre workers y nodos.
+
+	Args:
+		clave: Clave del cálculo
+		calcular: Función sin argumentos que calcula y publica el valor
+		leer: Función sin argumentos que devuelve el valor publicado o None
+		espera_segundos: Máximo que un llamador espera a otro
+		vida_lock: Segundos tras los que vence el candado (proceso caído)
+		almacen: Caché donde vive el candado (por defecto la de Django)
+
+	Returns:
+		Valor calculado o el obtenido con `leer`
+	"""
+	almacen = almacen or cache
+	candado = f'{clave}:revalidando'
+	limite = time.monotonic() + espera_segundos
+
+	while True:
+		with _en_vuelo_lock:
+			libre = clave not in _en_vuelo
+			if libre:
+				_en_vuelo.add(clave)
+
+		if libre:
+			try:
+				marca = uuid.uuid4().hex
+				if almacen.add(candado, marca, vida_lock):
+					try:
+						return calcular()
+					finally:
+						if almacen.get(candado) == marca:
+							almacen.delete(candado)
+			finally:
+				with _en_vuelo_lock:
+					_en_vuelo.discard(clave)
+
+		# Otro llamador calcula: esperar su resultado
+		while True:
+			valor = leer()
+			if valor is not None:
+				return valor
+			if time.monotonic() >= limite:
+				return calcular()
+			if not _calculando(clave, candado, almacen):
+				break
+			time.sleep(INTERVALO_ESPERA)
+
+		# El candado se liberó: el resultado pudo publicarse recién
+		valor = leer()
+		if valor is not None:
+			return valor
+
+
+def cache_swr(clave, calcular, fresco_segundos=60, stale_segundos=600):
+	"""
+	Cachear un valor con semántica stale-while-revalidate
+
+	Mientras el valor está fresco se sirve directo desde caché. Una vez
+	vencido se sigue sirviendo durante `stale_segundos`; solo el primer
+	llamador que lo encuentra vencido lo recalcula, el resto recibe el
+	valor anterior sin tocar la base de datos. Sin valor anterior, los
+	demás esperan el resultado del primero (ver `single_flight`).
+
+	Args:
+		clave: Clave de caché
+		calcular: Función sin argumentos que produce el valor
+		fresco_segundos: Tiempo durante el cual el valor se considera fresco
+		stale_segundos: Tiempo adicional durante el cual se sirve vencido
+
+	Returns:
+		Valor cacheado o recién calculado
+	"""
+	entrada = cache.get(clave)
+
+	if entrada is not None and entrada['fresco_hasta'] > time.time():
+		return entrada['valor']
+
+	def recalcular():
+		if entrada is None:
+			# Otro llamador pudo publicarlo mientras se tomaba el candado
+			publicada = leer_compartida(clave)
+			if publicada is not None:
+				return publicada
+
+		nueva = {'valor': calcular(), 'fresco_hasta': time.time() + fresco_segundos}
+		cache.set(clave, nueva, fresco_segundos + stale_segundos)
+		return nueva
+
+	if entrada is not None:
+		leer = lambda: entrada
+	else:
+		leer = lambda: leer_compartida(clave)
+
+	return single_flight(clave, recalcular, leer, vida_lock=fresco_segundos)['valor']
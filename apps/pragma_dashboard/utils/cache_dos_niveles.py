@@ -0,0 +1,274 @@
+"""
+Backend de caché en dos niveles
+
+Nivel 1: LRU en memoria del proceso, acotado en entradas y con un TTL
+corto (L1_TTL) que acota cuánto puede quedar desactualizado respecto de
+otros procesos. Nivel 2: otra caché de CACHES compartida por todos los
+workers y nodos (por defecto la tabla de DatabaseCache).
+
+Las lecturas prueban el nivel 1 y luego el 2; las escrituras y borrados
+van a ambos. add e incr se resuelven en el nivel 2; add es atómico entre
+procesos, pero incr de DatabaseCache es un get + set: dos incrementos
+simultáneos pueden quedar en uno.
+
+Cada escritura en DatabaseCache (set, add, touch; set_many escribe clave
+por clave) hace antes un SELECT COUNT(*) de la tabla y, si supera
+MAX_ENTRIES, poda un 1/CULL_FREQUENCY. DatabaseCache solo borra una fila
+vencida al leerla o al podar, así que la tabla crecería hasta MAX_ENTRIES
+y cada escritura contaría esas filas. Una de cada PURGA_CADA escrituras
+borra las filas vencidas (`purgar_expiradas`): la tabla se mantiene cerca
+de las entradas vivas y el conteo, barato.
+
+Las claves llevan la versión de Django (`version`, `incr_version`), así
+que subir la versión de una clave la invalida en ambos niveles sin borrar
+nada.
+
+El nivel 1 guarda los valores serializados con pickle, como LocMemCache:
+cada lectura entrega una copia, así que una petición que modifica lo que
+leyó (p. ej. un resumen del dashboard) no lo cambia para las demás.
+
+Cada proceso cuenta aciertos por nivel (ver `estadisticas()`).
+"""
+
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, router
+from django.utils.timezone import now
+
+_AUSENTE = object()
+# Marca en el nivel 1 de una clave que tampoco está en el nivel 2
+_NEGATIVO = object()
+
+
+class CacheDosNiveles(BaseCache):
+	"""
+	OPTIONS:
+		COMPARTIDA: alias en CACHES del nivel 2
+		L1_MAX_ENTRADAS: entradas del LRU en memoria
+		L1_TTL: segundos máximos que una entrada vive en el nivel 1
+		PURGA_CADA: una de cada N escrituras borra las filas vencidas del
+			nivel 2 si es DatabaseCache (0 = nunca)
+	"""
+
+	def __init__(self, location, params):
+		super().__init__(params)
+		opciones = params.get('OPTIONS', {})
+		self._alias_compartida = opciones.get('COMPARTIDA', 'compartida')
+		self._l1_max = int(opciones.get('L1_MAX_ENTRADAS', 1000))
+		self._l1_ttl = float(opciones.get('L1_TTL', 5))
+		self._purga_cada = int(opciones.get('PURGA_CADA', 1000))
+		self._l1 = OrderedDict()
+		self._lock = threading.Lock()
+		self._contadores = {'l1_aciertos': 0, 'l2_aciertos': 0, 'fallos': 0}
+
+	@property
+	def compartida(self):
+		return caches[self._alias_compartida]
+
+	# ---------- nivel 1 ----------
+
+	def _l1_get(self, clave):
+		with self._lock:
+			entrada = self._l1.get(clave)
+			if entrada is None:
+				return _AUSENTE
+			valor, expira = entrada
+			if expira <= time.monotonic():
+				del self._l1[clave]
+				return _AUSENTE
+			self._l1.move_to_end(clave)
+		if valor is _NEGATIVO:
+			return valor
+		return pickle.loads(valor)
+
+	def _l1_set(self, clave, valor, timeout):
+		vida = self._l1_ttl if timeout is None else min(self._l1_ttl, timeout)
+		if vida <= 0:
+			self._l1_delete(clave)
+			return
+		if valor is not _NEGATIVO:
+			valor = pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)
+		with self._lock:
+			self._l1[clave] = (valor, time.monotonic() + vida)
+			self._l1.move_to_end(clave)
+			while len(self._l1) > self._l1_max:
+				self._l1.popitem(last=False)
+
+	def _l1_delete(self, clave):
+		with self._lock:
+			self._l1.pop(clave, None)
+
+	def _contar(self, contador):
+		with self._lock:
+			self._contadores[contador] += 1
+
+	# ---------- nivel 2 ----------
+
+	def purgar_expiradas(self):
+		"""Borra las filas vencidas del nivel 2 (solo DatabaseCache); devuelve cuántas"""
+		compartida = self.compartida
+		if not isinstance(compartida, DatabaseCache):
+			return 0
+
+		db = router.db_for_write(compartida.cache_model_class)
+		connection = connections[db]
+		quote_name = connection.ops.quote_name
+		with connection.cursor() as cursor:
+			cursor.execute(
+				f"DELETE FROM {quote_name(compartida._table)} WHERE {quote_name('expires')} < %s",
+				[connection.ops.adapt_datetimefield_value(now().replace(microsecond=0))]
+			)
+			return cursor.rowcount
+
+	def _quizas_purgar(self):
+		if self._purga_cada > 0 and random.randrange(self._purga_cada) == 0:
+			self.purgar_expiradas()
+
+	# ---------- API de BaseCache ----------
+
+	def get(self, key, default=None, version=None):
+		clave = self.make_and_validate_key(key, version=version)
+
+		valor = self._l1_get(clave)
+		if valor is _NEGATIVO:
+			self._contar('fallos')
+			return default
+		if valor is not _AUSENTE:
+			self._contar('l1_aciertos')
+			return valor
+
+		valor = self.compartida.get(clave, _AUSENTE)
+		if valor is _AUSENTE:
+			self._contar('fallos')
+			# Las claves ausentes también se recuerdan: no vuelven al nivel 2
+			# hasta que venza L1_TTL o este proceso las escriba
+			self._l1_set(clave, _NEGATIVO, None)
+			return default
+
+		self._contar('l2_aciertos')
+		self._l1_set(clave, valor, None)
+		return valor
+
+	def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+		clave = self.make_and_validate_key(key, version=version)
+		timeout = self.get_backend_timeout(timeout)
+		self._quizas_purgar()
+		self.compartida.set(clave, value, timeout)
+		self._l1_set(clave, value, timeout)
+
+	def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+		clave = self.make_and_validate_key(key, version=version)
+		timeout = self.get_backend_timeout(timeout)
+		self._quizas_purgar()
+		agregado = self.compartida.add(clave, value, timeout)
+		if agregado:
+			self._l1_set(clave, value, timeout)
+		else:
+			self._l1_delete(clave)
+		return agregado
+
+	def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+		clave = self.make_and_validate_key(key, version=version)
+		return self.compartida.touch(clave, self.get_backend_timeout(timeout))
+
+	def delete(self, key, version=None):
+		clave = self.make_and_validate_key(key, version=version)
+		self._l1_delete(clave)
+		return self.compartida.delete(clave)
+
+	def has_key(self, key, version=None):
+		clave = self.make_and_validate_key(key, version=version)
+		valor = self._l1_get(clave)
+		if valor is _NEGATIVO:
+			return False
+		return valor is not _AUSENTE or self.compartida.has_key(clave)
+
+	def incr(self, key, delta=1, version=None):
+		# Tan atómico como el nivel 2: con DatabaseCache no lo es
+		clave = self.make_and_validate_key(key, version=version)
+		self._l1_delete(clave)
+		return self.compartida.incr(clave, delta)
+
+	def get_many(self, keys, version=None):
+		claves = {self.make_and_validate_key(key, version=version): key for key in keys}
+		encontrados, pendientes = {}, []
+
+		for clave, key in claves.items():
+			valor = self._l1_get(clave)
+			if valor is _NEGATIVO:
+				self._contar('fallos')
+			elif valor is _AUSENTE:
+				pendientes.append(clave)
+			else:
+				self._contar('l1_aciertos')
+				encontrados[key] = valor
+
+		if pendientes:
+			desde_l2 = self.compartida.get_many(pendientes)
+			for clave in pendientes:
+				if clave in desde_l2:
+					self._contar('l2_aciertos')
+					self._l1_set(clave, desde_l2[clave], None)
+					encontrados[claves[clave]] = desde_l2[clave]
+				else:
+					self._contar('fallos')
+					self._l1_set(clave, _NEGATIVO, None)
+
+		return encontrados
+
+	def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+		timeout = self.get_backend_timeout(timeout)
+		datos = {self.make_and_validate_key(key, version=version): value for key, value in data.items()}
+		self._quizas_purgar()
+		fallidas = self.compartida.set_many(datos, timeout)
+		for clave, valor in datos.items():
+			self._l1_set(clave, valor, timeout)
+		return fallidas
+
+	def delete_many(self, keys, version=None):
+		claves = [self.make_and_validate_key(key, version=version) for key in keys]
+		for clave in claves:
+			self._l1_delete(clave)
+		self.compartida.delete_many(claves)
+
+	def clear(self):
+		with self._lock:
+			self._l1.clear()
+		self.compartida.clear()
+
+	def get_backend_timeout(self, timeout=DEFAULT_TIMEOUT):
+		"""Segundos de vida (None = sin expiración), no el timestamp de BaseCache"""
+		if timeout == DEFAULT_TIMEOUT:
+			return self.default_timeout
+		return timeout
+
+	# ---------- estadísticas ----------
+
+	def estadisticas(self):
+		"""Aciertos y tasas por nivel en este proceso"""
+		with self._lock:
+			contadores = dict(self._contadores)
+			entradas_l1 = len(self._l1)
+
+		lecturas = sum(contadores.values())
+		fallos_l1 = contadores['l2_aciertos'] + contadores['fallos']
+		return {
+			**contadores,
+			'lecturas': lecturas,
+			'tasa_l1': round(contadores['l1_aciertos'] / lecturas, 4) if lecturas else 0.0,
+			'tasa_l2': round(contadores['l2_aciertos'] / fallos_l1, 4) if fallos_l1 else 0.0,
+			'tasa_total': round((lecturas - contadores['fallos']) / lecturas, 4) if lecturas else 0.0,
+			'entradas_l1': entradas_l1,
+		}
+
+	def reiniciar_estadisticas(self):
+		with self._lock:
+			for contador in self._contadores:
+				self._contadores[contador] = 0
@@ -1,4 +1,6 @@
-from cryptography.fernet import Fernet, InvalidToken
+# cryptography se importa al primer uso: ni manage.py ni el arranque del
+# proceso lo necesitan (config/calentamiento.py lo precarga en gunicorn)
+from functools import lru_cache
 import base64
 import os
 
@@ -6,6 +8,12 @@ class EncryptionError(Exception):
 	"""Excepción personalizada para errores de cifrado"""
 	pass
 
+@lru_cache(maxsize=8)
+def obtener_cifrador(key):
+	"""Instancia Fernet por clave, reutilizada entre llamadas (se precarga al arrancar)"""
+	from cryptography.fernet import Fernet
+	return Fernet(base64.urlsafe_b64encode(key))
+
 def encrypt_aes256(data, key):
 	"""
 	Cifrar datos usando AES-256 con Fernet
@@ -34,9 +42,7 @@ def encrypt_aes256(data, key):
 		)
 	
 	try:
-		# Convertir clave a base64 para Fernet
-		key_b64 = base64.urlsafe_b64encode(key)
-		cipher = Fernet(key_b64)
+		cipher = obtener_cifrador(key)
 		encrypted_data = cipher.encrypt(data)
 		return encrypted_data
 	except Exception as e:
@@ -53,6 +59,8 @@ def decrypt_aes256(encrypted_data, key):
 	Returns:
 		Datos descifrados como string
 	"""
+	from cryptography.fernet import InvalidToken
+
 	# Validar parámetros
 	if not isinstance(encrypted_data, bytes):
 		raise TypeError(f"encrypted_data debe ser bytes, no {type(encrypted_data)}")
@@ -67,9 +75,7 @@ def decrypt_aes256(encrypted_data, key):
 		)
 	
 	try:
-		# Preparar clave
-		key_b64 = base64.urlsafe_b64encode(key)
-		cipher = Fernet(key_b64)
+		cipher = obtener_cifrador(key)
 		decrypted_data = cipher.decrypt(encrypted_data)
 		return decrypted_data.decode('utf-8')
 	except InvalidToken:
@@ -79,4 +85,5 @@ def decrypt_aes256(encrypted_data, key):
 
 def generate_encryption_key():
 	"""Generar una nueva clave de cifrado aleatoria de 256 bits"""
+	from cryptography.fernet import Fernet
 	return Fernet.generate_key()
\ No newline at end of file
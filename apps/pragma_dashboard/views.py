@@ -1,14 +1,32 @@
+import json
+import logging
+import os
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.views import APIView
+from rest_framework.request import Request
+from rest_framework.exceptions import Throttled
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django.db.models import Sum, Count, Q, Avg
+from django.db.models.functions import TruncDate
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.http import HttpRequest, JsonResponse, QueryDict, StreamingHttpResponse
+from django.urls import Resolver404, resolve
+from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from datetime import datetime, time, timedelta
+
+from config.postgresql_pool.metricas import estadisticas_pools
 
 from .models import (
 	SesionSimulacion,
@@ -35,7 +53,23 @@ from .serializers import (
 	AnalisisIAListSerializer,
 	AnalisisIADetailSerializer,
 	AnalisisIACreateSerializer,
+	DecisionTomadaLoteSerializer,
+	EventoOcurridoLoteSerializer,
+	DashboardResumenSerializer,
 )
+from .authentication import CachedJWTAuthentication
+from .contrasenas import HashSaturado, hashear_password, verificar_password, verificar_password_async
+from .exportacion import datos_sesion_n8n, exportar_sesiones_ndjson
+from .ingesta import ingerir_savefile
+from .pagination import AnalisisIACursorPagination
+from .replicas import iniciar_peticion, terminar_peticion
+from .ultimo_login import registrar_login
+from .respuestas import cachear_por_usuario, invalidar_respuestas_usuario
+from .resumen import invalidar_resumen_dashboard, obtener_resumen_dashboard
+from .throttling import AnonCubetaThrottle
+from .utils import cache_swr
+
+logger = logging.getLogger(__name__)
 
 
 # ============================================
@@ -59,32 +93,38 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 		email = attrs.get('email')
 		password = attrs.get('password')
 		
+		# Usa el índice único UPPER(email) de auth_user (migración 0006)
 		try:
-			user = User.objects.get(email=email)
+			user = User.objects.exclude(email='').get(email__iexact=email)
 		except User.DoesNotExist:
 			raise serializers.ValidationError({'email': 'No existe un usuario con este email'})
 
-		if not user.check_password(password):
+		# PBKDF2 en el pool acotado; 429 si está saturado
+		if not verificar_password(user, password):
 			raise serializers.ValidationError({'password': 'Contraseña incorrecta'})
 
 		if not user.is_active:
 			raise serializers.ValidationError({'error': 'Usuario desactivado'})
-		
-		refresh = self.get_token(user)
-		
-		data = {
-			'refresh': str(refresh),
-			'access': str(refresh.access_token),
-			'user': {
-				'id': user.id,
-				'username': user.username,
-				'email': user.email,
-				'first_name': user.first_name,
-				'last_name': user.last_name,
-			}
+
+		if jwt_settings.UPDATE_LAST_LOGIN:
+			registrar_login(user)
+
+		return datos_login(user, self.get_token(user))
+
+
+def datos_login(user, refresh):
+	"""Respuesta de login: tokens y datos básicos del usuario"""
+	return {
+		'refresh': str(refresh),
+		'access': str(refresh.access_token),
+		'user': {
+			'id': user.id,
+			'username': user.username,
+			'email': user.email,
+			'first_name': user.first_name,
+			'last_name': user.last_name,
 		}
-		
-		return data
+	}
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -93,13 +133,145 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 	permission_classes = [AllowAny]
 
 
+def respuesta_throttled(error):
+	"""429 como el de DRF, con Retry-After si se conoce la espera"""
+	headers = {'Retry-After': str(error.wait)} if error.wait is not None else None
+	return JsonResponse({'detail': str(error.detail)}, status=error.status_code, headers=headers)
+
+
+async def login_async(request):
+	"""
+	Login por email para ASGI (config/asgi.py)
+
+	Misma entrada, respuesta y errores que CustomTokenObtainPairView, pero
+	la consulta y el hash se esperan sin bloquear el event loop. Al no ser
+	una vista DRF, la cubeta anónima (la misma de auth/login/) se aplica
+	aquí antes de buscar al usuario.
+	"""
+	if request.method != 'POST':
+		return JsonResponse({'detail': 'Método no permitido'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+	throttle = AnonCubetaThrottle()
+	if not await sync_to_async(throttle.allow_request)(Request(request), None):
+		return respuesta_throttled(Throttled(throttle.wait()))
+
+	try:
+		datos = json.loads(request.body or b'{}')
+	except (json.JSONDecodeError, UnicodeDecodeError):
+		return JsonResponse({'detail': 'JSON inválido'}, status=status.HTTP_400_BAD_REQUEST)
+
+	email = datos.get('email') if isinstance(datos, dict) else None
+	password = datos.get('password') if isinstance(datos, dict) else None
+	faltantes = {
+		campo: ['Este campo es requerido.']
+		for campo, valor in (('email', email), ('password', password)) if not valor
+	}
+	if faltantes:
+		return JsonResponse(faltantes, status=status.HTTP_400_BAD_REQUEST)
+
+	try:
+		user = await User.objects.exclude(email='').aget(email__iexact=email)
+	except User.DoesNotExist:
+		return JsonResponse({'email': ['No existe un usuario con este email']}, status=status.HTTP_400_BAD_REQUEST)
+
+	try:
+		correcta = await verificar_password_async(user, str(password))
+	except HashSaturado as error:
+		return respuesta_throttled(error)
+
+	if not correcta:
+		return JsonResponse({'password': ['Contraseña incorrecta']}, status=status.HTTP_400_BAD_REQUEST)
+
+	if not user.is_active:
+		return JsonResponse({'error': ['Usuario desactivado']}, status=status.HTTP_400_BAD_REQUEST)
+
+	if jwt_settings.UPDATE_LAST_LOGIN:
+		await sync_to_async(registrar_login)(user)
+
+	return JsonResponse(datos_login(user, CustomTokenObtainPairSerializer.get_token(user)))
+
+
+# API sin sesión: como las vistas DRF, no aplica CSRF
+login_async.csrf_exempt = True
+
+
+# ============================================
+# LECTURAS EN RÉPLICAS
+# ============================================
+
+class LecturaReplicaMixin:
+	"""
+	Las lecturas de modelos en peticiones seguras van a una réplica, salvo
+	que el usuario haya escrito hace poco (ver replicas.py)
+	"""
+
+	def initial(self, request, *args, **kwargs):
+		super().initial(request, *args, **kwargs)
+		self._token_replica = iniciar_peticion(request.user.pk, request.method)
+
+	def finalize_response(self, request, response, *args, **kwargs):
+		token = getattr(self, '_token_replica', None)
+		if token is not None:
+			self._token_replica = None
+			terminar_peticion(token)
+		return super().finalize_response(request, response, *args, **kwargs)
+
+
+# ============================================
+# LECTURA EN LOTE POR IDS
+# ============================================
+
+MAX_IDS_LOTE = 100
+
+
+class ObtenerPorIdsMixin:
+	"""
+	GET .../?ids=1,2,3 recupera varios objetos en una sola consulta IN
+	Respeta el filtrado por usuario de get_queryset y usa el mismo
+	serializador y plan de prefetch que el detalle (retrieve)
+	"""
+	max_ids_lote = MAX_IDS_LOTE
+
+	def list(self, request, *args, **kwargs):
+		ids = request.query_params.get('ids')
+		if ids is None:
+			return super().list(request, *args, **kwargs)
+
+		try:
+			ids = list(dict.fromkeys(int(pk) for pk in ids.split(',') if pk.strip()))
+		except ValueError:
+			return Response(
+				{'error': 'Parámetro ids debe ser una lista de enteros separados por coma'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+
+		if not ids or len(ids) > self.max_ids_lote:
+			return Response(
+				{'error': f'Parámetro ids debe tener entre 1 y {self.max_ids_lote} IDs'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+
+		# Misma resolución de queryset y serializador que retrieve
+		self.action = 'retrieve'
+		objetos = {obj.pk: obj for obj in self.get_queryset().filter(pk__in=ids)}
+
+		serializer = self.get_serializer(
+			[objetos[pk] for pk in ids if pk in objetos], many=True
+		)
+		return Response(serializer.data)
+
+
 # ============================================
 # SESIONES
 # ============================================
 
-class SesionSimulacionViewSet(viewsets.ModelViewSet):
+MAX_SESIONES_LOTE = 500
+MAX_LIMITE_EXPORTACION = 10000
+
+
+class SesionSimulacionViewSet(LecturaReplicaMixin, ObtenerPorIdsMixin, viewsets.ModelViewSet):
 	"""ViewSet para gestionar sesiones de simulación"""
-	authentication_classes = [JWTAuthentication]
+	authentication_classes = [CachedJWTAuthentication]
 	permission_classes = [IsAuthenticated]
 	queryset = SesionSimulacion.objects.all()
 
@@ -112,14 +284,20 @@ class SesionSimulacionViewSet(viewsets.ModelViewSet):
 
 	def get_queryset(self):
 		"""Solo sesiones del usuario autenticado"""
-		return SesionSimulacion.objects.filter(
+		sesiones = SesionSimulacion.objects.filter(
 			usuario=self.request.user
-		).select_related('usuario').prefetch_related('decisiones', 'eventos')
+		).select_related('usuario')
+
+		# Solo el detalle serializa decisiones, eventos y métricas
+		if self.action == 'retrieve':
+			sesiones = sesiones.select_related('metricas').prefetch_related('decisiones', 'eventos')
+		return sesiones
 
 	def perform_create(self, serializer):
 		serializer.save(usuario=self.request.user)
 
 	@action(detail=False, methods=['get'])
+	@cachear_por_usuario
 	def mi_historial(self, request):
 		"""Obtiene historial de sesiones del usuario"""
 		sesiones = self.get_queryset().order_by('-fecha_inicio')
@@ -132,28 +310,76 @@ class SesionSimulacionViewSet(viewsets.ModelViewSet):
 		serializer = self.get_serializer(sesiones, many=True)
 		return Response(serializer.data)
 
+	@action(detail=False, methods=['get'])
+	def resumen(self, request):
+		"""
+		Resumen del dashboard personal (cacheado por usuario)
+		GET /api/v1/dashboard/sesiones/resumen/
+		"""
+		serializer = DashboardResumenSerializer(obtener_resumen_dashboard(request.user.id))
+		return Response(serializer.data)
+
 	@action(detail=True, methods=['post'])
 	def completar(self, request, pk=None):
-		"""Marca sesión como completada"""
-		sesion = self.get_object()
+		"""Marca sesión como completada (idempotente, una sola sentencia)"""
+		try:
+			sesion_id = int(pk)
+		except (TypeError, ValueError):
+			return Response(
+				{'error': 'Sesión no encontrada'},
+				status=status.HTTP_404_NOT_FOUND
+			)
 
-		if sesion.usuario != request.user:
+		sesiones, _ = SesionSimulacion.objects.completar(request.user, [sesion_id])
+		invalidar_resumen_dashboard(request.user.id)
+		invalidar_respuestas_usuario(request.user.id)
+
+		if not sesiones:
 			return Response(
-				{'error': 'No tienes permisos para modificar esta sesión'},
-				status=status.HTTP_403_FORBIDDEN
+				{'error': 'Sesión no encontrada'},
+				status=status.HTTP_404_NOT_FOUND
 			)
 
-		sesion.completada = True
-		sesion.fecha_fin = timezone.now()
+		serializer = self.get_serializer(sesiones[0])
+		return Response(serializer.data, status=status.HTTP_200_OK)
 
-		if sesion.fecha_inicio:
-			duracion = sesion.fecha_fin - sesion.fecha_inicio
-			sesion.duracion_segundos = int(duracion.total_seconds())
+	@action(detail=False, methods=['post'])
+	def completar_lote(self, request):
+		"""
+		Marca varias sesiones como completadas en una sola sentencia
+		POST /api/v1/dashboard/sesiones/completar_lote/ {"ids": [1, 2, 3]}
+		"""
+		ids = request.data.get('ids')
 
-		sesion.save()
+		if not isinstance(ids, list) or not ids:
+			return Response(
+				{'error': 'Parámetro ids requerido (lista de IDs)'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
 
-		serializer = self.get_serializer(sesion)
-		return Response(serializer.data, status=status.HTTP_200_OK)
+		if len(ids) > MAX_SESIONES_LOTE:
+			return Response(
+				{'error': f'Máximo {MAX_SESIONES_LOTE} sesiones por lote'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+
+		try:
+			ids = [int(sesion_id) for sesion_id in ids]
+		except (TypeError, ValueError):
+			return Response(
+				{'error': 'Los IDs deben ser números enteros'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+
+		sesiones, no_encontradas = SesionSimulacion.objects.completar(request.user, ids)
+		invalidar_resumen_dashboard(request.user.id)
+		invalidar_respuestas_usuario(request.user.id)
+
+		serializer = self.get_serializer(sesiones, many=True)
+		return Response({
+			'sesiones': serializer.data,
+			'no_encontradas': no_encontradas,
+		}, status=status.HTTP_200_OK)
 
 	@action(detail=True, methods=['get'])
 	def datos_para_n8n(self, request, pk=None):
@@ -164,32 +390,112 @@ class SesionSimulacionViewSet(viewsets.ModelViewSet):
 		eventos = list(EventoOcurrido.objects.filter(sesion=sesion).values())
 		metricas = getattr(sesion, 'metricas', None)
 
-		datos = {
-			'sesion': {
-				'id': sesion.id,
-				'usuario_id': sesion.usuario.id,
-				'escenario': sesion.escenario_nombre,
-				'fecha_inicio': sesion.fecha_inicio.isoformat() if sesion.fecha_inicio else None,
-				'fecha_fin': sesion.fecha_fin.isoformat() if sesion.fecha_fin else None,
-				'duracion_segundos': sesion.duracion_segundos,
-				'completada': sesion.completada,
-			},
-			'decisiones': decisiones,
-			'eventos': eventos,
-			'metricas_existentes': {
-				'id': metricas.id if metricas else None,
-				'nivel_estres': metricas.nivel_estres if metricas else None,
-			} if metricas else None
-		}
+		return Response(datos_sesion_n8n(sesion, decisiones, eventos, metricas))
 
-		return Response(datos)
+	@action(detail=False, methods=['get'])
+	def exportar_n8n(self, request):
+		"""
+		Exportación masiva de sesiones en NDJSON para N8N
+		GET /api/v1/dashboard/sesiones/exportar_n8n/?usuario_id=&desde=&hasta=&cursor=&limite=
+		limite entre 1 y MAX_LIMITE_EXPORTACION; sin limite exporta todas
+		"""
+		es_admin = request.user.is_staff or request.user.is_superuser
+		sesiones = SesionSimulacion.objects.all() if es_admin else SesionSimulacion.objects.filter(
+			usuario=request.user
+		)
+
+		try:
+			usuario_id = request.query_params.get('usuario_id')
+			if usuario_id:
+				usuario_id = int(usuario_id)
+				if not es_admin and usuario_id != request.user.id:
+					return Response(
+						{'error': 'No tienes permisos para exportar sesiones de otro usuario'},
+						status=status.HTTP_403_FORBIDDEN
+					)
+				sesiones = sesiones.filter(usuario_id=usuario_id)
+
+			for parametro, lookup in (('desde', 'fecha_inicio__gte'), ('hasta', 'fecha_inicio__lte')):
+				valor = request.query_params.get(parametro)
+				if valor:
+					sesiones = sesiones.filter(**{lookup: _parsear_fecha_parametro(valor, parametro)})
+
+			cursor = request.query_params.get('cursor')
+			cursor = int(cursor) if cursor else None
+			if cursor is not None and cursor < 0:
+				raise ValueError('cursor no puede ser negativo')
+			limite = request.query_params.get('limite')
+			limite = int(limite) if limite else None
+			# Validar antes de abrir el stream: después el 200 ya está enviado
+			if limite is not None and not 1 <= limite <= MAX_LIMITE_EXPORTACION:
+				raise ValueError(f'limite debe estar entre 1 y {MAX_LIMITE_EXPORTACION}')
+		except ValueError as e:
+			return Response(
+				{'error': f'Parámetro inválido: {e}'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+
+		return StreamingHttpResponse(
+			exportar_sesiones_ndjson(sesiones, cursor=cursor, limite=limite),
+			content_type='application/x-ndjson'
+		)
 
 
-class DecisionTomadaViewSet(viewsets.ModelViewSet):
+def _parsear_fecha_parametro(valor, parametro):
+	"""Fecha o fecha-hora ISO de un query param a datetime aware"""
+	fecha = parse_datetime(valor)
+	if fecha is None:
+		dia = parse_date(valor)
+		if dia is None:
+			raise ValueError(f'{parametro} debe ser una fecha ISO 8601')
+		fecha = datetime.combine(dia, time.max if parametro == 'hasta' else time.min)
+	if timezone.is_naive(fecha):
+		fecha = timezone.make_aware(fecha)
+	return fecha
+
+
+class IngestaLoteMixin:
+	"""
+	Acción POST lote/: recibe una lista de ítems, verifica la propiedad
+	de las sesiones una sola vez e inserta todo en una transacción
+	"""
+	lote_serializer_class = None
+
+	@action(detail=False, methods=['post'])
+	def lote(self, request):
+		"""Ingesta en lote - POST .../lote/ [{...}, {...}]"""
+		serializer = self.lote_serializer_class(
+			data=request.data,
+			many=True,
+			context=self.get_serializer_context()
+		)
+		serializer.is_valid(raise_exception=True)
+
+		creados = serializer.save() if serializer.validated_data else []
+		errores = serializer.errores_por_item
+		if creados:
+			# bulk_create no emite señales
+			invalidar_respuestas_usuario(request.user.id)
+
+		if errores and not creados:
+			codigo = status.HTTP_400_BAD_REQUEST
+		elif errores:
+			codigo = status.HTTP_207_MULTI_STATUS
+		else:
+			codigo = status.HTTP_201_CREATED
+
+		return Response({
+			'creados': self.get_serializer(creados, many=True).data,
+			'errores': errores,
+		}, status=codigo)
+
+
+class DecisionTomadaViewSet(LecturaReplicaMixin, IngestaLoteMixin, viewsets.ModelViewSet):
 	"""ViewSet para decisiones"""
-	authentication_classes = [JWTAuthentication]
+	authentication_classes = [CachedJWTAuthentication]
 	permission_classes = [IsAuthenticated]
 	serializer_class = DecisionTomadaSerializer
+	lote_serializer_class = DecisionTomadaLoteSerializer
 
 	def get_queryset(self):
 		"""Solo decisiones de sesiones del usuario"""
@@ -227,11 +533,12 @@ class DecisionTomadaViewSet(viewsets.ModelViewSet):
 		return Response(serializer.data)
 
 
-class EventoOcurridoViewSet(viewsets.ModelViewSet):
+class EventoOcurridoViewSet(LecturaReplicaMixin, IngestaLoteMixin, viewsets.ModelViewSet):
 	"""ViewSet para eventos"""
-	authentication_classes = [JWTAuthentication]
+	authentication_classes = [CachedJWTAuthentication]
 	permission_classes = [IsAuthenticated]
 	serializer_class = EventoOcurridoSerializer
+	lote_serializer_class = EventoOcurridoLoteSerializer
 
 	def get_queryset(self):
 		"""Solo eventos de sesiones del usuario"""
@@ -254,9 +561,9 @@ class EventoOcurridoViewSet(viewsets.ModelViewSet):
 			)
 
 
-class MetricaDesempenoViewSet(viewsets.ReadOnlyModelViewSet):
+class MetricaDesempenoViewSet(LecturaReplicaMixin, viewsets.ReadOnlyModelViewSet):
 	"""ViewSet de solo lectura para métricas"""
-	authentication_classes = [JWTAuthentication]
+	authentication_classes = [CachedJWTAuthentication]
 	permission_classes = [IsAuthenticated]
 	serializer_class = MetricaDesempenoSerializer
 
@@ -267,9 +574,9 @@ class MetricaDesempenoViewSet(viewsets.ReadOnlyModelViewSet):
 		).select_related('sesion')
 
 
-class ProgresoHistoricoViewSet(viewsets.ReadOnlyModelViewSet):
+class ProgresoHistoricoViewSet(LecturaReplicaMixin, viewsets.ReadOnlyModelViewSet):
 	"""ViewSet para progreso histórico"""
-	authentication_classes = [JWTAuthentication]
+	authentication_classes = [CachedJWTAuthentication]
 	permission_classes = [IsAuthenticated]
 	serializer_class = ProgresoHistoricoSerializer
 
@@ -279,10 +586,14 @@ class ProgresoHistoricoViewSet(viewsets.ReadOnlyModelViewSet):
 			usuario=self.request.user
 		).order_by('-fecha_calculo')
 
+	@cachear_por_usuario
+	def list(self, request, *args, **kwargs):
+		return super().list(request, *args, **kwargs)
 
-class SaveFileUsuarioViewSet(viewsets.ModelViewSet):
+
+class SaveFileUsuarioViewSet(LecturaReplicaMixin, ObtenerPorIdsMixin, viewsets.ModelViewSet):
 	"""ViewSet para archivos guardados"""
-	authentication_classes = [JWTAuthentication]
+	authentication_classes = [CachedJWTAuthentication]
 	permission_classes = [IsAuthenticated]
 	serializer_class = SaveFileUsuarioSerializer
 
@@ -290,12 +601,24 @@ class SaveFileUsuarioViewSet(viewsets.ModelViewSet):
 		"""Solo savefiles del usuario autenticado"""
 		return SaveFileUsuario.objects.filter(
 			usuario=self.request.user
-		).order_by('-ultima_actualizacion')
+		).select_related('usuario').order_by('-ultima_actualizacion')
+
+	def create(self, request, *args, **kwargs):
+		response = super().create(request, *args, **kwargs)
+		response.data['ingesta'] = self.resultado_ingesta
+		return response
 
 	def perform_create(self, serializer):
 		serializer.save(usuario=self.request.user)
 
+		# Poblar sesiones, decisiones y métricas desde el savefile en claro
+		self.resultado_ingesta = ingerir_savefile(
+			self.request.user,
+			getattr(serializer, 'datos_parseados', serializer.validated_data.get('datos_savefile'))
+		)
+
 	@action(detail=False, methods=['get'])
+	@cachear_por_usuario
 	def ultimo(self, request):
 		"""Obtiene el último savefile del usuario"""
 		savefile = self.get_queryset().first()
@@ -314,9 +637,90 @@ class SaveFileUsuarioViewSet(viewsets.ModelViewSet):
 # ANÁLISIS IA - VIEWSET ACTUALIZADO
 # ============================================
 
-class AnalisisIAViewSet(viewsets.ModelViewSet):
+VENTANAS_ESTADISTICAS = (7, 30, 90)
+
+
+def _conteos_por_riesgo(prefijo=''):
+	"""Agregados condicionales: un COUNT filtrado por nivel de riesgo"""
+	return {
+		f'{prefijo}{nivel}': Count('id', filter=Q(nivel_riesgo=nivel))
+		for nivel, _ in AnalisisIA.NIVEL_RIESGO_CHOICES
+	}
+
+
+def calcular_estadisticas_analisis(por_dia=None):
+	"""
+	Calcula las estadísticas de AnalisisIA en una sola pasada
+
+	Totales, niveles de riesgo, intervención y ventanas de 7/30/90 días
+	salen de una única consulta con agregación condicional. Si se pide
+	`por_dia`, una segunda consulta agrupa los últimos N días por fecha.
+	"""
+	ahora = timezone.now()
+
+	agregados = {
+		'total': Count('id'),
+		'requieren_intervencion': Count('id', filter=Q(requiere_intervencion=True)),
+		**_conteos_por_riesgo('riesgo_'),
+	}
+	for dias in VENTANAS_ESTADISTICAS:
+		desde = ahora - timedelta(days=dias)
+		agregados[f'ultimos_{dias}_dias'] = Count(
+			'id', filter=Q(timestamp_analisis__gte=desde)
+		)
+		agregados[f'ultimos_{dias}_dias_intervencion'] = Count(
+			'id', filter=Q(timestamp_analisis__gte=desde, requiere_intervencion=True)
+		)
+
+	fila = AnalisisIA.objects.aggregate(**agregados)
+
+	datos = {
+		'total_analisis': fila['total'],
+		'por_riesgo': {
+			nivel: fila[f'riesgo_{nivel}']
+			for nivel, _ in AnalisisIA.NIVEL_RIESGO_CHOICES
+		},
+		'requieren_intervencion': fila['requieren_intervencion'],
+		'ventanas': {
+			f'ultimos_{dias}_dias': {
+				'total': fila[f'ultimos_{dias}_dias'],
+				'requieren_intervencion': fila[f'ultimos_{dias}_dias_intervencion'],
+			}
+			for dias in VENTANAS_ESTADISTICAS
+		},
+		'generado_en': ahora.isoformat(),
+	}
+
+	if por_dia:
+		filas_dia = AnalisisIA.objects.filter(
+			timestamp_analisis__gte=ahora - timedelta(days=por_dia)
+		).annotate(
+			dia=TruncDate('timestamp_analisis')
+		).values('dia').annotate(
+			total=Count('id'),
+			requieren_intervencion=Count('id', filter=Q(requiere_intervencion=True)),
+			**_conteos_por_riesgo('riesgo_'),
+		).order_by('dia')
+
+		datos['por_dia'] = [
+			{
+				'dia': fila_dia['dia'].isoformat(),
+				'total': fila_dia['total'],
+				'por_riesgo': {
+					nivel: fila_dia[f'riesgo_{nivel}']
+					for nivel, _ in AnalisisIA.NIVEL_RIESGO_CHOICES
+				},
+				'requieren_intervencion': fila_dia['requieren_intervencion'],
+			}
+			for fila_dia in filas_dia
+		]
+
+	return datos
+
+
+class AnalisisIAViewSet(LecturaReplicaMixin, ObtenerPorIdsMixin, viewsets.ModelViewSet):
 	"""ViewSet para análisis IA generados por Groq"""
-	authentication_classes = [JWTAuthentication]
+	authentication_classes = [CachedJWTAuthentication]
 	permission_classes = [IsAuthenticated]
 	queryset = AnalisisIA.objects.all()
 
@@ -333,16 +737,17 @@ class AnalisisIAViewSet(viewsets.ModelViewSet):
 		Admins ven todos.
 		"""
 		if self.request.user.is_staff or self.request.user.is_superuser:
-			return AnalisisIA.objects.all().order_by('-timestamp_analisis')
-		return AnalisisIA.objects.filter(
-			usuario=self.request.user
-		).order_by('-timestamp_analisis')
+			analisis = AnalisisIA.objects.all()
+		else:
+			analisis = AnalisisIA.objects.filter(usuario=self.request.user)
+		return analisis.select_related('usuario').order_by('-timestamp_analisis')
 
 	def perform_create(self, serializer):
 		"""N8N guarda el análisis"""
 		serializer.save()
 
 	@action(detail=False, methods=['get'])
+	@cachear_por_usuario
 	def mis_analisis(self, request):
 		"""Análisis del usuario autenticado"""
 		analisis = AnalisisIA.objects.filter(
@@ -411,62 +816,93 @@ class AnalisisIAViewSet(viewsets.ModelViewSet):
 		serializer = self.get_serializer(analisis, many=True)
 		return Response(serializer.data)
 
-	@action(detail=False, methods=['get'])
+	def _filtrar_niveles(self, analisis, niveles):
+		"""Filtra por uno o más niveles de riesgo separados por coma"""
+		niveles = [nivel.strip() for nivel in niveles.split(',') if nivel.strip()]
+		validos = dict(AnalisisIA.NIVEL_RIESGO_CHOICES)
+		invalidos = [nivel for nivel in niveles if nivel not in validos]
+
+		if invalidos:
+			raise serializers.ValidationError({
+				'nivel': f'Niveles inválidos: {invalidos}. Opciones: {list(validos)}'
+			})
+
+		if len(niveles) == 1:
+			return analisis.filter(nivel_riesgo=niveles[0])
+		return analisis.filter(nivel_riesgo__in=niveles)
+
+	@action(detail=False, methods=['get'], pagination_class=AnalisisIACursorPagination)
 	def por_riesgo(self, request):
-		"""Obtiene análisis filtrados por nivel de riesgo"""
+		"""
+		Obtiene análisis filtrados por nivel de riesgo (paginado por cursor)
+		GET /api/v1/dashboard/analisis-ia/por_riesgo/?nivel=alto,severo
+		"""
 		nivel_riesgo = request.query_params.get('nivel', 'alto')
 		
 		if request.user.is_staff or request.user.is_superuser:
-			analisis = AnalisisIA.objects.filter(nivel_riesgo=nivel_riesgo)
+			analisis = AnalisisIA.objects.all()
 		else:
-			analisis = self.get_queryset().filter(nivel_riesgo=nivel_riesgo)
-		
-		serializer = self.get_serializer(analisis, many=True)
-		return Response(serializer.data)
+			analisis = AnalisisIA.objects.filter(usuario=request.user)
 
-	@action(detail=False, methods=['get'])
+		analisis = self._filtrar_niveles(analisis, nivel_riesgo).select_related('usuario')
+
+		page = self.paginate_queryset(analisis)
+		serializer = self.get_serializer(page, many=True)
+		return self.get_paginated_response(serializer.data)
+
+	@action(detail=False, methods=['get'], pagination_class=AnalisisIACursorPagination)
 	def requieren_intervencion(self, request):
-		"""Obtiene análisis que requieren intervención"""
+		"""
+		Cola de triage: análisis que requieren intervención (solo admins)
+		GET /api/v1/dashboard/analisis-ia/requieren_intervencion/?nivel=severo&cursor=...
+		"""
 		if not (request.user.is_staff or request.user.is_superuser):
 			return Response(
 				{'error': 'Solo admins pueden ver esto'},
 				status=status.HTTP_403_FORBIDDEN
 			)
 		
-		analisis = AnalisisIA.objects.filter(
-			requiere_intervencion=True
-		).order_by('-timestamp_analisis')
-		
-		serializer = self.get_serializer(analisis, many=True)
-		return Response(serializer.data)
+		# Servido por los índices parciales sobre requiere_intervencion = true
+		analisis = AnalisisIA.objects.filter(requiere_intervencion=True)
+
+		nivel_riesgo = request.query_params.get('nivel')
+		if nivel_riesgo:
+			analisis = self._filtrar_niveles(analisis, nivel_riesgo)
+
+		page = self.paginate_queryset(analisis.select_related('usuario'))
+		serializer = self.get_serializer(page, many=True)
+		return self.get_paginated_response(serializer.data)
 
 	@action(detail=False, methods=['get'])
 	def estadisticas(self, request):
-		"""Estadísticas de análisis (solo para admins)"""
+		"""
+		Estadísticas de análisis (solo para admins)
+		GET /api/v1/dashboard/analisis-ia/estadisticas/?por_dia=30
+		"""
 		if not (request.user.is_staff or request.user.is_superuser):
 			return Response(
 				{'error': 'Solo admins pueden ver esto'},
 				status=status.HTTP_403_FORBIDDEN
 			)
-		
-		total = AnalisisIA.objects.count()
-		por_riesgo = {
-			'bajo': AnalisisIA.objects.filter(nivel_riesgo='bajo').count(),
-			'leve': AnalisisIA.objects.filter(nivel_riesgo='leve').count(),
-			'moderado': AnalisisIA.objects.filter(nivel_riesgo='moderado').count(),
-			'alto': AnalisisIA.objects.filter(nivel_riesgo='alto').count(),
-			'severo': AnalisisIA.objects.filter(nivel_riesgo='severo').count(),
-		}
-		requieren_intervencion = AnalisisIA.objects.filter(
-			requiere_intervencion=True
-		).count()
-		
-		return Response({
-			'total_analisis': total,
-			'por_riesgo': por_riesgo,
-			'requieren_intervencion': requieren_intervencion,
-		})
-	
+
+		por_dia = request.query_params.get('por_dia')
+		if por_dia is not None:
+			if por_dia not in [str(dias) for dias in VENTANAS_ESTADISTICAS]:
+				return Response(
+					{'error': f'Parámetro por_dia debe ser uno de {list(VENTANAS_ESTADISTICAS)}'},
+					status=status.HTTP_400_BAD_REQUEST
+				)
+			por_dia = int(por_dia)
+
+		datos = cache_swr(
+			f'analisis_ia:estadisticas:{por_dia or "total"}',
+			lambda: calcular_estadisticas_analisis(por_dia),
+			fresco_segundos=getattr(settings, 'ESTADISTICAS_CACHE_FRESCO', 60),
+			stale_segundos=getattr(settings, 'ESTADISTICAS_CACHE_STALE', 600),
+		)
+		return Response(datos)
+
+
 # ============================================
 # AUTENTICACIÓN Y USUARIO
 # ============================================
@@ -502,7 +938,7 @@ class RegisterViewSet(viewsets.ViewSet):
 
 class UserProfileViewSet(viewsets.ViewSet):
 	"""ViewSet para gestión de perfil de usuario autenticado"""
-	authentication_classes = [JWTAuthentication]
+	authentication_classes = [CachedJWTAuthentication]
 	permission_classes = [IsAuthenticated]
 
 	@action(detail=False, methods=['get'])
@@ -524,7 +960,7 @@ class UserProfileViewSet(viewsets.ViewSet):
 
 		if 'email' in request.data:
 			email = request.data['email'].strip()
-			if User.objects.filter(email=email).exclude(id=user.id).exists():
+			if User.objects.filter(email__iexact=email).exclude(email='').exclude(id=user.id).exists():
 				return Response(
 					{'error': 'Este email ya está registrado'},
 					status=status.HTTP_400_BAD_REQUEST
@@ -542,19 +978,151 @@ class UserProfileViewSet(viewsets.ViewSet):
 		serializer = ChangePasswordSerializer(data=request.data)
 
 		if serializer.is_valid():
-			# Validar contraseña actual
-			if not user.check_password(serializer.validated_data['old_password']):
+			# Validar contraseña actual (hash en el pool acotado)
+			if not verificar_password(user, serializer.validated_data['old_password']):
 				return Response(
 					{'error': 'La contraseña actual es incorrecta'},
 					status=status.HTTP_400_BAD_REQUEST
 				)
 
 			# Establecer nueva contraseña
-			user.set_password(serializer.validated_data['new_password'])
+			user.password = hashear_password(serializer.validated_data['new_password'])
 			user.save()
 
 			return Response({
 				'message': 'Contraseña cambiada exitosamente'
 			}, status=status.HTTP_200_OK)
 
-		return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+		return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+# ============================================
+# PETICIONES MULTIPLEXADAS (ARRANQUE DEL CLIENTE)
+# ============================================
+
+MAX_SUBPETICIONES = 20
+PREFIJO_SUBPETICIONES = '/api/v1/dashboard/'
+
+
+class BatchView(APIView):
+	"""
+	Ejecuta varias peticiones GET en un solo viaje de red
+	POST /api/v1/dashboard/batch/
+	{"peticiones": [{"id": "perfil", "path": "/api/v1/dashboard/auth/profile/me/"}, ...]}
+
+	El JWT se valida una sola vez; cada sub-petición se despacha en
+	proceso contra el router existente con el usuario ya autenticado.
+	"""
+	authentication_classes = [CachedJWTAuthentication]
+	permission_classes = [IsAuthenticated]
+
+	def post(self, request):
+		peticiones = request.data.get('peticiones') if isinstance(request.data, dict) else None
+
+		if not isinstance(peticiones, list) or not peticiones:
+			return Response(
+				{'error': 'Parámetro peticiones requerido (lista de sub-peticiones)'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+
+		if len(peticiones) > MAX_SUBPETICIONES:
+			return Response(
+				{'error': f'Máximo {MAX_SUBPETICIONES} sub-peticiones por lote'},
+				status=status.HTTP_400_BAD_REQUEST
+			)
+
+		respuestas = [
+			self._despachar(request, indice, peticion)
+			for indice, peticion in enumerate(peticiones)
+		]
+		return Response({'respuestas': respuestas})
+
+	def _despachar(self, request, indice, peticion):
+		"""Ejecuta una sub-petición GET y devuelve id, status y body"""
+		if not isinstance(peticion, dict):
+			return {'id': indice, 'status': 400, 'body': {'error': 'Sub-petición inválida'}}
+
+		peticion_id = peticion.get('id', indice)
+		metodo = str(peticion.get('method', 'GET')).upper()
+		partes = urlsplit(str(peticion.get('path', '')))
+
+		if metodo != 'GET':
+			return {'id': peticion_id, 'status': 405, 'body': {'error': 'Solo se permiten sub-peticiones GET'}}
+
+		if not partes.path.startswith(PREFIJO_SUBPETICIONES) or partes.path == request.path:
+			return {'id': peticion_id, 'status': 400, 'body': {'error': f'La ruta debe comenzar con {PREFIJO_SUBPETICIONES}'}}
+
+		try:
+			match = resolve(partes.path)
+		except Resolver404:
+			return {'id': peticion_id, 'status': 404, 'body': {'error': 'Ruta no encontrada'}}
+
+		params = peticion.get('params') or {}
+		if not isinstance(params, dict):
+			return {'id': peticion_id, 'status': 400, 'body': {'error': 'params debe ser un objeto'}}
+
+		query = QueryDict(partes.query, mutable=True)
+		for clave, valor in params.items():
+			query[clave] = valor
+
+		sub = HttpRequest()
+		sub.method = 'GET'
+		sub.path = sub.path_info = partes.path
+		sub.META = {
+			**request._request.META,
+			'REQUEST_METHOD': 'GET',
+			'PATH_INFO': partes.path,
+			'QUERY_STRING': query.urlencode(),
+		}
+		sub.GET = QueryDict(query.urlencode())
+		sub.COOKIES = request._request.COOKIES
+		sub.resolver_match = match
+		# DRF omite la autenticación si la petición trae un usuario forzado
+		sub._force_auth_user = request.user
+
+		try:
+			respuesta = match.func(sub, *match.args, **match.kwargs)
+		except Exception:
+			logger.exception('Error en sub-petición %s', partes.path)
+			return {'id': peticion_id, 'status': 500, 'body': {'error': 'Error interno'}}
+
+		if hasattr(respuesta, 'data'):
+			body = respuesta.data
+		else:
+			contenido = b''.join(respuesta) if respuesta.streaming else respuesta.content
+			try:
+				body = json.loads(contenido or b'null')
+			except ValueError:
+				body = contenido.decode('utf-8', errors='replace')
+
+		return {'id': peticion_id, 'status': respuesta.status_code, 'body': body}
+
+
+# ============================================
+# ESTADÍSTICAS DE CACHÉ
+# ============================================
+
+class EstadisticasCacheView(APIView):
+	"""
+	Aciertos por nivel de la caché en el proceso que atiende la petición
+	GET /api/v1/dashboard/cache/estadisticas/
+	"""
+	authentication_classes = [CachedJWTAuthentication]
+	permission_classes = [IsAdminUser]
+
+	def get(self, request):
+		if not hasattr(cache, 'estadisticas'):
+			return Response({'error': 'El backend de caché no expone estadísticas'}, status=status.HTTP_404_NOT_FOUND)
+		return Response({'pid': os.getpid(), **cache.estadisticas()})
+
+
+class EstadisticasPoolView(APIView):
+	"""
+	Pools de conexiones del proceso que atiende la petición: espera al
+	pedir conexión, saturación y recambio
+	GET /api/v1/dashboard/db/estadisticas/
+	"""
+	authentication_classes = [CachedJWTAuthentication]
+	permission_classes = [IsAdminUser]
+
+	def get(self, request):
+		return Response({'pid': os.getpid(), 'pools': estadisticas_pools()})
@@ -9,8 +9,9 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+# API con token Bearer -> MIDDLEWARE_API; el resto -> MIDDLEWARE
+from config.enrutamiento import aplicacion_asgi  # noqa: E402
+
+application = aplicacion_asgi()
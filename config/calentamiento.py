@@ -0,0 +1,137 @@
+"""
+Calentamiento del proceso antes de atender tráfico
+
+Con `preload_app` (ver gunicorn.conf.py) el master importa Django una sola
+vez y `calentar_aplicacion()` deja construido lo que de otro modo cada
+worker armaría en sus primeras peticiones: patrones de URL compilados,
+campos de los serializers, el cifrador Fernet de ENCRYPTION_KEY, el
+backend de firma JWT y los hashers de contraseña. Tras el fork los workers
+lo comparten copy-on-write.
+
+Las conexiones a la base no pueden cruzar un fork: `abrir_conexiones()` se
+llama ya en cada worker. `memoria_proceso()` informa el RSS del proceso y
+la parte compartida con el master.
+"""
+
+import inspect
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+
+def _compilar_patrones(patrones):
+	total = 0
+	for patron in patrones:
+		# LocaleRegexDescriptor compila la expresión al primer acceso
+		patron.pattern.regex
+		total += 1
+		if isinstance(patron, URLResolver):
+			total += _compilar_patrones(patron.url_patterns)
+	return total
+
+
+def _instanciar_serializers():
+	from apps.pragma_dashboard import serializers as modulo
+
+	total = 0
+	for _, clase in inspect.getmembers(modulo, inspect.isclass):
+		if (
+			not issubclass(clase, serializers.Serializer)
+			or clase.__module__ != modulo.__name__
+		):
+			continue
+		try:
+			# ModelSerializer arma sus campos desde el modelo al primer acceso
+			clase().fields
+			total += 1
+		except Exception as e:
+			logger.warning('No se pudo precargar %s: %s', clase.__name__, e)
+	return total
+
+
+def _precargar_jwt():
+	from rest_framework_simplejwt.state import token_backend
+
+	# Instancia los algoritmos de PyJWT y la clave de firma
+	token_backend.decode(token_backend.encode({'calentamiento': True}), verify=False)
+
+
+def calentar_aplicacion():
+	"""
+	Construye por adelantado lo que es igual en todos los workers
+
+	Returns:
+		Diccionario con lo precargado y la duración en ms
+	"""
+	from apps.pragma_dashboard.utils.encryption import obtener_cifrador
+
+	inicio = time.perf_counter()
+	resolver = get_resolver()
+	# reverse_dict puebla el resolver raíz
+	resolver.reverse_dict
+	patrones = _compilar_patrones(resolver.url_patterns)
+	serializers_precargados = _instanciar_serializers()
+	obtener_cifrador(getattr(settings, 'ENCRYPTION_KEY', b'a' * 32))
+	_precargar_jwt()
+	get_hashers()
+
+	return {
+		'patrones_url': patrones,
+		'serializers': serializers_precargados,
+		'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2),
+	}
+
+
+def abrir_conexiones():
+	"""
+	Abre una conexión por alias en el worker recién creado
+
+	Con el backend con pool la conexión vuelve al pool (queda abierta y
+	disponible para cualquier hilo); sin pool queda en el hilo actual. Una
+	base caída no impide arrancar: la primera petición reintenta.
+
+	Returns:
+		Lista de alias conectados
+	"""
+	abiertas = []
+	for conexion in connections.all():
+		try:
+			conexion.ensure_connection()
+		except Exception as e:
+			logger.warning('No se pudo abrir la conexión %s: %s', conexion.alias, e)
+			continue
+		if getattr(conexion, 'usa_pool', False):
+			conexion.close()
+		abiertas.append(conexion.alias)
+	return abiertas
+
+
+def memoria_proceso():
+	"""
+	RSS del proceso en MB y, en Linux, la parte compartida con otros
+	procesos y el PSS (RSS con las páginas compartidas prorrateadas)
+	"""
+	memoria = {}
+	try:
+		with open('/proc/self/smaps_rollup') as archivo:
+			for linea in archivo:
+				campo, _, valor = linea.partition(':')
+				if campo in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty'):
+					memoria[campo] = int(valor.split()[0])
+	except OSError:
+		import resource
+		# ru_maxrss en KB en Linux: pico, no el valor actual
+		return {'rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+	return {
+		'rss_mb': round(memoria.get('Rss', 0) / 1024, 1),
+		'pss_mb': round(memoria.get('Pss', 0) / 1024, 1),
+		'compartida_mb': round((memoria.get('Shared_Clean', 0) + memoria.get('Shared_Dirty', 0)) / 1024, 1),
+	}
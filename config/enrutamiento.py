@@ -0,0 +1,136 @@
+"""
+Enrutamiento de middleware por tipo de petición
+
+Las llamadas a la API con token Bearer no usan sesión, CSRF, mensajes ni
+X-Frame-Options, pero con un solo MIDDLEWARE pagarían esa cadena en cada
+request. Aquí se arman dos handlers: uno con MIDDLEWARE_API para las
+rutas bajo PREFIJO_API que traen `Authorization: Bearer`, y otro con
+MIDDLEWARE completo para todo lo demás (admin, login, navegador).
+
+BaseHandler.load_middleware solo sabe leer settings.MIDDLEWARE, así que la
+cadena mínima se arma con una copia de ese método que recibe la lista; los
+settings del proceso no se tocan.
+"""
+
+import logging
+
+import django
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.core.handlers.wsgi import WSGIHandler
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('django.request')
+
+
+class MiddlewareApiMixin:
+	"""Carga la cadena MIDDLEWARE_API en vez de MIDDLEWARE"""
+
+	def lista_middleware(self):
+		return settings.MIDDLEWARE_API
+
+	def load_middleware(self, is_async=False):
+		# Igual que BaseHandler.load_middleware (Django 4.2) salvo por la lista
+		self._view_middleware = []
+		self._template_response_middleware = []
+		self._exception_middleware = []
+
+		get_response = self._get_response_async if is_async else self._get_response
+		handler = convert_exception_to_response(get_response)
+		handler_is_async = is_async
+		for middleware_path in reversed(self.lista_middleware()):
+			middleware = import_string(middleware_path)
+			middleware_can_sync = getattr(middleware, 'sync_capable', True)
+			middleware_can_async = getattr(middleware, 'async_capable', False)
+			if not middleware_can_sync and not middleware_can_async:
+				raise RuntimeError(
+					'Middleware %s must have at least one of '
+					'sync_capable/async_capable set to True.' % middleware_path
+				)
+			elif not handler_is_async and middleware_can_sync:
+				middleware_is_async = False
+			else:
+				middleware_is_async = middleware_can_async
+			try:
+				adapted_handler = self.adapt_method_mode(
+					middleware_is_async,
+					handler,
+					handler_is_async,
+					debug=settings.DEBUG,
+					name='middleware %s' % middleware_path,
+				)
+				mw_instance = middleware(adapted_handler)
+			except MiddlewareNotUsed as exc:
+				if settings.DEBUG:
+					if str(exc):
+						logger.debug('MiddlewareNotUsed(%r): %s', middleware_path, exc)
+					else:
+						logger.debug('MiddlewareNotUsed: %r', middleware_path)
+				continue
+			else:
+				handler = adapted_handler
+
+			if mw_instance is None:
+				raise ImproperlyConfigured('Middleware factory %s returned None.' % middleware_path)
+
+			if hasattr(mw_instance, 'process_view'):
+				self._view_middleware.insert(0, self.adapt_method_mode(is_async, mw_instance.process_view))
+			if hasattr(mw_instance, 'process_template_response'):
+				self._template_response_middleware.append(
+					self.adapt_method_mode(is_async, mw_instance.process_template_response)
+				)
+			if hasattr(mw_instance, 'process_exception'):
+				# Las excepciones siempre se procesan en modo síncrono
+				self._exception_middleware.append(self.adapt_method_mode(False, mw_instance.process_exception))
+
+			handler = convert_exception_to_response(mw_instance)
+			handler_is_async = middleware_is_async
+
+		handler = self.adapt_method_mode(is_async, handler, handler_is_async)
+		# Se asigna al final: Django lo usa como marca de carga completa
+		self._middleware_chain = handler
+
+
+class WSGIHandlerApi(MiddlewareApiMixin, WSGIHandler):
+	pass
+
+
+class ASGIHandlerApi(MiddlewareApiMixin, ASGIHandler):
+	pass
+
+
+def es_api_jwt(path, authorization):
+	"""True si la petición va a la API con token Bearer"""
+	return path.startswith(settings.PREFIJO_API) and authorization[:7].lower() == 'bearer '
+
+
+def aplicacion_wsgi():
+	"""Equivalente a get_wsgi_application() con las dos cadenas"""
+	django.setup(set_prefix=False)
+	completo = WSGIHandler()
+	api = WSGIHandlerApi()
+
+	def application(environ, start_response):
+		if es_api_jwt(environ.get('PATH_INFO', ''), environ.get('HTTP_AUTHORIZATION', '')):
+			return api(environ, start_response)
+		return completo(environ, start_response)
+
+	return application
+
+
+def aplicacion_asgi():
+	"""Equivalente a get_asgi_application() con las dos cadenas"""
+	django.setup(set_prefix=False)
+	completo = ASGIHandler()
+	api = ASGIHandlerApi()
+
+	async def application(scope, receive, send):
+		if scope['type'] == 'http':
+			authorization = dict(scope.get('headers', [])).get(b'authorization', b'').decode('latin-1')
+			if es_api_jwt(scope.get('path', ''), authorization):
+				return await api(scope, receive, send)
+		return await completo(scope, receive, send)
+
+	return application
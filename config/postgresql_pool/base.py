@@ -0,0 +1,124 @@
+"""
+Backend PostgreSQL con pool de conexiones (psycopg_pool)
+
+Con CONN_MAX_AGE cada hilo de cada worker mantiene su propia conexión
+abierta: al subir los hilos de gunicorn se agotan los slots de Postgres y
+las conexiones ociosas no se comparten. Aquí cada proceso tiene un
+ConnectionPool por alias (creado al primer uso, también tras un fork):
+Django toma una conexión al conectar y la devuelve al cerrar, que con
+CONN_MAX_AGE=0 ocurre al final de cada request.
+
+OPTIONS['pool'] se pasa a ConnectionPool (min_size, max_size, timeout,
+max_idle, max_lifetime, max_waiting...). Las conexiones se verifican al
+sacarlas del pool (ConnectionPool.check_connection).
+
+Métricas por proceso en `estadisticas_pools()`: espera al pedir conexión,
+saturación y recambio de conexiones.
+"""
+
+import os
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation as CreacionBase
+from django.utils.asyncio import async_unsafe
+from psycopg import IsolationLevel
+from psycopg_pool import ConnectionPool
+
+from .metricas import cerrar_pools, pools, pools_lock, registrar_espera
+
+
+def _firma(settings_dict):
+	"""Identifica la base: el runner de pruebas cambia NAME sobre el mismo alias"""
+	return tuple(settings_dict.get(campo) for campo in ('NAME', 'USER', 'HOST', 'PORT'))
+
+
+class DatabaseCreation(CreacionBase):
+
+	def _destroy_test_db(self, test_database_name, verbosity):
+		# DROP DATABASE falla mientras el pool tenga conexiones abiertas
+		cerrar_pools(self.connection.alias)
+		super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+	creation_class = DatabaseCreation
+
+	def __init__(self, settings_dict, *args, **kwargs):
+		if settings_dict.get('CONN_MAX_AGE'):
+			raise ImproperlyConfigured(
+				'El backend con pool requiere CONN_MAX_AGE = 0: la conexión vuelve al pool al cerrar'
+			)
+		super().__init__(settings_dict, *args, **kwargs)
+
+	def get_connection_params(self):
+		conn_params = super().get_connection_params()
+		conn_params.pop('pool', None)
+		return conn_params
+
+	@property
+	def pool(self):
+		clave = (self.alias, os.getpid(), _firma(self.settings_dict))
+		pool = pools.get(clave)
+		if pool is not None:
+			return pool
+
+		with pools_lock:
+			pool = pools.get(clave)
+			if pool is None:
+				opciones = {'min_size': 1, 'max_size': 4, 'timeout': 10, **(self.settings_dict['OPTIONS'].get('pool') or {})}
+				pool = ConnectionPool(
+					kwargs=self.get_connection_params(),
+					check=ConnectionPool.check_connection,
+					name=f'{self.alias}-{os.getpid()}',
+					open=False,
+					**opciones,
+				)
+				pool.open()
+				pools[clave] = pool
+		return pool
+
+	@property
+	def usa_pool(self):
+		# La conexión sin base (crear y borrar bases de prueba) es de un uso
+		return self.alias != NO_DB_ALIAS
+
+	@async_unsafe
+	def get_new_connection(self, conn_params):
+		if not self.usa_pool:
+			return super().get_new_connection(conn_params)
+
+		# Mismo nivel de aislamiento que el backend original
+		isolation_level_value = self.settings_dict['OPTIONS'].get('isolation_level')
+		if isolation_level_value is None:
+			self.isolation_level = IsolationLevel.READ_COMMITTED
+		else:
+			try:
+				self.isolation_level = IsolationLevel(isolation_level_value)
+			except ValueError:
+				raise ImproperlyConfigured(
+					f'Invalid transaction isolation level {isolation_level_value} '
+					f'specified. Use one of the psycopg.IsolationLevel values.'
+				)
+
+		pool = self.pool
+		inicio = time.perf_counter()
+		connection = pool.getconn()
+		registrar_espera(self.alias, (time.perf_counter() - inicio) * 1000)
+
+		if isolation_level_value is not None:
+			connection.isolation_level = self.isolation_level
+		return connection
+
+	def _close(self):
+		if not self.usa_pool:
+			return super()._close()
+
+		if self.connection is not None:
+			with self.wrap_database_errors:
+				# Devolver al pool que la entregó; el pool hace rollback si quedó
+				# una transacción abierta y descarta la conexión si está rota
+				self.connection._pool.putconn(self.connection)
+				self.connection = None
@@ -0,0 +1,63 @@
+"""
+Registro de pools del proceso y sus métricas
+
+Separado de base.py para poder leer las métricas sin importar
+psycopg_pool (p. ej. con otro motor de base de datos).
+"""
+
+import atexit
+import os
+import threading
+
+# (alias, pid, firma de la base) -> ConnectionPool
+pools = {}
+pools_lock = threading.Lock()
+
+# (alias, pid) -> espera máxima observada al pedir conexión, en ms
+_espera_max = {}
+
+
+def registrar_espera(alias, espera_ms):
+	clave = (alias, os.getpid())
+	if espera_ms > _espera_max.get(clave, 0.0):
+		_espera_max[clave] = espera_ms
+
+
+def _pools_del_proceso(alias=None):
+	pid = os.getpid()
+	return [
+		(clave, pool) for clave, pool in list(pools.items())
+		if clave[1] == pid and (alias is None or clave[0] == alias)
+	]
+
+
+def cerrar_pools(alias=None):
+	"""Cierra los pools de este proceso (todos o los de un alias)"""
+	with pools_lock:
+		for clave, pool in _pools_del_proceso(alias):
+			pool.close(timeout=5)
+			del pools[clave]
+
+
+atexit.register(cerrar_pools)
+
+
+def estadisticas_pools():
+	"""Estado y contadores de los pools de este proceso, por alias"""
+	resultado = {}
+
+	for (alias, pid, _), pool in _pools_del_proceso():
+		stats = pool.get_stats()
+		en_uso = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+		esperas = stats.get('requests_queued', 0)
+		resultado[alias] = {
+			**stats,
+			'en_uso': en_uso,
+			# Fracción de max_size ocupada: cerca de 1 las peticiones esperan
+			'saturacion': round(en_uso / stats['pool_max'], 4) if stats.get('pool_max') else 0.0,
+			'espera_promedio_ms': round(stats.get('requests_wait_ms', 0) / esperas, 2) if esperas else 0.0,
+			'espera_max_ms': round(_espera_max.get((alias, pid), 0.0), 2),
+			# Conexiones abiertas más las perdidas o descartadas por rotas
+			'recambio': stats.get('connections_num', 0) + stats.get('connections_lost', 0) + stats.get('returns_bad', 0),
+		}
+	return resultado
@@ -120,6 +120,16 @@ MIDDLEWARE = [
 	'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Cadena mínima para peticiones a la API con token Bearer (ver
+# config/enrutamiento.py): sin sesión, CSRF, mensajes ni X-Frame-Options,
+# que no aplican a clientes JWT. /admin/ y el resto usan MIDDLEWARE.
+MIDDLEWARE_API = [
+	'django.middleware.security.SecurityMiddleware',
+	'corsheaders.middleware.CorsMiddleware',
+	'django.middleware.common.CommonMiddleware',
+]
+PREFIJO_API = '/api/v1/'
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -169,6 +179,40 @@ else:
 		}
 	}
 
+# Pool de conexiones por proceso (config/postgresql_pool) en vez de una
+# conexión persistente por hilo: workers x DB_POOL_MAX debe caber en
+# max_connections de Postgres. DB_POOL=False vuelve a CONN_MAX_AGE.
+DB_POOL = os.environ.get('DB_POOL', 'True') == 'True'
+
+# Réplicas de lectura: DATABASE_REPLICA_URLS="postgres://...,postgres://..."
+# Las lecturas seguras de los ViewSets van a una réplica al azar (ver
+# apps/pragma_dashboard/replicas.py). En pruebas espejan a default.
+DATABASE_REPLICAS = []
+for _numero, _url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+	DATABASES[f'replica_{_numero}'] = {
+		**dj_database_url.parse(_url.strip(), conn_max_age=600, conn_health_checks=True),
+		'TEST': {'MIRROR': 'default'},
+	}
+	DATABASE_REPLICAS.append(f'replica_{_numero}')
+
+DATABASE_ROUTERS = ['apps.pragma_dashboard.replicas.RouterReplicas']
+
+if DB_POOL:
+	for _base_datos in DATABASES.values():
+		if _base_datos['ENGINE'] == 'django.db.backends.postgresql':
+			_base_datos.update(ENGINE='config.postgresql_pool', CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+			_base_datos.setdefault('OPTIONS', {})['pool'] = {
+				'min_size': int(os.environ.get('DB_POOL_MIN', 1)),
+				'max_size': int(os.environ.get('DB_POOL_MAX', 4)),
+				# Segundos esperando una conexión libre antes de fallar
+				'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+				'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+			}
+
+# Segundos que un usuario lee de la primaria tras cambiar sus datos (debe
+# superar el atraso de las réplicas)
+REPLICA_FIJACION_SEGUNDOS = int(os.environ.get('REPLICA_FIJACION_SEGUNDOS', 10))
+
 # ============================================
 # PASSWORD VALIDATION
 # ============================================
@@ -234,7 +278,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
 	'DEFAULT_AUTHENTICATION_CLASSES': [
-		'rest_framework_simplejwt.authentication.JWTAuthentication',
+		'apps.pragma_dashboard.authentication.CachedJWTAuthentication',
 		'rest_framework.authentication.SessionAuthentication',
 	],
 	
@@ -261,9 +305,10 @@ REST_FRAMEWORK = {
 		'rest_framework.parsers.MultiPartParser',
 	],
 	
+	# Cubeta de tokens en la BD: límites comunes a todos los workers
 	'DEFAULT_THROTTLE_CLASSES': [
-		'rest_framework.throttling.AnonRateThrottle',
-		'rest_framework.throttling.UserRateThrottle',
+		'apps.pragma_dashboard.throttling.AnonCubetaThrottle',
+		'apps.pragma_dashboard.throttling.UserCubetaThrottle',
 	],
 	'DEFAULT_THROTTLE_RATES': {
 		'anon': '100/hour',
@@ -314,6 +359,10 @@ SIMPLE_JWT = {
 	'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
 	'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
 	'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
+
+	# Revocación propia (TokenRevocado + filtro Bloom) en vez de token_blacklist
+	'TOKEN_REFRESH_SERIALIZER': 'apps.pragma_dashboard.serializers.TokenRefreshRevocableSerializer',
+	'TOKEN_VERIFY_SERIALIZER': 'apps.pragma_dashboard.serializers.TokenVerifyRevocableSerializer',
 }
 
 # ============================================
@@ -371,6 +420,8 @@ LOGGING = {
 			'level': 'ERROR',
 			'class': 'logging.handlers.RotatingFileHandler',
 			'filename': BASE_DIR / 'logs' / 'django_errors.log',
+			# El archivo se abre con el primer error, no al arrancar
+			'delay': True,
 			'maxBytes': 1024 * 1024 * 10,
 			'backupCount': 5,
 			'formatter': 'verbose',
@@ -409,6 +460,49 @@ FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
 
 N8N_WEBHOOK_URL = os.environ.get('N8N_WEBHOOK_URL', '')
 
+# Estadísticas de análisis IA: segundos frescas / segundos servidas vencidas
+ESTADISTICAS_CACHE_FRESCO = int(os.environ.get('ESTADISTICAS_CACHE_FRESCO', 60))
+ESTADISTICAS_CACHE_STALE = int(os.environ.get('ESTADISTICAS_CACHE_STALE', 600))
+
+# Resumen del dashboard personal: se invalida al cambiar sesiones o métricas
+DASHBOARD_RESUMEN_CACHE_TTL = int(os.environ.get('DASHBOARD_RESUMEN_CACHE_TTL', 300))
+
+# Usuario resuelto por CachedJWTAuthentication: se invalida al guardar el User
+AUTH_USUARIO_CACHE_TTL = int(os.environ.get('AUTH_USUARIO_CACHE_TTL', 60))
+
+# Access tokens ya verificados por proceso (LRU); 0 lo desactiva
+JWT_VERIFICADOS_CACHE_TAMANO = int(os.environ.get('JWT_VERIFICADOS_CACHE_TAMANO', 2048))
+
+# Revocación de refresh tokens: cada cuántos segundos se reconstruye el
+# filtro Bloom de JTI revocados (y se purgan los expirados)
+REVOCACION_BLOOM_INTERVALO = int(os.environ.get('REVOCACION_BLOOM_INTERVALO', 300))
+REVOCACION_BLOOM_FALSOS_POSITIVOS = float(os.environ.get('REVOCACION_BLOOM_FALSOS_POSITIVOS', 0.01))
+
+# last_login se acumula y se escribe en bloque: máximo atraso en segundos
+# (0 = escribir en el mismo request)
+ULTIMO_LOGIN_FLUSH_SEGUNDOS = int(os.environ.get('ULTIMO_LOGIN_FLUSH_SEGUNDOS', 5))
+
+# Hash de contraseñas (login, registro, cambio) en un pool por proceso:
+# hilos calculando, peticiones en espera antes de responder 429, y
+# segundos sugeridos en Retry-After. Una vista síncrona ocupa su hilo de
+# gunicorn mientras espera el hash: hilos + cola admitidos suman a lo más
+# GUNICORN_THREADS - 1, así un pico de logins siempre deja un hilo libre
+# para el resto de la API
+_HILOS_GUNICORN = int(os.environ.get('GUNICORN_THREADS', 4))
+HASH_PASSWORD_HILOS = int(os.environ.get('HASH_PASSWORD_HILOS', max(1, min(2, _HILOS_GUNICORN - 1))))
+HASH_PASSWORD_COLA = int(os.environ.get(
+	'HASH_PASSWORD_COLA', max(0, _HILOS_GUNICORN - 1 - HASH_PASSWORD_HILOS)
+))
+HASH_PASSWORD_REINTENTO = int(os.environ.get('HASH_PASSWORD_REINTENTO', 2))
+
+# Respuestas de lectura por usuario (mi_historial, mis_analisis, ...):
+# se invalidan por generación al escribir; esto solo acota su vida
+RESPUESTAS_CACHE_TTL = int(os.environ.get('RESPUESTAS_CACHE_TTL', 300))
+
+# Presupuesto de arranque en frío (python manage.py benchmark_arranque):
+# desde lanzar el proceso hasta servir la primera respuesta
+PRESUPUESTO_ARRANQUE_MS = int(os.environ.get('PRESUPUESTO_ARRANQUE_MS', 3000))
+
 # ============================================
 # PRODUCTION SECURITY SETTINGS
 # ============================================
@@ -438,15 +532,34 @@ if not DEBUG:
 # CACHE CONFIGURATION
 # ============================================
 
+# Dos niveles: LRU en memoria por proceso delante de una tabla de caché
+# en la BD compartida por todos los workers y nodos. La tabla la crea la
+# migración 0009 (createcachetable).
 CACHES = {
 	'default': {
-		'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-		'LOCATION': 'pragma-cache',
+		'BACKEND': 'apps.pragma_dashboard.utils.cache_dos_niveles.CacheDosNiveles',
 		'TIMEOUT': 300,
 		'OPTIONS': {
-			'MAX_ENTRIES': 1000
+			'COMPARTIDA': 'compartida',
+			'L1_MAX_ENTRADAS': 1000,
+			# Máximo desfase entre procesos para una clave modificada en otro
+			'L1_TTL': int(os.environ.get('CACHE_L1_TTL', 5)),
+			# Borrado de filas vencidas de pragma_cache, una de cada N escrituras
+			'PURGA_CADA': int(os.environ.get('CACHE_PURGA_CADA', 1000)),
 		}
-	}
+	},
+	'compartida': {
+		'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+		'LOCATION': 'pragma_cache',
+		'TIMEOUT': 300,
+		# Cada set/add cuenta la tabla (SELECT COUNT(*)); con la purga
+		# periódica quedan casi solo entradas vivas. MAX_ENTRIES es el techo
+		# de seguridad: al superarlo se poda 1/CULL_FREQUENCY de la tabla
+		'OPTIONS': {
+			'MAX_ENTRIES': 100000,
+			'CULL_FREQUENCY': 3,
+		}
+	},
 }
 
 # ============================================
@@ -478,30 +591,8 @@ ADMIN_INDEX_TITLE = "Bienvenido al Panel de Administración"
 # CIFRADO AES-256
 # ============================================
 
-ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY', 'a' * 32).encode() if isinstance(os.getenv('ENCRYPTION_KEY', 'a' * 32), str) else os.getenv('ENCRYPTION_KEY', b'a' * 32)
-
-# Si es string, convertir a bytes (32 bytes = 256 bits)
-if isinstance(ENCRYPTION_KEY, str):
-	ENCRYPTION_KEY = ENCRYPTION_KEY.encode().ljust(32)[:32]
-elif len(ENCRYPTION_KEY) != 32:
-	ENCRYPTION_KEY = (b'a' * 32)  # Default si hay problema
-
-print(f"🔐 Clave de cifrado configurada: {len(ENCRYPTION_KEY)} bytes")
-
-
-# ============================================
-# INFORMACIÓN DE CONFIGURACIÓN
-# ============================================
-
-if DEBUG:
-	print("\n" + "="*60)
-	print("🚀 PRAGMA Backend - Configuración Cargada")
-	print("="*60)
-	print(f"DEBUG: {DEBUG}")
-	print(f"DATABASE: {DATABASES['default']['ENGINE']}")
-	print(f"ALLOWED_HOSTS: {ALLOWED_HOSTS}")
-	print(f"CORS_ALLOWED_ORIGINS: {len(CORS_ALLOWED_ORIGINS)} origin(s)")
-	print(f"CORS_ALLOW_ALL_ORIGINS: {CORS_ALLOW_ALL_ORIGINS}")
-	print(f"INSTALLED_APPS: {len(INSTALLED_APPS)} apps")
-	print(f"MIDDLEWARE: {len(MIDDLEWARE)} middleware(s)")
-	print("="*60 + "\n")
\ No newline at end of file
+# Una sola lectura del entorno; una clave que no mide 32 bytes (256 bits)
+# se reemplaza por la de desarrollo
+ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY', 'a' * 32).encode()
+if len(ENCRYPTION_KEY) != 32:
+	ENCRYPTION_KEY = b'a' * 32
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.urls import path, include
-from apps.pragma_dashboard.views import CustomTokenObtainPairView
+from apps.pragma_dashboard.views import CustomTokenObtainPairView, login_async
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 
 urlpatterns = [
@@ -8,6 +8,8 @@ urlpatterns = [
 
     # LOGIN POR EMAIL
     path("api/v1/dashboard/auth/login/", CustomTokenObtainPairView.as_view(), name="auth_login"),
+    # Mismo login como vista async, para servir con config/asgi.py
+    path("api/v1/dashboard/auth/login-async/", login_async, name="auth_login_async"),
 
     # SimpleJWT
     path("api/v1/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
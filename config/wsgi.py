@@ -9,8 +9,9 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
-from django.core.wsgi import get_wsgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_wsgi_application()
+# API con token Bearer -> MIDDLEWARE_API; el resto -> MIDDLEWARE
+from config.enrutamiento import aplicacion_wsgi  # noqa: E402
+
+application = aplicacion_wsgi()
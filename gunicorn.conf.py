@@ -0,0 +1,86 @@
+"""
+Configuración de gunicorn
+
+Gunicorn la lee sola desde el directorio de trabajo:
+
+	gunicorn
+
+El master importa Django una vez (`preload_app`) y lo calienta (ver
+config/calentamiento.py); los workers nacen por fork y comparten esa
+memoria copy-on-write. Para que el recolector de los hijos no la ensucie
+al recorrer los objetos heredados, se sigue la receta de la documentación
+de `gc.freeze()`: gc desactivado en el master, `gc.freeze()` justo antes
+de cada fork y gc activado de nuevo en el hijo.
+
+Cada worker informa al arrancar su RSS y la memoria compartida con el
+master, y la latencia de su primera petición.
+"""
+
+import gc
+import os
+import time
+
+gc.disable()
+
+wsgi_app = 'config.wsgi:application'
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '0'))
+accesslog = '-'
+
+
+def when_ready(server):
+	# Con preload_app la aplicación ya se cargó en el master
+	if not preload_app:
+		return
+
+	from django.db import connections
+
+	from config.calentamiento import calentar_aplicacion, memoria_proceso
+
+	resultado = calentar_aplicacion()
+	# Ninguna conexión debe heredarse entre procesos
+	connections.close_all()
+	server.log.info('Calentamiento: %s; memoria master: %s', resultado, memoria_proceso())
+
+
+def pre_fork(server, worker):
+	gc.freeze()
+
+
+def post_fork(server, worker):
+	gc.enable()
+
+
+def post_worker_init(worker):
+	from config.calentamiento import abrir_conexiones, memoria_proceso
+
+	if not preload_app:
+		from config.calentamiento import calentar_aplicacion
+		calentar_aplicacion()
+
+	worker.primera_peticion = None
+	worker.log.info(
+		'Worker %s listo: conexiones %s; memoria %s',
+		worker.pid, abrir_conexiones(), memoria_proceso()
+	)
+
+
+def pre_request(worker, req):
+	if getattr(worker, 'primera_peticion', True) is None:
+		worker.primera_peticion = time.perf_counter()
+
+
+def post_request(worker, req, environ, resp):
+	inicio = getattr(worker, 'primera_peticion', None)
+	if isinstance(inicio, float):
+		worker.primera_peticion = True
+		worker.log.info(
+			'Worker %s primera petición %s %s: %.1f ms',
+			worker.pid, req.method, req.path, (time.perf_counter() - inicio) * 1000
+		)
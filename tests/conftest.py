@@ -253,4 +253,36 @@ def authenticated_token(authenticated_user):
 	"""Token JWT para usuario autenticado (PU-002)"""
 	from rest_framework_simplejwt.tokens import RefreshToken
 	refresh = RefreshToken.for_user(authenticated_user)
-	return str(refresh.access_token)
\ No newline at end of file
+	return str(refresh.access_token)
+
+
+# ============ FIXTURES - CACHÉ ============
+
+@pytest.fixture(autouse=True)
+def limpiar_cache_global(request):
+	"""La BD de pruebas reutiliza ids: sin esto un usuario cacheado pasa de una prueba a otra"""
+	from django.core.cache import cache
+	from apps.pragma_dashboard.authentication import tokens_verificados
+
+	# El nivel compartido de la caché vive en la BD
+	usa_bd = request.node.get_closest_marker('django_db') or 'db' in request.fixturenames
+	if usa_bd:
+		request.getfixturevalue('db')
+		cache.clear()
+	tokens_verificados.limpiar()
+	yield
+	if usa_bd:
+		cache.clear()
+	tokens_verificados.limpiar()
+
+@pytest.fixture(autouse=True)
+def lecturas_en_primaria(request, settings):
+	"""Con DATABASE_REPLICA_URLS, solo las pruebas con todas las bases leen de réplicas"""
+	marca = request.node.get_closest_marker('django_db')
+	if not (marca and marca.kwargs.get('databases') == '__all__'):
+		settings.DATABASE_REPLICAS = []
+
+@pytest.fixture(autouse=True)
+def ultimo_login_sincrono(settings):
+	"""last_login se escribe en el mismo request: sin hilo de fondo durante las pruebas"""
+	settings.ULTIMO_LOGIN_FLUSH_SEGUNDOS = 0
@@ -0,0 +1,283 @@
+"""
+PRUEBA UNITARIA PU-007: Endpoints de Análisis IA para administradores
+======================================================================
+Estadísticas agregadas y cola de intervención
+"""
+
+import pytest
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache():
+	"""Cada prueba parte con la caché vacía"""
+	cache.clear()
+	yield
+	cache.clear()
+
+
+@pytest.fixture
+def analisis_variados(db, registered_user):
+	"""Análisis con distintos niveles de riesgo y antigüedad"""
+	from apps.pragma_dashboard.models import AnalisisIA
+
+	ahora = timezone.now()
+	datos = [
+		('bajo', False, 1),
+		('leve', False, 3),
+		('moderado', False, 10),
+		('alto', True, 20),
+		('severo', True, 45),
+		('severo', True, 200),
+	]
+	return [
+		AnalisisIA.objects.create(
+			usuario=registered_user,
+			nivel_riesgo=nivel,
+			requiere_intervencion=intervencion,
+			timestamp_analisis=ahora - timedelta(days=dias),
+		)
+		for nivel, intervencion, dias in datos
+	]
+
+
+# ============ PRUEBAS DE ESTADÍSTICAS ============
+
+@pytest.mark.django_db
+class TestEstadisticasAnalisis:
+	"""Pruebas del endpoint de estadísticas"""
+
+	url = '/api/v1/dashboard/analisis-ia/estadisticas/'
+
+	def test_estadisticas_solo_admin(self, authenticated_client):
+		"""✅ TC-001: Usuario normal no accede a estadísticas"""
+		response = authenticated_client.get(self.url)
+		assert response.status_code == status.HTTP_403_FORBIDDEN
+
+	def test_estadisticas_conteos(self, admin_client, analisis_variados):
+		"""✅ TC-002: Conteos totales, por riesgo y por ventana"""
+		response = admin_client.get(self.url)
+
+		assert response.status_code == status.HTTP_200_OK
+		assert response.data['total_analisis'] == 6
+		assert response.data['por_riesgo'] == {
+			'bajo': 1, 'leve': 1, 'moderado': 1, 'alto': 1, 'severo': 2,
+		}
+		assert response.data['requieren_intervencion'] == 3
+		assert response.data['ventanas']['ultimos_7_dias']['total'] == 2
+		assert response.data['ventanas']['ultimos_30_dias']['total'] == 4
+		assert response.data['ventanas']['ultimos_30_dias']['requieren_intervencion'] == 1
+		assert response.data['ventanas']['ultimos_90_dias']['total'] == 5
+
+	def test_estadisticas_una_sola_consulta(self, admin_client, analisis_variados):
+		"""✅ TC-003: Los agregados salen de una sola consulta"""
+		from apps.pragma_dashboard.views import calcular_estadisticas_analisis
+
+		with CaptureQueriesContext(connection) as consultas:
+			calcular_estadisticas_analisis()
+
+		assert len(consultas) == 1
+
+	def test_estadisticas_por_dia(self, admin_client, analisis_variados):
+		"""✅ TC-004: Desglose diario de los últimos N días"""
+		response = admin_client.get(self.url, {'por_dia': 30})
+
+		assert response.status_code == status.HTTP_200_OK
+		assert sum(dia['total'] for dia in response.data['por_dia']) == 4
+
+	def test_estadisticas_por_dia_invalido(self, admin_client):
+		"""✅ TC-005: Ventana por día no soportada"""
+		response = admin_client.get(self.url, {'por_dia': 12})
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+	def test_estadisticas_cacheadas(self, admin_client, analisis_variados):
+		"""✅ TC-006: Lecturas repetidas no vuelven a consultar la BD"""
+		admin_client.get(self.url)
+
+		with CaptureQueriesContext(connection) as consultas:
+			response = admin_client.get(self.url)
+
+		assert response.data['total_analisis'] == 6
+		assert not any('pragma_dashboard_analisisia' in q['sql'] for q in consultas)
+
+	def test_estadisticas_stale_while_revalidate(self, analisis_variados):
+		"""✅ TC-007: Valor vencido se sirve mientras otro llamador revalida"""
+		from apps.pragma_dashboard.utils import cache_swr
+
+		calcular = mock.Mock(side_effect=[1, 2])
+		assert cache_swr('prueba', calcular, fresco_segundos=10, stale_segundos=60) == 1
+
+		with mock.patch('apps.pragma_dashboard.utils.cache.time.time', return_value=timezone.now().timestamp() + 30):
+			# Otro llamador ya está revalidando: se sirve el valor anterior
+			cache.add('prueba:revalidando', True, 10)
+			assert cache_swr('prueba', calcular, fresco_segundos=10, stale_segundos=60) == 1
+			cache.delete('prueba:revalidando')
+
+			assert cache_swr('prueba', calcular, fresco_segundos=10, stale_segundos=60) == 2
+
+		assert calcular.call_count == 2
+
+
+# ============ PRUEBAS DE COLA DE INTERVENCIÓN ============
+
+@pytest.mark.django_db
+class TestColaIntervencion:
+	"""Pruebas de la cola de triage paginada por cursor"""
+
+	url = '/api/v1/dashboard/analisis-ia/requieren_intervencion/'
+
+	def test_cola_solo_admin(self, authenticated_client):
+		"""✅ TC-008: Usuario normal no accede a la cola"""
+		response = authenticated_client.get(self.url)
+		assert response.status_code == status.HTTP_403_FORBIDDEN
+
+	def test_cola_paginada_por_cursor(self, admin_client, analisis_variados):
+		"""✅ TC-009: La cola se recorre por cursor, más recientes primero"""
+		response = admin_client.get(self.url, {'page_size': 2})
+
+		assert response.status_code == status.HTTP_200_OK
+		assert len(response.data['results']) == 2
+		assert response.data['results'][0]['nivel_riesgo'] == 'alto'
+		assert response.data['next'] is not None
+
+		response = admin_client.get(response.data['next'])
+		assert len(response.data['results']) == 1
+		assert response.data['next'] is None
+
+	def test_cola_filtra_por_nivel(self, admin_client, analisis_variados):
+		"""✅ TC-010: Filtro por uno o más niveles de riesgo"""
+		response = admin_client.get(self.url, {'nivel': 'severo'})
+		assert [a['nivel_riesgo'] for a in response.data['results']] == ['severo', 'severo']
+
+		response = admin_client.get(self.url, {'nivel': 'alto,severo'})
+		assert len(response.data['results']) == 3
+
+	def test_cola_nivel_invalido(self, admin_client):
+		"""✅ TC-011: Nivel de riesgo inexistente"""
+		response = admin_client.get(self.url, {'nivel': 'critico'})
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+	def test_por_riesgo_paginado(self, authenticated_client, analisis_variados):
+		"""✅ TC-012: por_riesgo devuelve páginas, no el conjunto completo"""
+		response = authenticated_client.get(
+			'/api/v1/dashboard/analisis-ia/por_riesgo/', {'nivel': 'severo', 'page_size': 1}
+		)
+
+		assert response.status_code == status.HTTP_200_OK
+		assert len(response.data['results']) == 1
+		assert response.data['next'] is not None
+
+
+# ============ PRUEBAS DE LECTURA EN LOTE ============
+
+@pytest.mark.django_db
+class TestAnalisisPorIds:
+	"""Pruebas de ?ids= en análisis IA"""
+
+	def test_analisis_por_ids_filtra_por_usuario(self, api_client, django_user, analisis_variados):
+		"""✅ TC-013: Un usuario sin análisis propios no ve los ajenos"""
+		api_client.force_authenticate(user=django_user)
+		ids = ','.join(str(a.id) for a in analisis_variados)
+
+		response = api_client.get('/api/v1/dashboard/analisis-ia/', {'ids': ids})
+
+		assert response.status_code == status.HTTP_200_OK
+		assert response.data == []
+
+	def test_analisis_por_ids_admin(self, admin_client, analisis_variados):
+		"""✅ TC-014: Admin recupera varios análisis con el serializador de detalle"""
+		ids = [analisis_variados[1].id, analisis_variados[4].id]
+
+		response = admin_client.get(
+			'/api/v1/dashboard/analisis-ia/', {'ids': ','.join(map(str, ids))}
+		)
+
+		assert [a['id'] for a in response.data] == ids
+		assert 'plan_intervencion' in response.data[0]
+
+
+# ============ PRUEBAS DE SINGLE-FLIGHT ============
+
+@pytest.mark.django_db
+class TestSingleFlight:
+	"""Un solo cálculo por clave entre hilos y procesos"""
+
+	@pytest.fixture
+	def almacen(self):
+		from django.core.cache.backends.locmem import LocMemCache
+		return LocMemCache('single-flight', {})
+
+	def test_hilos_calculan_una_vez(self, almacen):
+		"""✅ TC-015: Ocho hilos simultáneos disparan un solo cálculo"""
+		import threading
+		import time
+		from apps.pragma_dashboard.utils import single_flight
+
+		publicado = {}
+		calculos = []
+
+		def calcular():
+			calculos.append(1)
+			time.sleep(0.2)
+			publicado['valor'] = 42
+			return 42
+
+		resultados = []
+		hilos = [
+			threading.Thread(target=lambda: resultados.append(
+				single_flight('agregado', calcular, lambda: publicado.get('valor'), almacen=almacen)
+			))
+			for _ in range(8)
+		]
+		for hilo in hilos:
+			hilo.start()
+		for hilo in hilos:
+			hilo.join()
+
+		assert resultados == [42] * 8
+		assert len(calculos) == 1
+
+	def test_espera_al_otro_proceso(self, almacen):
+		"""✅ TC-016: Con el candado tomado por otro proceso se espera su resultado"""
+		from apps.pragma_dashboard.utils import single_flight
+
+		almacen.add('agregado:revalidando', 'otro-proceso', 30)
+		calcular = mock.Mock(return_value='propio')
+		leer = mock.Mock(side_effect=[None, None, 'del otro'])
+
+		assert single_flight('agregado', calcular, leer, almacen=almacen) == 'del otro'
+		assert not calcular.called
+
+	def test_calcula_si_el_otro_no_termina(self, almacen):
+		"""✅ TC-017: Vencida la espera, el llamador calcula por su cuenta"""
+		from apps.pragma_dashboard.utils import single_flight
+
+		almacen.add('agregado:revalidando', 'otro-proceso', 30)
+		calcular = mock.Mock(return_value='propio')
+
+		assert single_flight('agregado', calcular, lambda: None, espera_segundos=0.1, almacen=almacen) == 'propio'
+		assert calcular.call_count == 1
+
+	def test_resumen_en_frio_espera(self, registered_user):
+		"""✅ TC-018: Resumen sin caché y con otro cálculo en curso no vuelve a agregar"""
+		from apps.pragma_dashboard.resumen import clave_resumen_dashboard, obtener_resumen_dashboard
+
+		clave = clave_resumen_dashboard(registered_user.pk)
+		cache.add(f'{clave}:revalidando', 'otro-proceso', 30)
+
+		def publicar(*args, **kwargs):
+			# Otro worker publica sin pasar por el LRU de este proceso
+			cache.compartida.set(cache.make_key(clave), {'total_sesiones': 7})
+
+		with mock.patch('apps.pragma_dashboard.utils.cache.time.sleep', side_effect=publicar):
+			with CaptureQueriesContext(connection) as consultas:
+				resumen = obtener_resumen_dashboard(registered_user.pk)
+
+		assert resumen == {'total_sesiones': 7}
+		assert not any('pragma_dashboard_sesionsimulacion' in q['sql'] for q in consultas)
@@ -10,6 +10,7 @@ from datetime import timedelta
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
+from django.db import models
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.settings import api_settings
 
@@ -175,6 +176,8 @@ class TestJWTTokenManagement:
 		assert 'access' in response.data
 		assert response.data['access'] is not None
 
+	# El throttle anónimo guarda su cubeta en la BD
+	@pytest.mark.django_db
 	def test_refresh_token_invalido(self, api_client):
 		"""✅ TC-012: Refresh token inválido"""
 		url = '/api/v1/token/refresh/'
@@ -193,6 +196,8 @@ class TestJWTTokenManagement:
 		
 		assert response.status_code == status.HTTP_200_OK
 
+	# El throttle anónimo guarda su cubeta en la BD
+	@pytest.mark.django_db
 	def test_verify_token_invalido(self, api_client):
 		"""✅ TC-014: Verificar token inválido"""
 		url = '/api/v1/token/verify/'
@@ -516,4 +521,829 @@ class TestJWTCompleteFlow:
 		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {new_access_token}')
 		profile_response = api_client.get(profile_url)
 		
-		assert profile_response.status_code == status.HTTP_200_OK
\ No newline at end of file
+		assert profile_response.status_code == status.HTTP_200_OK
+
+# ============ PRUEBAS DE PETICIONES MULTIPLEXADAS ============
+
+@pytest.mark.django_db
+class TestJWTBatch:
+	"""Pruebas del endpoint batch de arranque del cliente"""
+
+	url = '/api/v1/dashboard/batch/'
+
+	def test_batch_arranque_cliente(self, api_client, access_token):
+		"""✅ TC-031: Sub-peticiones de arranque en una sola respuesta"""
+		from unittest import mock
+		from rest_framework_simplejwt.authentication import JWTAuthentication
+
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+		peticiones = [
+			{'id': 'perfil', 'path': '/api/v1/dashboard/auth/profile/me/'},
+			{'id': 'savefile', 'path': '/api/v1/dashboard/savefiles/ultimo/'},
+			{'id': 'analisis', 'path': '/api/v1/dashboard/analisis-ia/ultimos/'},
+			{'id': 'historial', 'path': '/api/v1/dashboard/sesiones/mi_historial/', 'params': {'page': 1}},
+			{'id': 'progreso', 'path': '/api/v1/dashboard/progreso/'},
+		]
+
+		with mock.patch.object(JWTAuthentication, 'get_validated_token', autospec=True,
+							   side_effect=JWTAuthentication.get_validated_token) as validar:
+			response = api_client.post(self.url, {'peticiones': peticiones}, format='json')
+
+		assert response.status_code == status.HTTP_200_OK
+		assert validar.call_count == 1
+
+		respuestas = {r['id']: r for r in response.data['respuestas']}
+		assert respuestas['perfil']['status'] == 200
+		assert respuestas['perfil']['body']['email'] == 'juan@pragma.cl'
+		assert respuestas['savefile']['status'] == 404
+		assert respuestas['analisis']['body'] == []
+		assert respuestas['historial']['body']['count'] == 0
+		assert respuestas['progreso']['status'] == 200
+
+	def test_batch_sin_token(self, api_client):
+		"""✅ TC-032: El batch exige autenticación"""
+		response = api_client.post(self.url, {'peticiones': []}, format='json')
+		assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+	def test_batch_rutas_no_permitidas(self, authenticated_client):
+		"""✅ TC-033: Solo GET bajo /api/v1/dashboard/ y sin anidar batch"""
+		peticiones = [
+			{'id': 'post', 'method': 'POST', 'path': '/api/v1/dashboard/sesiones/'},
+			{'id': 'admin', 'path': '/admin/'},
+			{'id': 'anidado', 'path': '/api/v1/dashboard/batch/'},
+			{'id': 'inexistente', 'path': '/api/v1/dashboard/no-existe/'},
+		]
+
+		response = authenticated_client.post(self.url, {'peticiones': peticiones}, format='json')
+
+		codigos = [r['status'] for r in response.data['respuestas']]
+		assert codigos == [405, 400, 400, 404]
+
+	def test_batch_params_invalidos(self, authenticated_client):
+		"""✅ TC-094: params que no es objeto da 400 solo en esa sub-petición"""
+		peticiones = [
+			{'id': 'lista', 'path': '/api/v1/dashboard/sesiones/mi_historial/', 'params': ['page', 1]},
+			{'id': 'texto', 'path': '/api/v1/dashboard/sesiones/mi_historial/', 'params': 'page=1'},
+			{'id': 'perfil', 'path': '/api/v1/dashboard/auth/profile/me/'},
+		]
+
+		response = authenticated_client.post(self.url, {'peticiones': peticiones}, format='json')
+
+		assert response.status_code == status.HTTP_200_OK
+		respuestas = {r['id']: r for r in response.data['respuestas']}
+		assert respuestas['lista'] == {'id': 'lista', 'status': 400, 'body': {'error': 'params debe ser un objeto'}}
+		assert respuestas['texto']['status'] == 400
+		assert respuestas['perfil']['status'] == 200
+
+
+# ============ PRUEBAS DE EMAIL SIN DISTINGUIR MAYÚSCULAS ============
+
+@pytest.mark.django_db
+class TestJWTEmailUnico:
+	"""Pruebas del índice único de email sin distinguir mayúsculas"""
+
+	def test_login_email_mayusculas(self, api_client, registered_user, user_data):
+		"""✅ TC-034: Login con el email en otra capitalización"""
+		response = api_client.post('/api/v1/dashboard/auth/login/', {
+			'email': 'JUAN@Pragma.CL',
+			'password': user_data['password']
+		}, format='json')
+
+		assert response.status_code == status.HTTP_200_OK
+		assert response.data['user']['id'] == registered_user.id
+
+	def test_registro_email_duplicado_mayusculas(self, api_client, registered_user, user_data):
+		"""✅ TC-035: Registro rechaza el mismo email con otras mayúsculas"""
+		user_data['email'] = 'Juan@PRAGMA.cl'
+		response = api_client.post('/api/v1/dashboard/auth/register/', user_data, format='json')
+
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+		assert 'email' in response.data
+
+	def test_actualizar_email_duplicado_mayusculas(self, api_client, registered_user, django_user, access_token):
+		"""✅ TC-036: update_profile rechaza un email ajeno con otras mayúsculas"""
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+		response = api_client.patch('/api/v1/dashboard/auth/profile/update_profile/', {
+			'email': 'TEST@pragma.cl'
+		}, format='json')
+
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+	def test_indice_unico_en_bd(self, registered_user):
+		"""✅ TC-037: La BD rechaza emails duplicados pero permite varios vacíos"""
+		from django.db import IntegrityError, transaction
+
+		with pytest.raises(IntegrityError), transaction.atomic():
+			User.objects.create_user(username='juan2', email='JUAN@pragma.cl', password='x')
+
+		User.objects.create_user(username='sin_email_1', password='x')
+		User.objects.create_user(username='sin_email_2', password='x')
+		assert User.objects.filter(email='').count() == 2
+
+	def test_benchmark_login(self):
+		"""✅ TC-038: El benchmark siembra, mide y limpia"""
+		from io import StringIO
+		from django.core.management import call_command
+
+		salida = StringIO()
+		call_command('benchmark_login', usuarios=40, tramos=2, consultas=5, lote=15, stdout=salida)
+
+		assert 'p50=' in salida.getvalue()
+		assert not User.objects.filter(username__startswith='bench_').exists()
+
+
+# ============ PRUEBAS DE USUARIO CACHEADO ============
+
+@pytest.mark.django_db
+class TestJWTUsuarioCacheado:
+	"""Pruebas de CachedJWTAuthentication"""
+
+	url = '/api/v1/dashboard/auth/profile/me/'
+
+	def _consultas(self, client):
+		from django.db import connection
+		from django.test.utils import CaptureQueriesContext
+
+		with CaptureQueriesContext(connection) as contexto:
+			response = client.get(self.url)
+		assert response.status_code == status.HTTP_200_OK
+		# Solo las consultas a auth_user: la caché y el throttle usan sus tablas
+		return len([q for q in contexto.captured_queries if 'auth_user' in q['sql']])
+
+	def test_segunda_request_ahorra_consulta(self, api_client, registered_user, access_token):
+		"""✅ TC-039: Con el usuario en caché la request hace una consulta menos"""
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+		en_frio = self._consultas(api_client)
+		en_caliente = self._consultas(api_client)
+
+		assert en_frio - en_caliente == 1
+
+	def test_usuario_desactivado(self, api_client, registered_user, access_token):
+		"""✅ TC-040: Desactivar al usuario invalida la caché"""
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+		assert api_client.get(self.url).status_code == status.HTTP_200_OK
+
+		registered_user.is_active = False
+		registered_user.save()
+
+		response = api_client.get(self.url)
+		assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+	def test_perfil_actualizado_no_queda_obsoleto(self, api_client, registered_user, access_token):
+		"""✅ TC-041: Tras update_profile la caché no sirve el usuario viejo"""
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+		api_client.get(self.url)
+
+		api_client.patch('/api/v1/dashboard/auth/profile/update_profile/', {
+			'first_name': 'Sebastián'
+		}, format='json')
+
+		response = api_client.get(self.url)
+		assert response.data['first_name'] == 'Sebastián'
+
+	def test_cambio_password_invalida_cache(self, registered_user):
+		"""✅ TC-042: Cambiar la contraseña descarta el usuario cacheado"""
+		from django.core.cache import cache
+		from apps.pragma_dashboard.authentication import clave_usuario_auth
+
+		cache.set(clave_usuario_auth(registered_user.pk), registered_user)
+		registered_user.set_password('OtraPass456')
+		registered_user.save()
+
+		assert cache.get(clave_usuario_auth(registered_user.pk)) is None
+
+	def test_invalidacion_desde_otro_worker(self, api_client, registered_user, access_token, settings):
+		"""✅ TC-089: El borrado hecho por otra instancia de caché (otro worker) vale aquí"""
+		from apps.pragma_dashboard.authentication import clave_usuario_auth
+		from apps.pragma_dashboard.utils.cache_dos_niveles import CacheDosNiveles
+
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+		assert api_client.get(self.url).status_code == status.HTTP_200_OK
+
+		# Otro worker desactiva al usuario: su señal borra en su caché, no en esta
+		User.objects.filter(pk=registered_user.pk).update(is_active=False)
+		otro_worker = CacheDosNiveles(None, settings.CACHES['default'])
+		otro_worker.delete(clave_usuario_auth(registered_user.pk))
+
+		assert api_client.get(self.url).status_code == status.HTTP_401_UNAUTHORIZED
+
+	def test_escritura_tardia_no_revive_usuario(self, api_client, registered_user, access_token, monkeypatch):
+		"""✅ TC-100: Si la desactivación llega entre el SELECT y el set, la entrada vieja se descarta"""
+		from apps.pragma_dashboard.authentication import invalidar_usuario_auth
+
+		get_original = User.objects.get
+
+		def get_y_desactivar(*args, **kwargs):
+			user = get_original(*args, **kwargs)
+			# Otro worker desactiva y su señal invalida antes del cache.set
+			User.objects.filter(pk=user.pk).update(is_active=False)
+			invalidar_usuario_auth(user.pk)
+			monkeypatch.setattr(User.objects, 'get', get_original)
+			return user
+
+		monkeypatch.setattr(User.objects, 'get', get_y_desactivar)
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+		assert api_client.get(self.url).status_code == status.HTTP_200_OK
+		assert api_client.get(self.url).status_code == status.HTTP_401_UNAUTHORIZED
+
+	def test_cache_sin_hash_de_password(self, api_client, registered_user, access_token):
+		"""✅ TC-101: La caché compartida guarda los campos y un digest, no el User ni su hash"""
+		from apps.pragma_dashboard.authentication import clave_usuario_auth
+		from apps.pragma_dashboard.utils import leer_compartida
+
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+		api_client.get(self.url)
+
+		datos = leer_compartida(clave_usuario_auth(registered_user.pk))
+		assert isinstance(datos, dict)
+		assert 'password' not in datos['campos']
+		assert registered_user.password not in repr(datos)
+
+		from django.db import connection
+		from django.test.utils import CaptureQueriesContext
+
+		# Desde la caché el perfil sale completo sin consultar auth_user
+		with CaptureQueriesContext(connection) as consultas:
+			response = api_client.get(self.url)
+		assert response.data['email'] == registered_user.email
+		assert not [q for q in consultas if 'auth_user' in q['sql']]
+
+
+# ============ PRUEBAS DE REVOCACIÓN DE TOKENS ============
+
+@pytest.mark.django_db
+class TestJWTRevocacion:
+	"""Pruebas del almacén de revocaciones con filtro Bloom"""
+
+	url = '/api/v1/token/refresh/'
+
+	@pytest.fixture(autouse=True)
+	def filtro_limpio(self):
+		from apps.pragma_dashboard.revocacion import reiniciar_filtro
+		reiniciar_filtro()
+		yield
+		reiniciar_filtro()
+
+	def test_refresh_rotado_queda_revocado(self, api_client, refresh_token):
+		"""✅ TC-043: El refresh usado no sirve dos veces; el rotado sí"""
+		response = api_client.post(self.url, {'refresh': refresh_token}, format='json')
+		assert response.status_code == status.HTTP_200_OK
+		nuevo_refresh = response.data['refresh']
+
+		reuso = api_client.post(self.url, {'refresh': refresh_token}, format='json')
+		assert reuso.status_code == status.HTTP_401_UNAUTHORIZED
+
+		response = api_client.post(self.url, {'refresh': nuevo_refresh}, format='json')
+		assert response.status_code == status.HTTP_200_OK
+
+	def test_token_no_revocado_sin_consultas(self, refresh_token):
+		"""✅ TC-044: Con el filtro construido, un JTI no revocado no consulta la BD"""
+		from django.db import connection
+		from django.test.utils import CaptureQueriesContext
+		from apps.pragma_dashboard.revocacion import jti_revocado
+
+		jti_revocado('calentar-filtro')
+
+		with CaptureQueriesContext(connection) as contexto:
+			assert jti_revocado(RefreshToken(refresh_token)['jti']) is False
+
+		assert len(contexto.captured_queries) == 0
+
+	def test_verify_rechaza_revocado(self, api_client, refresh_token):
+		"""✅ TC-045: token/verify rechaza un refresh revocado"""
+		api_client.post(self.url, {'refresh': refresh_token}, format='json')
+
+		response = api_client.post('/api/v1/token/verify/', {'token': refresh_token}, format='json')
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+	def test_purga_expirados_al_reconstruir(self):
+		"""✅ TC-046: La reconstrucción del filtro purga revocaciones expiradas"""
+		from django.utils import timezone
+		from apps.pragma_dashboard.models import TokenRevocado
+		from apps.pragma_dashboard.revocacion import jti_revocado
+
+		TokenRevocado.objects.create(jti='vencido', expira=timezone.now() - timedelta(minutes=1))
+		TokenRevocado.objects.create(jti='vigente', expira=timezone.now() + timedelta(days=1))
+
+		assert jti_revocado('vigente') is True
+		assert list(TokenRevocado.objects.values_list('jti', flat=True)) == ['vigente']
+
+	def test_filtro_bloom(self):
+		"""✅ TC-047: Filtro Bloom sin falsos negativos y con pocos falsos positivos"""
+		from apps.pragma_dashboard.utils import FiltroBloom
+
+		filtro = FiltroBloom(1000, 0.01)
+		for numero in range(1000):
+			filtro.agregar(f'jti-{numero}')
+
+		assert all(f'jti-{numero}' in filtro for numero in range(1000))
+		falsos = sum(f'otro-{numero}' in filtro for numero in range(10000))
+		assert falsos < 300
+
+
+# ============ PRUEBAS DE LAST_LOGIN AGRUPADO ============
+
+@pytest.mark.django_db
+class TestJWTUltimoLogin:
+	"""Pruebas de las escrituras agrupadas de last_login"""
+
+	def test_login_actualiza_last_login(self, api_client, registered_user, user_data):
+		"""✅ TC-048: El login registra last_login"""
+		assert registered_user.last_login is None
+
+		response = api_client.post('/api/v1/dashboard/auth/login/', {
+			'email': user_data['email'],
+			'password': user_data['password']
+		}, format='json')
+
+		assert response.status_code == status.HTTP_200_OK
+		registered_user.refresh_from_db()
+		assert registered_user.last_login is not None
+
+	def test_logins_acumulados_una_sentencia(self, settings, registered_user, django_user, monkeypatch):
+		"""✅ TC-049: Los logins acumulados se escriben con un solo UPDATE"""
+		from django.db import connection
+		from django.test.utils import CaptureQueriesContext
+		from django.utils import timezone
+		from apps.pragma_dashboard import ultimo_login
+
+		settings.ULTIMO_LOGIN_FLUSH_SEGUNDOS = 60
+		monkeypatch.setattr(ultimo_login, '_asegurar_hilo', lambda: None)
+
+		antes = timezone.now() - timedelta(minutes=5)
+		ahora = timezone.now()
+		ultimo_login.registrar_login(registered_user, antes)
+		ultimo_login.registrar_login(registered_user, ahora)
+		ultimo_login.registrar_login(django_user, antes)
+
+		registered_user.refresh_from_db()
+		assert registered_user.last_login is None
+
+		with CaptureQueriesContext(connection) as contexto:
+			assert ultimo_login.vaciar_ultimos_logins() == 2
+
+		assert len([q for q in contexto.captured_queries if q['sql'].startswith('UPDATE')]) == 1
+		registered_user.refresh_from_db()
+		django_user.refresh_from_db()
+		assert registered_user.last_login == ahora
+		assert django_user.last_login == antes
+
+	def test_no_retrocede_last_login(self, registered_user):
+		"""✅ TC-050: Un login más viejo no pisa uno más nuevo"""
+		from django.utils import timezone
+		from apps.pragma_dashboard.ultimo_login import escribir_ultimos_logins
+
+		ahora = timezone.now()
+		User.objects.filter(pk=registered_user.pk).update(last_login=ahora)
+
+		escribir_ultimos_logins({registered_user.pk: ahora - timedelta(hours=1)})
+
+		registered_user.refresh_from_db()
+		assert registered_user.last_login == ahora
+
+
+# ============ PRUEBAS DE ASIGNACIÓN DE USERNAME ============
+
+@pytest.mark.django_db
+class TestJWTUsernames:
+	"""Pruebas de usernames derivados del email y del alta masiva"""
+
+	def test_sufijo_libre_una_consulta(self, django_assert_num_queries):
+		"""✅ TC-051: El siguiente sufijo libre se calcula con una consulta"""
+		from apps.pragma_dashboard.usuarios import asignar_usernames
+
+		for username in ['juan', 'juan1', 'juan2', 'juan4', 'juanita', 'juan0']:
+			User.objects.create_user(username=username, password='x')
+
+		with django_assert_num_queries(1):
+			asignados = asignar_usernames(['juan', 'juan', 'pedro', 'juanita'])
+
+		assert asignados == ['juan3', 'juan5', 'pedro', 'juanita1']
+
+	def test_registro_username_con_sufijo(self, api_client, registered_user, user_data):
+		"""✅ TC-052: El registro agrega sufijo si el username está tomado"""
+		user_data['email'] = 'juan@otro.cl'
+		response = api_client.post('/api/v1/dashboard/auth/register/', user_data, format='json')
+
+		assert response.status_code == status.HTTP_201_CREATED
+		assert User.objects.get(email='juan@otro.cl').username == 'juan1'
+
+	def test_provisionar_usuarios_csv(self, tmp_path, registered_user):
+		"""✅ TC-053: Alta masiva desde CSV omite registrados, repetidos e inválidos"""
+		from io import StringIO
+		from django.core.management import call_command
+
+		archivo = tmp_path / 'curso.csv'
+		archivo.write_text(
+			'nombre,email,password\n'
+			'Ana Pérez,ana@pragma.cl,AnaPass123\n'
+			'Otra Ana,ANA@pragma.cl,AnaPass123\n'
+			'Juan Repetido,JUAN@pragma.cl,x\n'
+			'Sin Email,no-es-email,x\n'
+			'Juan Dos,juan@curso.cl,\n',
+			encoding='utf-8'
+		)
+
+		salida = StringIO()
+		call_command('provisionar_usuarios', str(archivo), procesos=2, stdout=salida)
+
+		assert 'Usuarios creados: 2' in salida.getvalue()
+		ana = User.objects.get(email='ana@pragma.cl')
+		assert (ana.first_name, ana.last_name) == ('Ana', 'Pérez')
+		assert ana.check_password('AnaPass123')
+		juan = User.objects.get(email='juan@curso.cl')
+		assert juan.username == 'juan1'
+		assert not juan.has_usable_password()
+
+
+# ============ PRUEBAS DE HASH DE CONTRASEÑAS ACOTADO ============
+
+@pytest.mark.django_db
+class TestJWTHashAcotado:
+	"""Pruebas del pool acotado de hash de contraseñas y del login async"""
+
+	def test_login_saturado_429(self, api_client, registered_user, user_data, monkeypatch):
+		"""✅ TC-054: Sin cupo en el pool el login responde 429"""
+		import threading
+		from apps.pragma_dashboard import contrasenas
+
+		sin_cupo = threading.BoundedSemaphore(1)
+		sin_cupo.acquire()
+		monkeypatch.setattr(contrasenas, '_pool_vigente', lambda: (None, sin_cupo))
+
+		response = api_client.post('/api/v1/dashboard/auth/login/', {
+			'email': user_data['email'],
+			'password': user_data['password']
+		}, format='json')
+
+		assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+		assert 'Retry-After' in response
+
+	def test_pico_de_logins_deja_un_hilo_libre(self, api_client, registered_user, access_token, settings, monkeypatch):
+		"""✅ TC-102: Con el pool lleno sobra un hilo de gunicorn y el resto de la API responde"""
+		import gc
+		import runpy
+		import threading
+		from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+		from pathlib import Path
+		from apps.pragma_dashboard import contrasenas
+
+		try:
+			hilos_gunicorn = runpy.run_path(str(Path(__file__).resolve().parent.parent / 'gunicorn.conf.py'))['threads']
+		finally:
+			gc.enable()
+		admitidas = settings.HASH_PASSWORD_HILOS + settings.HASH_PASSWORD_COLA
+		assert admitidas <= hilos_gunicorn - 1
+
+		liberar = threading.Event()
+		monkeypatch.setattr(contrasenas, 'make_password', lambda password: liberar.wait(10) and 'hash')
+		contrasenas._pool['pid'] = None
+
+		try:
+			# Un login por hilo de gthread: los admitidos quedan bloqueados en el hash
+			with ThreadPoolExecutor(hilos_gunicorn) as peticiones:
+				futuros = [peticiones.submit(contrasenas.hashear_password, 'x') for _ in range(hilos_gunicorn)]
+				wait(futuros, timeout=5, return_when=FIRST_COMPLETED)
+				rechazadas = [futuro for futuro in futuros if futuro.done()]
+
+				assert len(rechazadas) == hilos_gunicorn - admitidas
+				assert all(isinstance(futuro.exception(), contrasenas.HashSaturado) for futuro in rechazadas)
+
+				# Con el pool lleno, una petición que no es login se atiende
+				api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+				assert api_client.get('/api/v1/dashboard/auth/profile/me/').status_code == status.HTTP_200_OK
+				liberar.set()
+		finally:
+			liberar.set()
+			contrasenas._pool['pid'] = None
+
+	def test_cupo_se_libera(self, settings):
+		"""✅ TC-055: Cada hash terminado devuelve su cupo"""
+		from apps.pragma_dashboard import contrasenas
+
+		settings.HASH_PASSWORD_HILOS = 1
+		settings.HASH_PASSWORD_COLA = 0
+		contrasenas._pool['pid'] = None
+
+		try:
+			for _ in range(3):
+				encoded = contrasenas.hashear_password('OtraPass456')
+			assert contrasenas.check_password('OtraPass456', encoded)
+		finally:
+			contrasenas._pool['pid'] = None
+
+	def test_login_async(self, api_client, registered_user, user_data):
+		"""✅ TC-056: El login async responde igual que el login DRF"""
+		response = api_client.post('/api/v1/dashboard/auth/login-async/', {
+			'email': 'JUAN@pragma.cl',
+			'password': user_data['password']
+		}, format='json')
+
+		assert response.status_code == status.HTTP_200_OK
+		datos = response.json()
+		assert datos['user']['id'] == registered_user.id
+		assert RefreshToken(datos['refresh'])['user_id'] == registered_user.id
+
+		incorrecta = api_client.post('/api/v1/dashboard/auth/login-async/', {
+			'email': user_data['email'],
+			'password': 'NoEsLaClave1'
+		}, format='json')
+		assert incorrecta.status_code == status.HTTP_400_BAD_REQUEST
+		assert 'password' in incorrecta.json()
+
+	def test_login_async_throttle_anonimo(self, api_client, registered_user, user_data, monkeypatch):
+		"""✅ TC-088: login-async comparte la cubeta anónima: el intento N+1 recibe 429"""
+		from apps.pragma_dashboard.throttling import AnonCubetaThrottle
+
+		monkeypatch.setattr(AnonCubetaThrottle, 'THROTTLE_RATES', {'user': '1000/hour', 'anon': '3/hour'})
+		datos = {'email': user_data['email'], 'password': 'NoEsLaClave1'}
+
+		codigos = [
+			api_client.post('/api/v1/dashboard/auth/login-async/', datos, format='json').status_code
+			for _ in range(4)
+		]
+
+		assert codigos == [400, 400, 400, 429]
+		response = api_client.post('/api/v1/dashboard/auth/login-async/', datos, format='json')
+		assert int(response['Retry-After']) > 0
+
+	def test_cambio_password_con_pool(self, api_client, registered_user, access_token, user_data):
+		"""✅ TC-057: change_password verifica y hashea en el pool"""
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+		response = api_client.post('/api/v1/dashboard/auth/profile/change_password/', {
+			'old_password': user_data['password'],
+			'new_password': 'NuevaPass456',
+			'new_password_confirm': 'NuevaPass456'
+		}, format='json')
+
+		assert response.status_code == status.HTTP_200_OK
+		registered_user.refresh_from_db()
+		assert registered_user.check_password('NuevaPass456')
+
+
+# ============ PRUEBAS DE THROTTLING CON CUBETA DE TOKENS ============
+
+@pytest.mark.django_db
+class TestJWTThrottleCubeta:
+	"""Pruebas del throttle con cubeta de tokens compartida en la BD"""
+
+	def test_cubeta_agota_y_rellena(self):
+		"""✅ TC-058: La cubeta permite la ráfaga, luego rechaza con espera"""
+		from apps.pragma_dashboard.models import CubetaThrottle
+
+		resultados = [CubetaThrottle.objects.consumir('prueba', 3, 1 / 3600)[0] for _ in range(4)]
+		assert resultados == [True, True, True, False]
+
+		_, espera = CubetaThrottle.objects.consumir('prueba', 3, 1 / 3600)
+		assert 0 < espera <= 3600
+		assert CubetaThrottle.objects.count() == 1
+
+		# Rellenar: como si la última actualización fuera hace una hora
+		CubetaThrottle.objects.filter(clave='prueba').update(actualizado=models.F('actualizado') - 3600)
+		assert CubetaThrottle.objects.consumir('prueba', 3, 1 / 3600)[0] is True
+
+	def test_limite_compartido_429(self, api_client, registered_user, access_token, monkeypatch):
+		"""✅ TC-059: Superar la tasa del scope 'user' responde 429 con Retry-After"""
+		from apps.pragma_dashboard.throttling import UserCubetaThrottle
+
+		monkeypatch.setattr(UserCubetaThrottle, 'THROTTLE_RATES', {'user': '2/hour', 'anon': '100/hour'})
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+		codigos = [api_client.get('/api/v1/dashboard/auth/profile/me/').status_code for _ in range(3)]
+
+		assert codigos == [200, 200, 429]
+		response = api_client.get('/api/v1/dashboard/auth/profile/me/')
+		assert int(response['Retry-After']) > 0
+
+	def test_purga_cubetas_viejas(self):
+		"""✅ TC-060: Se purgan las cubetas sin uso"""
+		from apps.pragma_dashboard.models import CubetaThrottle
+
+		CubetaThrottle.objects.consumir('vieja', 5, 1)
+		CubetaThrottle.objects.consumir('nueva', 5, 1)
+		CubetaThrottle.objects.filter(clave='vieja').update(actualizado=models.F('actualizado') - 2 * 86400)
+
+		assert CubetaThrottle.objects.purgar(86400) == 1
+		assert list(CubetaThrottle.objects.values_list('clave', flat=True)) == ['nueva']
+
+	def test_x_forwarded_for_largo_sigue_limitado(self, api_client, monkeypatch):
+		"""✅ TC-096: Un X-Forwarded-For enorme no desborda la clave ni evita el límite"""
+		from apps.pragma_dashboard.models import CubetaThrottle
+		from apps.pragma_dashboard.throttling import AnonCubetaThrottle
+
+		monkeypatch.setattr(AnonCubetaThrottle, 'THROTTLE_RATES', {'user': '1000/hour', 'anon': '2/hour'})
+		cabecera = ', '.join(f'10.0.{i // 256}.{i % 256}' for i in range(100))
+		datos = {'email': 'nadie@example.com', 'password': 'NoEsLaClave1'}
+
+		codigos = [
+			api_client.post(
+				'/api/v1/dashboard/auth/login/', datos, format='json', HTTP_X_FORWARDED_FOR=cabecera
+			).status_code
+			for _ in range(3)
+		]
+
+		assert len(cabecera) > 255
+		assert codigos[-1] == 429
+		claves = list(CubetaThrottle.objects.values_list('clave', flat=True))
+		assert claves and all(len(clave) <= 255 for clave in claves)
+		assert all(clave.startswith(('anon:', 'user:')) for clave in claves)
+
+	def test_almacen_caido_rechaza_anonimos(self, api_client, registered_user, access_token, monkeypatch):
+		"""✅ TC-097: Si CubetaThrottle falla, los anónimos reciben 429 y los autenticados pasan"""
+		from django.db import DataError
+		from apps.pragma_dashboard.models import CubetaThrottle
+
+		def fallar(*args, **kwargs):
+			raise DataError('value too long for type character varying(255)')
+
+		monkeypatch.setattr(CubetaThrottle.objects, 'consumir', fallar)
+
+		anonimo = api_client.post('/api/v1/dashboard/auth/login/', {
+			'email': 'nadie@example.com', 'password': 'NoEsLaClave1'
+		}, format='json')
+		assert anonimo.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+		assert api_client.get('/api/v1/dashboard/auth/profile/me/').status_code == status.HTTP_200_OK
+
+
+# ============ PRUEBAS DE TOKENS VERIFICADOS EN CACHÉ ============
+
+@pytest.mark.django_db
+class TestJWTTokensVerificados:
+	"""Pruebas del LRU de tokens verificados en CachedJWTAuthentication"""
+
+	def test_token_repetido_no_se_reverifica(self, api_client, registered_user, access_token):
+		"""✅ TC-061: El mismo access token se verifica una sola vez"""
+		from unittest import mock
+		from rest_framework_simplejwt.tokens import AccessToken
+
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+		with mock.patch.object(AccessToken, 'verify', autospec=True, side_effect=AccessToken.verify) as verificar:
+			for _ in range(5):
+				assert api_client.get('/api/v1/dashboard/auth/profile/me/').status_code == status.HTTP_200_OK
+
+		assert verificar.call_count == 1
+
+	def test_token_expirado_no_se_sirve(self, registered_user):
+		"""✅ TC-062: Un token vencido sale del LRU y se rechaza"""
+		import time
+		from rest_framework_simplejwt.exceptions import InvalidToken
+		from rest_framework_simplejwt.tokens import AccessToken
+		from apps.pragma_dashboard.authentication import CachedJWTAuthentication, tokens_verificados
+
+		raw = str(AccessToken.for_user(registered_user)).encode()
+		autenticacion = CachedJWTAuthentication()
+		token = autenticacion.get_validated_token(raw)
+
+		# Simula el paso del tiempo hasta después de exp
+		tokens_verificados._tokens[tokens_verificados.clave(raw)] = (token, time.time() - 1)
+		assert tokens_verificados.obtener(raw) is None
+
+		token.set_exp(lifetime=-timedelta(seconds=1))
+		with pytest.raises(InvalidToken):
+			autenticacion.get_validated_token(str(token).encode())
+
+	def test_lru_acotado(self, settings):
+		"""✅ TC-063: El LRU no crece más allá de su tamaño"""
+		from rest_framework_simplejwt.tokens import AccessToken
+		from apps.pragma_dashboard.authentication import CachedJWTAuthentication, tokens_verificados
+
+		settings.JWT_VERIFICADOS_CACHE_TAMANO = 3
+		autenticacion = CachedJWTAuthentication()
+		crudos = []
+		for user_id in range(5):
+			token = AccessToken()
+			token['user_id'] = user_id
+			crudos.append(str(token).encode())
+			autenticacion.get_validated_token(crudos[-1])
+
+		assert len(tokens_verificados._tokens) == 3
+		assert tokens_verificados.obtener(crudos[0]) is None
+		assert tokens_verificados.obtener(crudos[-1]) is not None
+
+
+# ============ PRUEBAS DE MIDDLEWARE POR RUTA ============
+
+@pytest.mark.django_db
+class TestJWTMiddlewareApi:
+	"""Pruebas del enrutamiento a la cadena MIDDLEWARE_API"""
+
+	@pytest.fixture
+	def aplicacion(self):
+		"""Aplicación WSGI real sin cerrar la conexión de la BD de pruebas"""
+		from django.core.signals import request_started, request_finished
+		from django.db import close_old_connections
+		from config.enrutamiento import aplicacion_wsgi
+
+		request_started.disconnect(close_old_connections)
+		request_finished.disconnect(close_old_connections)
+		yield aplicacion_wsgi()
+		request_started.connect(close_old_connections)
+		request_finished.connect(close_old_connections)
+
+	@pytest.fixture
+	def espias(self, monkeypatch):
+		"""Cuenta las pasadas por sesión, CSRF y mensajes (antes de armar la aplicación)"""
+		from django.contrib.messages.middleware import MessageMiddleware
+		from django.contrib.sessions.middleware import SessionMiddleware
+		from django.middleware.csrf import CsrfViewMiddleware
+
+		llamadas = []
+		for clase, metodo in (
+			(SessionMiddleware, 'process_request'),
+			(CsrfViewMiddleware, 'process_view'),
+			(MessageMiddleware, 'process_request'),
+		):
+			original = getattr(clase, metodo)
+
+			def espia(self, *args, _original=original, _clase=clase, **kwargs):
+				llamadas.append(_clase.__name__)
+				return _original(self, *args, **kwargs)
+
+			monkeypatch.setattr(clase, metodo, espia)
+		return llamadas
+
+	def _llamar(self, aplicacion, path, **extra):
+		from django.test import RequestFactory
+
+		environ = RequestFactory().get(path, HTTP_HOST='localhost', **extra).environ
+		resultado = {}
+
+		def start_response(estado, headers, exc_info=None):
+			resultado['status'] = int(estado.split()[0])
+			resultado['headers'] = dict(headers)
+
+		b''.join(aplicacion(environ, start_response))
+		return resultado
+
+	def test_api_bearer_cadena_minima(self, aplicacion, registered_user, access_token):
+		"""✅ TC-064: API con Bearer responde sin middleware de sesión ni X-Frame-Options"""
+		respuesta = self._llamar(
+			aplicacion,
+			'/api/v1/dashboard/auth/profile/me/',
+			HTTP_AUTHORIZATION=f'Bearer {access_token}'
+		)
+
+		assert respuesta['status'] == 200
+		assert 'X-Frame-Options' not in respuesta['headers']
+
+	def test_admin_cadena_completa(self, aplicacion):
+		"""✅ TC-065: /admin/ mantiene la cadena completa"""
+		respuesta = self._llamar(aplicacion, '/admin/')
+
+		assert respuesta['status'] == 302
+		assert respuesta['headers']['X-Frame-Options'] == 'DENY'
+
+	def test_api_bearer_sin_sesion_csrf_ni_mensajes(self, espias, aplicacion, registered_user, access_token):
+		"""✅ TC-104: Con Bearer no corren sesión, CSRF ni mensajes y no hay Set-Cookie; sin Bearer sí"""
+		from django.db import connection
+		from django.test.utils import CaptureQueriesContext
+
+		with CaptureQueriesContext(connection) as consultas:
+			respuesta = self._llamar(
+				aplicacion,
+				'/api/v1/dashboard/auth/profile/me/',
+				HTTP_AUTHORIZATION=f'Bearer {access_token}'
+			)
+
+		assert respuesta['status'] == 200
+		assert espias == []
+		assert 'Set-Cookie' not in respuesta['headers']
+		assert not [q for q in consultas if 'django_session' in q['sql']]
+
+		self._llamar(aplicacion, '/admin/')
+		assert set(espias) == {'SessionMiddleware', 'CsrfViewMiddleware', 'MessageMiddleware'}
+
+	def test_cadena_api_sin_modificar_settings(self, monkeypatch):
+		"""✅ TC-105: La cadena mínima se arma desde MIDDLEWARE_API sin reasignar settings.MIDDLEWARE"""
+		from django.conf import settings
+		from config.enrutamiento import WSGIHandlerApi
+
+		asignaciones = []
+		clase_settings = type(settings)
+		setattr_original = clase_settings.__setattr__
+
+		def registrar(self, nombre, valor):
+			asignaciones.append(nombre)
+			setattr_original(self, nombre, valor)
+
+		monkeypatch.setattr(clase_settings, '__setattr__', registrar)
+		handler = WSGIHandlerApi()
+
+		assert 'MIDDLEWARE' not in asignaciones
+		# Ninguno de MIDDLEWARE_API define process_view; CsrfViewMiddleware sí
+		assert handler._view_middleware == []
+		assert handler._middleware_chain is not None
+
+	def test_es_api_jwt(self):
+		"""✅ TC-066: Solo rutas de API con Bearer usan la cadena mínima"""
+		from config.enrutamiento import es_api_jwt
+
+		assert es_api_jwt('/api/v1/dashboard/sesiones/', 'Bearer abc')
+		assert es_api_jwt('/api/v1/dashboard/sesiones/', 'bearer abc')
+		assert not es_api_jwt('/api/v1/dashboard/sesiones/', '')
+		assert not es_api_jwt('/admin/', 'Bearer abc')
@@ -23,6 +23,7 @@ ESTRUCTURA DE PRUEBAS:
 - TC-019 a TC-020: Recuperación y descifrado de savefiles
 - TC-021 a TC-022: Flujos completos y múltiples sesiones
 - TC-023 a TC-025: Edge cases
+- TC-026 a TC-029: Ingesta automática del savefile al modelo relacional
 """
 
 import pytest
@@ -547,8 +548,18 @@ class TestMetricsEdgeCases:
 		
 		assert len(savefile['sesiones'][0]['decisiones']) == 0
 
-	def test_response_time_muy_grande(self):
-		"""✅ TC-024: Response time muy grande (timeout del usuario)"""
+	@pytest.mark.django_db
+	@pytest.mark.parametrize('response_time, esperado', [
+		(999999.99, 1000000),  # Usuario se tardó mucho
+		(1e12, 2147483647),
+		('inf', 0),
+		('nan', 0),
+		('1e400', 0),
+	])
+	def test_response_time_muy_grande(self, api_client, authenticated_user, authenticated_token, response_time, esperado):
+		"""✅ TC-024: Response time muy grande, infinito o NaN se ingiere acotado"""
+		from apps.pragma_dashboard.models import DecisionTomada
+
 		decision = {
 			'scenario_name': 'Test',
 			'emotion': 'bad',
@@ -556,10 +567,43 @@ class TestMetricsEdgeCases:
 			'selected_response': 'Test',
 			'outcome_text': 'Test',
 			'feedback': 'Test',
-			'response_time': 999999.99  # Usuario se tardó mucho
+			'response_time': response_time
 		}
-		
-		assert decision['response_time'] > 10000
+		savefile = {
+			'sesiones': [{
+				'timestamp_inicio': '2025-11-19T11:37:05',
+				'timestamp_fin': '2025-11-19T11:37:10',
+				'decisiones': [decision]
+			}]
+		}
+
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {authenticated_token}')
+		response = api_client.post(
+			'/api/v1/dashboard/savefiles/',
+			{'datos_savefile': json.dumps(savefile)},
+			format='json'
+		)
+
+		assert response.status_code == status.HTTP_201_CREATED
+		assert response.data['ingesta']['decisiones_creadas'] == 1
+		decision_creada = DecisionTomada.objects.get(sesion__usuario=authenticated_user)
+		assert decision_creada.tiempo_respuesta_segundos == esperado
+		assert 0 <= decision_creada.sesion.metricas.tiempo_promedio_decision <= 2147483647
+
+	@pytest.mark.django_db
+	@pytest.mark.parametrize('literal', ['Infinity', '-Infinity', 'NaN', '1e400'])
+	def test_savefile_con_numero_no_finito(self, api_client, authenticated_user, authenticated_token, literal):
+		"""✅ TC-099: Un número no finito en el JSON se rechaza con 400 antes de guardar"""
+		from apps.pragma_dashboard.models import SaveFileUsuario, SesionSimulacion
+
+		datos = '{"sesiones": [{"timestamp_inicio": "2025-11-19T11:37:05", "decisiones": [{"response_time": %s}]}]}' % literal
+
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {authenticated_token}')
+		response = api_client.post('/api/v1/dashboard/savefiles/', {'datos_savefile': datos}, format='json')
+
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+		assert not SaveFileUsuario.objects.filter(usuario=authenticated_user).exists()
+		assert not SesionSimulacion.objects.filter(usuario=authenticated_user).exists()
 
 	def test_savefile_json_muy_grande(self):
 		"""✅ TC-025: Savefile con muchas decisiones (100+)"""
@@ -576,4 +620,163 @@ class TestMetricsEdgeCases:
 			})
 		
 		assert len(decisiones) == 100
-		assert json.dumps(decisiones) is not None
\ No newline at end of file
+		assert json.dumps(decisiones) is not None
+
+
+# ============ PRUEBAS DE INGESTA AUTOMÁTICA ============
+
+@pytest.mark.django_db
+class TestSaveFileIngesta:
+	"""Pruebas del pipeline savefile → sesiones, decisiones y métricas"""
+
+	def _subir(self, api_client, token, datos):
+		api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+		return api_client.post(
+			'/api/v1/dashboard/savefiles/',
+			{'datos_savefile': datos},
+			format='json'
+		)
+
+	def test_metricas_por_sesion(self, godot_savefile_json):
+		"""✅ TC-026: Métricas calculadas coinciden con el cálculo manual"""
+		from apps.pragma_dashboard.ingesta import calcular_metricas
+
+		metricas = calcular_metricas(godot_savefile_json['sesiones'])
+
+		assert len(metricas) == 1
+		assert metricas[0]['decisiones_totales'] == 6
+		assert metricas[0]['decisiones_acertadas'] == 3
+		assert 'decisiones_negativas' not in metricas[0]
+		assert round(metricas[0]['tiempo_promedio_decision'], 2) == 4.94
+		# 2 de 6 decisiones con emoción 'bad'
+		assert metricas[0]['nivel_estres'] == 33
+
+	def test_upload_crea_sesion_decisiones_y_metricas(self, api_client, authenticated_user, authenticated_token, godot_savefile_json):
+		"""✅ TC-027: Subir el savefile puebla el modelo relacional"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		response = self._subir(api_client, authenticated_token, json.dumps(godot_savefile_json))
+
+		assert response.status_code == status.HTTP_201_CREATED
+		assert response.data['ingesta']['sesiones_creadas'] == 1
+		assert response.data['ingesta']['decisiones_creadas'] == 6
+
+		sesion = SesionSimulacion.objects.get(usuario=authenticated_user)
+		assert sesion.escenario_nombre == 'Sala de clases'
+		assert sesion.duracion_segundos == 63
+		assert sesion.completada is True
+		assert sesion.decisiones.count() == 6
+		assert sesion.metricas.decisiones_acertadas == 3
+		assert sesion.metricas.tiempo_promedio_decision == 4
+		assert sesion.metricas.porcentaje_acierto == 50.0
+
+	def test_resubida_no_duplica(self, api_client, authenticated_user, authenticated_token, godot_savefile_json):
+		"""✅ TC-028: Volver a subir el savefile no duplica sesiones"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		self._subir(api_client, authenticated_token, json.dumps(godot_savefile_json))
+
+		# El savefile acumula una segunda sesión
+		godot_savefile_json['sesiones'].append({
+			'timestamp_inicio': '2025-11-20T10:00:00',
+			'timestamp_fin': '2025-11-20T10:01:00',
+			'decisiones': godot_savefile_json['sesiones'][0]['decisiones'][:2],
+		})
+		response = self._subir(api_client, authenticated_token, json.dumps(godot_savefile_json))
+
+		assert response.data['ingesta']['sesiones_creadas'] == 1
+		assert response.data['ingesta']['sesiones_duplicadas'] == 1
+		assert SesionSimulacion.objects.filter(usuario=authenticated_user).count() == 2
+
+	def test_resubida_actualiza_sesion_en_curso(self, api_client, authenticated_user, authenticated_token, godot_savefile_json):
+		"""✅ TC-091: Una sesión que ganó decisiones y timestamp_fin se actualiza, no se duplica"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		sesion = godot_savefile_json['sesiones'][0]
+		decisiones = sesion['decisiones']
+		sesion['decisiones'] = decisiones[:2]
+		fin = sesion.pop('timestamp_fin')
+		self._subir(api_client, authenticated_token, json.dumps(godot_savefile_json))
+
+		sesion['decisiones'] = decisiones
+		sesion['timestamp_fin'] = fin
+		response = self._subir(api_client, authenticated_token, json.dumps(godot_savefile_json))
+
+		assert response.data['ingesta']['sesiones_creadas'] == 0
+		assert response.data['ingesta']['sesiones_actualizadas'] == 1
+		assert response.data['ingesta']['decisiones_creadas'] == 4
+
+		sesion_bd = SesionSimulacion.objects.get(usuario=authenticated_user)
+		assert sesion_bd.completada is True
+		assert sesion_bd.duracion_segundos == 63
+		assert sesion_bd.decisiones.count() == 6
+		assert sesion_bd.metricas.decisiones_totales == 6
+		assert sesion_bd.metricas.decisiones_acertadas == 3
+
+		# Sin cambios: no se reescribe
+		response = self._subir(api_client, authenticated_token, json.dumps(godot_savefile_json))
+		assert response.data['ingesta']['sesiones_duplicadas'] == 1
+		assert response.data['ingesta']['sesiones_actualizadas'] == 0
+
+	def test_sesion_ingerida_por_contenido(self, api_client, authenticated_user, authenticated_token, godot_savefile_json):
+		"""✅ TC-092: Una sesión con la huella anterior (de contenido) se reconoce y pasa al identificador"""
+		from apps.pragma_dashboard.ingesta import huella_contenido, huella_sesion
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		sesion = godot_savefile_json['sesiones'][0]
+		self._subir(api_client, authenticated_token, json.dumps(godot_savefile_json))
+		SesionSimulacion.objects.filter(usuario=authenticated_user).update(
+			huella_savefile=huella_contenido(sesion), huella_contenido=''
+		)
+
+		response = self._subir(api_client, authenticated_token, json.dumps(godot_savefile_json))
+
+		assert response.data['ingesta']['sesiones_creadas'] == 0
+		sesion_bd = SesionSimulacion.objects.get(usuario=authenticated_user)
+		assert sesion_bd.huella_savefile == huella_sesion(sesion)
+		assert sesion_bd.decisiones.count() == 6
+
+	def test_subida_concurrente_no_pierde_sesiones(self, authenticated_user, godot_savefile_json, monkeypatch):
+		"""✅ TC-093: Si otra subida inserta una sesión a la vez, se reintenta y el resto se crea"""
+		from apps.pragma_dashboard import ingesta
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		sesion = godot_savefile_json['sesiones'][0]
+		godot_savefile_json['sesiones'].append({
+			'timestamp_inicio': '2025-11-20T10:00:00',
+			'timestamp_fin': '2025-11-20T10:01:00',
+			'decisiones': sesion['decisiones'][:2],
+		})
+		planificar = ingesta._planificar
+		llamadas = []
+
+		def planificar_con_carrera(usuario, unicas):
+			plan = planificar(usuario, unicas)
+			if not llamadas:
+				# La otra subida confirma la primera sesión tras la lectura
+				SesionSimulacion.objects.create(
+					usuario=usuario,
+					escenario_nombre='Sala de clases',
+					huella_savefile=ingesta.huella_sesion(sesion),
+					huella_contenido=ingesta.huella_contenido(sesion),
+				)
+			llamadas.append(plan)
+			return plan
+
+		monkeypatch.setattr(ingesta, '_planificar', planificar_con_carrera)
+		resultado = ingesta.ingerir_savefile(authenticated_user, godot_savefile_json)
+
+		assert len(llamadas) == 2
+		assert resultado['sesiones_creadas'] == 1
+		assert resultado['sesiones_duplicadas'] == 1
+		assert SesionSimulacion.objects.filter(usuario=authenticated_user).count() == 2
+
+	def test_savefile_sin_sesiones(self, api_client, authenticated_user, authenticated_token):
+		"""✅ TC-029: Savefile sin formato Godot se guarda sin ingerir"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		response = self._subir(api_client, authenticated_token, 'texto libre')
+
+		assert response.status_code == status.HTTP_201_CREATED
+		assert response.data['ingesta']['sesiones_creadas'] == 0
+		assert not SesionSimulacion.objects.filter(usuario=authenticated_user).exists()
@@ -0,0 +1,854 @@
+"""
+PRUEBA UNITARIA PU-008: Sesiones de Simulación
+===============================================
+Completar sesiones y operaciones en lote sobre sesiones, decisiones y eventos
+"""
+
+import pytest
+from datetime import timedelta
+from django.conf import settings as django_settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+
+
+def consultas_vista(consultas):
+	"""Consultas de la vista: sin throttle ni tabla de caché (ni sus savepoints)"""
+	return [
+		q for q in consultas.captured_queries
+		if 'cubetathrottle' not in q['sql'] and 'pragma_cache' not in q['sql']
+		and 'SAVEPOINT' not in q['sql']
+	]
+
+
+@pytest.fixture
+def otro_usuario(db):
+	"""Usuario ajeno a las sesiones de prueba"""
+	return User.objects.create_user(
+		username='otro',
+		email='otro@pragma.cl',
+		password='OtroPass123'
+	)
+
+
+@pytest.fixture
+def sesiones(db, registered_user):
+	"""Tres sesiones iniciadas hace 90 segundos"""
+	from apps.pragma_dashboard.models import SesionSimulacion
+
+	creadas = [
+		SesionSimulacion.objects.create(usuario=registered_user, escenario_nombre=f'Escenario {i}')
+		for i in range(3)
+	]
+	SesionSimulacion.objects.filter(id__in=[s.id for s in creadas]).update(
+		fecha_inicio=timezone.now() - timedelta(seconds=90)
+	)
+	return creadas
+
+
+# ============ PRUEBAS DE COMPLETAR SESIÓN ============
+
+@pytest.mark.django_db
+class TestCompletarSesion:
+	"""Pruebas de completar sesiones"""
+
+	def test_completar_calcula_duracion(self, authenticated_client, sesiones):
+		"""✅ TC-001: Completar marca la sesión y calcula la duración en SQL"""
+		sesion = sesiones[0]
+		response = authenticated_client.post(f'/api/v1/dashboard/sesiones/{sesion.id}/completar/')
+
+		assert response.status_code == status.HTTP_200_OK
+		assert response.data['completada'] is True
+		assert 89 <= response.data['duracion_segundos'] <= 95
+
+		sesion.refresh_from_db()
+		assert sesion.completada is True
+		assert sesion.fecha_fin is not None
+
+	def test_completar_una_sola_sentencia(self, authenticated_client, sesiones):
+		"""✅ TC-002: Completar ejecuta una única consulta"""
+		with CaptureQueriesContext(connection) as consultas:
+			response = authenticated_client.post(f'/api/v1/dashboard/sesiones/{sesiones[0].id}/completar/')
+
+		assert response.status_code == status.HTTP_200_OK
+		assert len(consultas_vista(consultas)) == 1
+		assert consultas_vista(consultas)[0]['sql'].upper().startswith('UPDATE')
+
+	def test_completar_es_idempotente(self, authenticated_client, sesiones):
+		"""✅ TC-003: Reintentar no modifica fecha_fin ni duración"""
+		url = f'/api/v1/dashboard/sesiones/{sesiones[0].id}/completar/'
+		primera = authenticated_client.post(url)
+		segunda = authenticated_client.post(url)
+
+		assert segunda.status_code == status.HTTP_200_OK
+		assert segunda.data['fecha_fin'] == primera.data['fecha_fin']
+		assert segunda.data['duracion_segundos'] == primera.data['duracion_segundos']
+
+	def test_completar_sesion_ajena(self, api_client, otro_usuario, sesiones):
+		"""✅ TC-004: No se puede completar la sesión de otro usuario"""
+		api_client.force_authenticate(user=otro_usuario)
+		response = api_client.post(f'/api/v1/dashboard/sesiones/{sesiones[0].id}/completar/')
+
+		assert response.status_code == status.HTTP_404_NOT_FOUND
+		sesiones[0].refresh_from_db()
+		assert sesiones[0].completada is False
+
+	def test_completar_lote(self, authenticated_client, sesiones):
+		"""✅ TC-005: Completar varias sesiones en una sola sentencia"""
+		ids = [s.id for s in sesiones] + [999999]
+
+		with CaptureQueriesContext(connection) as consultas:
+			response = authenticated_client.post(
+				'/api/v1/dashboard/sesiones/completar_lote/', {'ids': ids}, format='json'
+			)
+
+		assert response.status_code == status.HTTP_200_OK
+		assert [s['id'] for s in response.data['sesiones']] == ids[:3]
+		assert all(s['completada'] for s in response.data['sesiones'])
+		assert response.data['no_encontradas'] == [999999]
+		# UPDATE ... RETURNING + búsqueda de los IDs no devueltos
+		assert len(consultas_vista(consultas)) == 2
+
+	def test_completar_lote_ids_invalidos(self, authenticated_client):
+		"""✅ TC-006: Lote sin lista de IDs"""
+		response = authenticated_client.post(
+			'/api/v1/dashboard/sesiones/completar_lote/', {'ids': 'a,b'}, format='json'
+		)
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+# ============ PRUEBAS DE INGESTA EN LOTE ============
+
+@pytest.mark.django_db
+class TestIngestaLote:
+	"""Pruebas de ingesta en lote de decisiones y eventos"""
+
+	def test_lote_decisiones(self, authenticated_client, sesiones):
+		"""✅ TC-007: 30 decisiones en una petición y consultas constantes"""
+		from apps.pragma_dashboard.models import DecisionTomada
+
+		decisiones = [
+			{
+				'sesion': sesiones[i % 2].id,
+				'decision_id': f'd{i}',
+				'tiempo_respuesta_segundos': i,
+				'fue_acertada': i % 3 == 0,
+			}
+			for i in range(30)
+		]
+
+		with CaptureQueriesContext(connection) as consultas:
+			response = authenticated_client.post(
+				'/api/v1/dashboard/decisiones/lote/', decisiones, format='json'
+			)
+
+		assert response.status_code == status.HTTP_201_CREATED
+		assert len(response.data['creados']) == 30
+		assert response.data['errores'] == []
+		assert DecisionTomada.objects.filter(sesion__in=sesiones).count() == 30
+		# Propiedad de sesiones + INSERT (más SAVEPOINT/RELEASE de la transacción)
+		assert len(consultas_vista(consultas)) <= 4
+
+	def test_lote_eventos(self, authenticated_client, sesiones):
+		"""✅ TC-008: Ingesta en lote de eventos"""
+		eventos = [
+			{
+				'sesion': sesiones[0].id,
+				'evento_id': f'e{i}',
+				'timestamp_ocurrencia': '2025-11-19T11:37:05Z',
+				'fue_manejado_correctamente': True,
+			}
+			for i in range(5)
+		]
+
+		response = authenticated_client.post('/api/v1/dashboard/eventos/lote/', eventos, format='json')
+
+		assert response.status_code == status.HTTP_201_CREATED
+		assert len(response.data['creados']) == 5
+
+	def test_lote_errores_por_item(self, api_client, otro_usuario, registered_user, sesiones):
+		"""✅ TC-009: Ítems inválidos o de sesiones ajenas se reportan por índice"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		sesion_ajena = SesionSimulacion.objects.create(usuario=otro_usuario, escenario_nombre='Ajena')
+		api_client.force_authenticate(user=registered_user)
+
+		decisiones = [
+			{'sesion': sesiones[0].id, 'decision_id': 'ok', 'tiempo_respuesta_segundos': 3, 'fue_acertada': True},
+			{'sesion': sesion_ajena.id, 'decision_id': 'ajena', 'tiempo_respuesta_segundos': 3, 'fue_acertada': True},
+			{'sesion': sesiones[0].id, 'decision_id': 'negativa', 'tiempo_respuesta_segundos': -1, 'fue_acertada': True},
+		]
+
+		response = api_client.post('/api/v1/dashboard/decisiones/lote/', decisiones, format='json')
+
+		assert response.status_code == status.HTTP_207_MULTI_STATUS
+		assert len(response.data['creados']) == 1
+		assert [e['indice'] for e in response.data['errores']] == [1, 2]
+		assert 'sesion' in response.data['errores'][0]['errores']
+		assert 'tiempo_respuesta_segundos' in response.data['errores'][1]['errores']
+
+	def test_lote_no_es_lista(self, authenticated_client):
+		"""✅ TC-010: El cuerpo debe ser una lista"""
+		response = authenticated_client.post(
+			'/api/v1/dashboard/decisiones/lote/', {'sesion': 1}, format='json'
+		)
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+# ============ PRUEBAS DE EXPORTACIÓN N8N ============
+
+@pytest.mark.django_db
+class TestExportacionN8N:
+	"""Pruebas de la exportación NDJSON multi-sesión"""
+
+	url = '/api/v1/dashboard/sesiones/exportar_n8n/'
+
+	@pytest.fixture
+	def sesiones_con_datos(self, registered_user):
+		from apps.pragma_dashboard.models import SesionSimulacion, DecisionTomada, MetricaDesempeno
+
+		creadas = []
+		for i in range(5):
+			sesion = SesionSimulacion.objects.create(usuario=registered_user, escenario_nombre=f'E{i}')
+			DecisionTomada.objects.create(
+				sesion=sesion, decision_id='d', tiempo_respuesta_segundos=2, fue_acertada=True
+			)
+			MetricaDesempeno.objects.create(sesion=sesion, nivel_estres=10 * i)
+			creadas.append(sesion)
+		return creadas
+
+	def _lineas(self, response):
+		import json
+		contenido = b''.join(response.streaming_content).decode()
+		return [json.loads(linea) for linea in contenido.splitlines()]
+
+	def test_exportar_ndjson(self, authenticated_client, sesiones_con_datos):
+		"""✅ TC-011: Exporta todas las sesiones con decisiones y métricas"""
+		response = authenticated_client.get(self.url)
+
+		assert response.status_code == status.HTTP_200_OK
+		assert response['Content-Type'] == 'application/x-ndjson'
+		lineas = self._lineas(response)
+		assert [l['sesion']['id'] for l in lineas] == [s.id for s in sesiones_con_datos]
+		assert len(lineas[0]['decisiones']) == 1
+		assert lineas[3]['metricas_existentes']['nivel_estres'] == 30
+
+	def test_exportar_consultas_fijas_por_chunk(self, registered_user, sesiones_con_datos):
+		"""✅ TC-012: Tres consultas por chunk, sin importar las sesiones"""
+		from apps.pragma_dashboard.exportacion import exportar_sesiones_ndjson
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		with CaptureQueriesContext(connection) as consultas:
+			chunks = list(exportar_sesiones_ndjson(
+				SesionSimulacion.objects.filter(usuario=registered_user), tamano_chunk=2
+			))
+
+		assert len(chunks) == 3
+		assert len(consultas) == 9
+
+	def test_exportar_cursor_y_limite(self, authenticated_client, sesiones_con_datos):
+		"""✅ TC-013: Reanudar desde un cursor con límite"""
+		response = authenticated_client.get(
+			self.url, {'cursor': sesiones_con_datos[1].id, 'limite': 2}
+		)
+		lineas = self._lineas(response)
+		assert [l['sesion']['id'] for l in lineas] == [s.id for s in sesiones_con_datos[2:4]]
+
+	def test_exportar_otro_usuario_prohibido(self, authenticated_client, otro_usuario):
+		"""✅ TC-014: Usuario normal no exporta sesiones ajenas"""
+		response = authenticated_client.get(self.url, {'usuario_id': otro_usuario.id})
+		assert response.status_code == status.HTTP_403_FORBIDDEN
+
+	def test_exportar_fecha_invalida(self, authenticated_client):
+		"""✅ TC-015: Rango de fechas inválido"""
+		response = authenticated_client.get(self.url, {'desde': 'ayer'})
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+	@pytest.mark.parametrize('parametros', [
+		{'limite': 0}, {'limite': -5}, {'limite': 10001}, {'cursor': -1}
+	])
+	def test_exportar_limite_y_cursor_fuera_de_rango(self, authenticated_client, sesiones_con_datos, parametros):
+		"""✅ TC-098: limite fuera de 1..MAX o cursor negativo responden 400, no un stream roto"""
+		response = authenticated_client.get(self.url, parametros)
+
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+		assert not response.streaming
+
+
+# ============ PRUEBAS DE LECTURA EN LOTE ============
+
+@pytest.mark.django_db
+class TestLecturaPorIds:
+	"""Pruebas de ?ids= en los listados"""
+
+	url = '/api/v1/dashboard/sesiones/'
+
+	def test_sesiones_por_ids(self, authenticated_client, sesiones):
+		"""✅ TC-016: Devuelve el detalle de las sesiones pedidas, en orden"""
+		ids = [sesiones[2].id, sesiones[0].id]
+
+		with CaptureQueriesContext(connection) as consultas:
+			response = authenticated_client.get(self.url, {'ids': ','.join(map(str, ids))})
+
+		assert response.status_code == status.HTTP_200_OK
+		assert [s['id'] for s in response.data] == ids
+		assert 'decisiones' in response.data[0]
+		# Consulta IN (con usuario y métricas por JOIN) + prefetch de decisiones y eventos
+		assert len(consultas_vista(consultas)) == 3
+
+	def test_sesiones_por_ids_respeta_usuario(self, api_client, otro_usuario, sesiones):
+		"""✅ TC-017: No se devuelven sesiones de otros usuarios"""
+		api_client.force_authenticate(user=otro_usuario)
+		response = api_client.get(self.url, {'ids': str(sesiones[0].id)})
+
+		assert response.status_code == status.HTTP_200_OK
+		assert response.data == []
+
+	def test_sesiones_por_ids_limite(self, authenticated_client):
+		"""✅ TC-018: Se limita la cantidad de IDs por lote"""
+		ids = ','.join(str(i) for i in range(1, 102))
+		response = authenticated_client.get(self.url, {'ids': ids})
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+	def test_sesiones_por_ids_invalidos(self, authenticated_client):
+		"""✅ TC-019: IDs no numéricos"""
+		response = authenticated_client.get(self.url, {'ids': '1,a'})
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+# ============ PRUEBAS DE RESUMEN DEL DASHBOARD ============
+
+@pytest.mark.django_db
+class TestResumenDashboard:
+	"""Pruebas del resumen personal cacheado"""
+
+	url = '/api/v1/dashboard/sesiones/resumen/'
+
+	@pytest.fixture(autouse=True)
+	def limpiar_cache(self):
+		from django.core.cache import cache
+		cache.clear()
+
+	@pytest.fixture
+	def sesiones_con_metricas(self, registered_user):
+		from apps.pragma_dashboard.models import SesionSimulacion, MetricaDesempeno
+
+		datos = [
+			('Sala de clases', True, 120, 40, 3, 6),
+			('Sala de clases', True, 60, 60, 2, 2),
+			('Biblioteca', False, 30, None, 0, 0),
+		]
+		for escenario, completada, duracion, estres, acertadas, totales in datos:
+			sesion = SesionSimulacion.objects.create(
+				usuario=registered_user,
+				escenario_nombre=escenario,
+				completada=completada,
+				duracion_segundos=duracion
+			)
+			if estres is not None:
+				MetricaDesempeno.objects.create(
+					sesion=sesion,
+					nivel_estres=estres,
+					decisiones_acertadas=acertadas,
+					decisiones_totales=totales
+				)
+
+	def test_resumen_valores(self, authenticated_client, sesiones_con_metricas):
+		"""✅ TC-020: Resumen calculado desde sesiones y métricas"""
+		response = authenticated_client.get(self.url)
+
+		assert response.status_code == status.HTTP_200_OK
+		assert response.data == {
+			'total_sesiones': 3,
+			'sesiones_completadas': 2,
+			'tiempo_total_minutos': 3,
+			'promedio_estres': 50.0,
+			'porcentaje_acierto_promedio': 75.0,
+			'escenarios_completados': 1,
+			'nivel_progreso': 'inicial',
+		}
+
+	def test_resumen_una_consulta_y_cacheado(self, authenticated_client, sesiones_con_metricas):
+		"""✅ TC-021: Una consulta la primera vez, ninguna desde caché"""
+		with CaptureQueriesContext(connection) as consultas:
+			authenticated_client.get(self.url)
+		assert len(consultas_vista(consultas)) == 1
+
+		with CaptureQueriesContext(connection) as consultas:
+			authenticated_client.get(self.url)
+		assert len(consultas_vista(consultas)) == 0
+
+	def test_resumen_invalidado_al_cambiar_sesiones(self, authenticated_client, registered_user, sesiones_con_metricas):
+		"""✅ TC-022: Crear o completar sesiones invalida el resumen"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		assert authenticated_client.get(self.url).data['total_sesiones'] == 3
+
+		sesion = SesionSimulacion.objects.create(usuario=registered_user, escenario_nombre='Cafetería')
+		assert authenticated_client.get(self.url).data['total_sesiones'] == 4
+
+		authenticated_client.post(f'/api/v1/dashboard/sesiones/{sesion.id}/completar/')
+		assert authenticated_client.get(self.url).data['sesiones_completadas'] == 3
+
+
+# ============ PRUEBAS DE CACHÉ EN DOS NIVELES ============
+
+@pytest.mark.django_db
+class TestCacheDosNiveles:
+	"""Pruebas del LRU en proceso sobre la caché compartida"""
+
+	@pytest.fixture
+	def cache(self):
+		from django.core.cache import cache
+		cache.clear()
+		cache.reiniciar_estadisticas()
+		return cache
+
+	def _vaciar_l1(self, cache):
+		with cache._lock:
+			cache._l1.clear()
+
+	def test_lectura_desde_cada_nivel(self, cache):
+		"""✅ TC-067: Tras set se lee del nivel 1; sin nivel 1, del compartido"""
+		cache.set('clave', {'valor': 1})
+
+		with CaptureQueriesContext(connection) as consultas:
+			assert cache.get('clave') == {'valor': 1}
+		assert len(consultas.captured_queries) == 0
+
+		self._vaciar_l1(cache)
+		assert cache.get('clave') == {'valor': 1}
+		assert cache.get('clave') == {'valor': 1}
+
+		estadisticas = cache.estadisticas()
+		assert estadisticas['l1_aciertos'] == 2
+		assert estadisticas['l2_aciertos'] == 1
+		assert estadisticas['tasa_total'] == 1.0
+
+	def test_compartida_entre_procesos(self, cache):
+		"""✅ TC-068: Lo escrito por otro proceso se ve al vencer el nivel 1"""
+		from django.core.cache import caches
+
+		assert cache.get('otro') is None
+		caches['compartida'].set(cache.make_key('otro'), 'desde otro worker')
+		# La clave ausente queda en el nivel 1 hasta L1_TTL
+		assert cache.get('otro') is None
+
+		self._vaciar_l1(cache)
+		assert cache.get('otro') == 'desde otro worker'
+		assert cache.estadisticas()['fallos'] == 2
+
+	def test_version_invalida(self, cache):
+		"""✅ TC-069: incr_version invalida la clave en ambos niveles"""
+		cache.set('perfil', 'v1')
+		cache.incr_version('perfil')
+
+		assert cache.get('perfil') is None
+		assert cache.get('perfil', version=2) == 'v1'
+
+	def test_nivel_1_entrega_copias(self, cache):
+		"""✅ TC-090: Modificar un valor leído no altera lo que reciben otras lecturas"""
+		valor = {'nombre': 'Juan'}
+		cache.set('usuario', valor)
+		valor['nombre'] = 'modificado antes de leer'
+
+		leido = cache.get('usuario')
+		leido['nombre'] = 'modificado por otra petición'
+
+		assert cache.get('usuario') == {'nombre': 'Juan'}
+		assert cache.get('usuario') is not cache.get('usuario')
+
+	def test_purga_filas_vencidas(self, cache, monkeypatch):
+		"""✅ TC-103: La purga periódica borra del nivel 2 solo las filas vencidas"""
+		from django.core.cache import caches
+		from apps.pragma_dashboard.utils import cache_dos_niveles
+
+		compartida = caches['compartida']
+
+		def fila(clave):
+			# Clave tal como queda en pragma_cache: el nivel 2 le agrega su prefijo
+			return compartida.make_key(cache.make_key(clave))
+
+		cache.set('viva', 1, 300)
+		cache.set('vencida', 2, 300)
+		# Vencida como si hubiera pasado su TTL sin que nadie la leyera
+		with connection.cursor() as cursor:
+			cursor.execute(
+				'UPDATE pragma_cache SET expires = %s WHERE cache_key = %s',
+				[connection.ops.adapt_datetimefield_value(timezone.now() - timedelta(hours=1)), fila('vencida')]
+			)
+
+		# Una de cada PURGA_CADA escrituras purga antes de escribir
+		monkeypatch.setattr(cache_dos_niveles.random, 'randrange', lambda n: 0)
+		cache.set('otra', 3, 300)
+
+		with connection.cursor() as cursor:
+			cursor.execute('SELECT cache_key FROM pragma_cache')
+			claves = {fila[0] for fila in cursor.fetchall()}
+		assert claves == {fila('viva'), fila('otra')}
+		assert compartida.get(cache.make_key('viva')) == 1
+		assert cache.purgar_expiradas() == 0
+
+	def test_estadisticas_solo_admin(self, authenticated_client, registered_user):
+		"""✅ TC-070: Las estadísticas de caché requieren staff"""
+		url = '/api/v1/dashboard/cache/estadisticas/'
+		assert authenticated_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+		registered_user.is_staff = True
+		registered_user.save()
+
+		response = authenticated_client.get(url)
+		assert response.status_code == status.HTTP_200_OK
+		assert {'pid', 'tasa_l1', 'tasa_l2', 'entradas_l1'} <= set(response.data)
+
+
+# ============ PRUEBAS DE RESPUESTAS CACHEADAS POR USUARIO ============
+
+@pytest.mark.django_db
+class TestRespuestasPorUsuario:
+	"""Pruebas de la caché de lecturas por usuario con contador de generación"""
+
+	url = '/api/v1/dashboard/sesiones/mi_historial/'
+
+	def test_segunda_lectura_sin_consultas(self, authenticated_client, sesiones):
+		"""✅ TC-071: La lectura repetida sale de caché sin consultar la BD"""
+		primera = authenticated_client.get(self.url)
+
+		with CaptureQueriesContext(connection) as consultas:
+			segunda = authenticated_client.get(self.url)
+
+		assert segunda.status_code == status.HTTP_200_OK
+		assert segunda.data == primera.data
+		assert len(consultas_vista(consultas)) == 0
+
+	def test_escritura_invalida(self, authenticated_client, registered_user, sesiones):
+		"""✅ TC-072: Crear, completar o cargar en lote deja obsoleta la respuesta"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		assert len(authenticated_client.get(self.url).data['results']) == 3
+
+		nueva = SesionSimulacion.objects.create(usuario=registered_user, escenario_nombre='Cafetería')
+		assert len(authenticated_client.get(self.url).data['results']) == 4
+
+		# update() sin señales: la vista incrementa la generación
+		authenticated_client.post(f'/api/v1/dashboard/sesiones/{nueva.id}/completar/')
+		completadas = [s for s in authenticated_client.get(self.url).data['results'] if s['completada']]
+		assert len(completadas) == 1
+
+	def test_aislado_por_usuario_y_parametros(self, api_client, authenticated_client, otro_usuario, sesiones):
+		"""✅ TC-073: La clave separa usuario y query string; solo se cachean 200"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+
+		assert authenticated_client.get(self.url, {'page': 2}).status_code == status.HTTP_404_NOT_FOUND
+		assert authenticated_client.get(self.url).data['count'] == 3
+		assert authenticated_client.get(self.url, {'page': 2}).status_code == status.HTTP_404_NOT_FOUND
+
+		SesionSimulacion.objects.create(usuario=otro_usuario, escenario_nombre='Ajena')
+		api_client.force_authenticate(user=otro_usuario)
+		assert api_client.get(self.url).data['count'] == 1
+
+	def test_cuerpo_cifrado_en_cache(self, api_client, registered_user):
+		"""✅ TC-074: El cuerpo cacheado va cifrado y un savefile nuevo se ve al instante"""
+		from django.core.cache import cache
+		from django.http import QueryDict
+		from apps.pragma_dashboard.respuestas import clave_respuesta, generacion_usuario
+
+		api_client.force_authenticate(user=registered_user)
+		url = '/api/v1/dashboard/savefiles/'
+
+		api_client.post(url, {'datos_savefile': '{"marca": "secreto-uno"}'}, format='json')
+		assert api_client.get(f'{url}ultimo/').data['datos_savefile'] == {'marca': 'secreto-uno'}
+
+		generacion = generacion_usuario(registered_user.pk)
+		cifrado = cache.get(clave_respuesta(
+			registered_user.pk, generacion, 'SaveFileUsuarioViewSet', 'ultimo', QueryDict(), {}
+		))
+		assert isinstance(cifrado, bytes)
+		assert b'secreto-uno' not in cifrado
+
+		api_client.post(url, {'datos_savefile': '{"marca": "secreto-dos"}'}, format='json')
+		assert generacion_usuario(registered_user.pk) > generacion
+		assert api_client.get(f'{url}ultimo/').data['datos_savefile'] == {'marca': 'secreto-dos'}
+
+
+# ============ PRUEBAS DE RÉPLICAS DE LECTURA ============
+
+@pytest.mark.django_db
+class TestRouterReplicas:
+	"""Lecturas seguras de ViewSets a réplicas, con lectura de las propias escrituras"""
+
+	@pytest.fixture
+	def router(self, settings):
+		from apps.pragma_dashboard.replicas import RouterReplicas
+		settings.DATABASE_REPLICAS = ['replica_1']
+		return RouterReplicas()
+
+	def test_solo_lecturas_seguras_de_la_app(self, router, registered_user):
+		"""✅ TC-075: GET de un ViewSet lee modelos de la app en la réplica; el resto en default"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+		from apps.pragma_dashboard.replicas import iniciar_peticion, terminar_peticion
+
+		assert router.db_for_read(SesionSimulacion) is None
+
+		token = iniciar_peticion(registered_user.pk, 'GET')
+		assert router.db_for_read(SesionSimulacion) == 'replica_1'
+		assert router.db_for_read(User) is None
+		terminar_peticion(token)
+
+		token = iniciar_peticion(registered_user.pk, 'POST')
+		assert router.db_for_read(SesionSimulacion) is None
+		terminar_peticion(token)
+
+	def test_escritura_en_la_peticion(self, router, registered_user):
+		"""✅ TC-076: Tras escribir, la misma petición lee de default y el usuario queda fijado"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+		from apps.pragma_dashboard.replicas import fijado_a_primaria, iniciar_peticion, terminar_peticion
+
+		token = iniciar_peticion(registered_user.pk, 'GET')
+		router.db_for_write(SesionSimulacion)
+		assert router.db_for_read(SesionSimulacion) is None
+		terminar_peticion(token)
+
+		assert fijado_a_primaria(registered_user.pk)
+		token = iniciar_peticion(registered_user.pk, 'GET')
+		assert router.db_for_read(SesionSimulacion) is None
+		terminar_peticion(token)
+
+	def test_datos_cambiados_por_otro_fijan_al_dueno(self, router, registered_user, otro_usuario):
+		"""✅ TC-077: Un análisis escrito por N8N fija a su dueño, no a otros usuarios"""
+		from apps.pragma_dashboard.models import SesionSimulacion
+		from apps.pragma_dashboard.replicas import fijado_a_primaria
+
+		SesionSimulacion.objects.create(usuario=registered_user, escenario_nombre='Biblioteca')
+
+		assert fijado_a_primaria(registered_user.pk)
+		assert not fijado_a_primaria(otro_usuario.pk)
+
+	@pytest.mark.skipif(
+		not getattr(django_settings, 'DATABASE_REPLICAS', []),
+		reason='Requiere una réplica local en DATABASE_REPLICA_URLS'
+	)
+	@pytest.mark.django_db(transaction=True, databases='__all__')
+	def test_dos_bases_locales(self, authenticated_client, registered_user):
+		"""✅ TC-078: Con dos bases locales, el historial se lee de la réplica salvo tras escribir"""
+		from django.db import connections
+		replica = connections[django_settings.DATABASE_REPLICAS[0]]
+		url = '/api/v1/dashboard/sesiones/mi_historial/'
+
+		with CaptureQueriesContext(replica) as en_replica:
+			assert authenticated_client.get(url).status_code == status.HTTP_200_OK
+		assert any('pragma_dashboard_sesionsimulacion' in q['sql'] for q in en_replica.captured_queries)
+
+		authenticated_client.post('/api/v1/dashboard/sesiones/', {'escenario_nombre': 'Patio'}, format='json')
+
+		with CaptureQueriesContext(replica) as en_replica:
+			response = authenticated_client.get(url)
+		assert response.data['count'] == 1
+		assert en_replica.captured_queries == []
+
+
+# ============ PRUEBAS DEL POOL DE CONEXIONES ============
+
+class PoolFalso:
+	"""Sustituto de psycopg_pool.ConnectionPool: entrega conexiones falsas"""
+
+	def __init__(self):
+		self.devueltas = []
+
+	def getconn(self):
+		from unittest import mock
+		conexion = mock.Mock()
+		conexion._pool = self
+		return conexion
+
+	def putconn(self, conexion):
+		self.devueltas.append(conexion)
+
+	def get_stats(self):
+		return {
+			'pool_min': 1, 'pool_max': 4, 'pool_size': 4, 'pool_available': 1,
+			'requests_queued': 4, 'requests_wait_ms': 90,
+			'connections_num': 6, 'connections_lost': 1, 'returns_bad': 1,
+		}
+
+	def close(self, timeout=None):
+		pass
+
+
+@pytest.mark.django_db
+class TestPoolConexiones:
+	"""Backend PostgreSQL con pool por proceso y sus métricas"""
+
+	@pytest.fixture
+	def wrapper(self):
+		import os
+		from config.postgresql_pool import metricas
+		from config.postgresql_pool.base import DatabaseWrapper, _firma
+
+		settings_dict = {
+			'ENGINE': 'config.postgresql_pool', 'NAME': 'pragma', 'USER': 'pragma', 'PASSWORD': '',
+			'HOST': 'localhost', 'PORT': '5432', 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False,
+			'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False, 'TIME_ZONE': None,
+			'OPTIONS': {'pool': {'max_size': 4}}, 'TEST': {},
+		}
+		wrapper = DatabaseWrapper(settings_dict, alias='pool_prueba')
+		pool = PoolFalso()
+		clave = ('pool_prueba', os.getpid(), _firma(settings_dict))
+		metricas.pools[clave] = pool
+		yield wrapper, pool
+		metricas.pools.pop(clave, None)
+
+	def test_conexion_sale_y_vuelve_al_pool(self, wrapper):
+		"""✅ TC-079: Conectar toma del pool y cerrar devuelve; OPTIONS['pool'] no llega a connect"""
+		wrapper, pool = wrapper
+
+		assert 'pool' not in wrapper.get_connection_params()
+		wrapper.connection = wrapper.get_new_connection({})
+		conexion = wrapper.connection
+		wrapper._close()
+
+		assert pool.devueltas == [conexion]
+		assert wrapper.connection is None
+
+	def test_requiere_conn_max_age_cero(self):
+		"""✅ TC-080: Conexiones persistentes y pool son excluyentes"""
+		from django.core.exceptions import ImproperlyConfigured
+		from config.postgresql_pool.base import DatabaseWrapper
+
+		with pytest.raises(ImproperlyConfigured):
+			DatabaseWrapper({'CONN_MAX_AGE': 600, 'OPTIONS': {}}, alias='pool_prueba')
+
+	def test_metricas_solo_admin(self, wrapper, authenticated_client, registered_user):
+		"""✅ TC-081: Espera, saturación y recambio por pool, solo para staff"""
+		url = '/api/v1/dashboard/db/estadisticas/'
+		assert authenticated_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+		registered_user.is_staff = True
+		registered_user.save()
+
+		metricas = authenticated_client.get(url).data['pools']['pool_prueba']
+		assert metricas['saturacion'] == 0.75
+		assert metricas['espera_promedio_ms'] == 22.5
+		assert metricas['recambio'] == 8
+
+
+@pytest.mark.django_db
+class TestCalentamiento:
+	"""Preload y calentamiento de workers de gunicorn"""
+
+	def test_calentar_aplicacion(self):
+		"""✅ TC-082: Compila URLs, arma serializers y deja el cifrador precargado"""
+		from django.conf import settings
+		from config.calentamiento import calentar_aplicacion
+		from apps.pragma_dashboard.utils.encryption import obtener_cifrador
+
+		obtener_cifrador.cache_clear()
+		resultado = calentar_aplicacion()
+
+		assert resultado['patrones_url'] > 0
+		assert resultado['serializers'] > 0
+		assert obtener_cifrador.cache_info().currsize == 1
+		assert obtener_cifrador(settings.ENCRYPTION_KEY) is obtener_cifrador(settings.ENCRYPTION_KEY)
+
+	def test_abrir_conexiones_y_memoria(self):
+		"""✅ TC-083: El worker abre sus conexiones e informa su memoria"""
+		from config.calentamiento import abrir_conexiones, memoria_proceso
+
+		assert 'default' in abrir_conexiones()
+		assert memoria_proceso()['rss_mb'] > 0
+
+	def test_latencia_primera_peticion(self):
+		"""✅ TC-084: Solo se informa la primera petición de cada worker; gc vuelve tras el fork"""
+		import gc
+		import runpy
+		from pathlib import Path
+		from types import SimpleNamespace
+		from unittest.mock import MagicMock
+
+		try:
+			config = runpy.run_path(str(Path(__file__).resolve().parent.parent / 'gunicorn.conf.py'))
+			assert config['preload_app'] is True
+			assert not gc.isenabled()
+			config['post_fork'](None, None)
+			assert gc.isenabled()
+		finally:
+			gc.enable()
+
+		worker = SimpleNamespace(pid=1, log=MagicMock(), primera_peticion=None)
+		peticion = SimpleNamespace(method='GET', path='/api/v1/dashboard/')
+		for _ in range(2):
+			config['pre_request'](worker, peticion)
+			config['post_request'](worker, peticion, {}, None)
+
+		assert worker.log.info.call_count == 1
+		assert 'primera petición' in worker.log.info.call_args[0][0]
+
+
+class TestArranque:
+	"""Arranque en frío: importaciones diferidas y presupuesto"""
+
+	@pytest.fixture
+	def entorno(self, monkeypatch):
+		import os
+		import sys
+		# Los procesos medidos ven los mismos módulos que esta sesión
+		monkeypatch.setenv('PYTHONPATH', os.pathsep.join(sys.path))
+
+	def test_configurar_django_no_importa_modulos_pesados(self, entorno):
+		"""✅ TC-085: Configurar Django no imprime nada ni carga cryptography ni simplejwt"""
+		import subprocess
+		import sys
+		from django.conf import settings
+
+		script = (
+			'import django, sys; django.setup(); '
+			'print([m for m in ("cryptography", "jwt", "rest_framework_simplejwt.tokens", "drf_yasg") if m in sys.modules])'
+		)
+		proceso = subprocess.run(
+			[sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+		)
+
+		assert proceso.stdout.strip() == '[]'
+		assert len(settings.ENCRYPTION_KEY) == 32
+
+	def test_agrupar_importtime(self):
+		"""✅ TC-086: El tiempo propio de importación se suma por paquete raíz"""
+		from apps.pragma_dashboard.management.commands.benchmark_arranque import agrupar_importtime
+
+		salida = (
+			'import time: self [us] | cumulative | imported package\n'
+			'import time:       100 |        100 |   django.utils\n'
+			'import time:        50 |        150 | django\n'
+			'import time:        30 |         30 | cryptography.fernet\n'
+			'Unauthorized: /api/v1/dashboard/auth/profile/me/\n'
+		)
+
+		assert agrupar_importtime(salida) == {'django': 150, 'cryptography': 30}
+
+	@pytest.mark.slow
+	def test_presupuesto_de_arranque(self, entorno):
+		"""✅ TC-087: El benchmark sirve la primera respuesta y falla fuera de presupuesto"""
+		from io import StringIO
+		from django.core.management import call_command
+		from django.core.management.base import CommandError
+
+		salida = StringIO()
+		call_command('benchmark_arranque', repeticiones=1, presupuesto_ms=60000, stdout=salida)
+		assert 'primera_respuesta_ms' in salida.getvalue()
+
+		with pytest.raises(CommandError, match='fuera de presupuesto'):
+			call_command('benchmark_arranque', repeticiones=1, presupuesto_ms=1, stdout=StringIO())
+
+	@pytest.mark.slow
+	def test_arranque_con_error_no_pasa(self, entorno, settings):
+		"""✅ TC-095: Una respuesta distinta de 401 (p. ej. DisallowedHost) falla el benchmark"""
+		from io import StringIO
+		from django.core.management import call_command
+		from django.core.management.base import CommandError
+
+		# El proceso medido no acepta este host: responde 400
+		settings.ALLOWED_HOSTS = ['host-no-permitido.invalid']
+		with pytest.raises(CommandError, match='Se esperaba 401'):
+			call_command('benchmark_arranque', repeticiones=1, presupuesto_ms=60000, stdout=StringIO())